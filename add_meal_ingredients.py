@@ -5,11 +5,11 @@ from pathlib import Path
 current_dir = Path(__file__).parent
 sys.path.append(str(current_dir))
 
-from app import app, db
-from models import Meal, Inventory, MealIngredient
+from application import create_app
+from models import db, Meal, Inventory, MealIngredient
 
 
-def create_meal_ingredients():
+def create_meal_ingredients(app):
     print("=" * 60)
     print("СОЗДАНИЕ СВЯЗЕЙ МЕЖДУ БЛЮДАМИ И ИНГРЕДИЕНТАМИ")
     print("=" * 60)
@@ -156,7 +156,7 @@ def create_meal_ingredients():
             traceback.print_exc()
 
 
-def check_meal_ingredients():
+def check_meal_ingredients(app):
     with app.app_context():
         print("=" * 60)
         print("ПРОВЕРКА СВЯЗЕЙ МЕЖДУ БЛЮДАМИ И ИНГРЕДИЕНТАМИ")
@@ -192,4 +192,4 @@ def check_meal_ingredients():
 
 
 if __name__ == '__main__':
-    create_meal_ingredients()
\ No newline at end of file
+    create_meal_ingredients(create_app(register_views=False))
\ No newline at end of file
@@ -0,0 +1,199 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, WatchedFileHandler
+
+from flask import g, has_request_context, request
+
+REQUEST_ID_HEADER = 'X-Request-ID'
+RECORD_FIELDS = ('request_id', 'user_id', 'method', 'route', 'path', 'status', 'duration_ms', 'sampled_out')
+
+_listeners = []
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'source': f'{record.module}:{record.lineno}',
+        }
+        for field in RECORD_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class RequestContextFilter(logging.Filter):
+    def filter(self, record):
+        if not has_request_context():
+            return True
+
+        record.request_id = g.get('request_id')
+        record.method = request.method
+        record.route = request.endpoint
+        record.path = request.path
+        user = g.get('_login_user')
+        if user is not None and getattr(user, 'is_authenticated', False):
+            record.user_id = user.id
+        started = g.get('request_started')
+        if started is not None and getattr(record, 'duration_ms', None) is None:
+            record.duration_ms = round((time.perf_counter() - started) * 1000, 1)
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    def __init__(self, rates, burst, window):
+        super().__init__()
+        self.rates = {logging.getLevelName(level): rate for level, rate in rates.items()}
+        self.burst = burst
+        self.window = window
+        self.sites = {}
+        self.lock = threading.Lock()
+
+    def filter(self, record):
+        rate = self.rates.get(record.levelno, 1.0)
+        if rate >= 1.0:
+            return True
+
+        now = time.monotonic()
+        key = (record.pathname, record.lineno)
+        with self.lock:
+            site = self.sites.get(key)
+            if site is None or now - site[0] >= self.window:
+                site = self.sites[key] = [now, 0, 0]
+            site[1] += 1
+            if site[1] <= self.burst:
+                return True
+            if rate > 0 and (site[1] - self.burst) % max(1, round(1 / rate)) == 0:
+                record.sampled_out = site[2]
+                site[2] = 0
+                return True
+            site[2] += 1
+            return False
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def prepare(self, record):
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def queued(handler, size):
+    log_queue = queue.Queue(maxsize=size)
+    listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    listener.start()
+    _listeners.append((listener, queue_handler))
+    return queue_handler
+
+
+def _restart_listeners_in_child():
+    for listener, queue_handler in _listeners:
+        log_queue = queue.Queue(maxsize=listener.queue.maxsize)
+        listener.queue = queue_handler.queue = log_queue
+        listener._thread = None
+        listener.start()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_restart_listeners_in_child)
+
+
+def _start_request():
+    g.request_started = time.perf_counter()
+    g.request_id = request.headers.get(REQUEST_ID_HEADER) or uuid.uuid4().hex
+
+
+def _finish_request(response):
+    request_id = g.get('request_id')
+    if request_id:
+        response.headers[REQUEST_ID_HEADER] = request_id
+    g.request_status = response.status_code
+    return response
+
+
+def _access_log(logger):
+    def log_request(exc):
+        if g.get('request_started') is None:
+            return
+        status = g.get('request_status', 500)
+        logger.log(logging.ERROR if status >= 500 else logging.INFO, f'{request.method} {request.path} {status}',
+                   extra={'status': status})
+
+    return log_request
+
+
+def init_logging(app):
+    if app.debug or app.testing:
+        return
+
+    queue_handler = next(
+        (h for h in app.logger.handlers if isinstance(h, NonBlockingQueueHandler)), None
+    ) or _start_listener(app)
+    app.extensions['log_queue_handler'] = queue_handler
+    app.logger.setLevel(app.config['LOG_LEVEL'])
+
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    if app.config['LOG_ACCESS']:
+        access_logger = app.logger.getChild('access')
+        access_logger.propagate = False
+        if queue_handler not in access_logger.handlers:
+            access_logger.addHandler(queue_handler)
+        app.teardown_request(_access_log(access_logger))
+
+
+def externally_rotated(app):
+    return app.config['LOG_ROTATION'] == 'external'
+
+
+def _start_listener(app):
+    if externally_rotated(app):
+        file_handler = WatchedFileHandler(app.config['LOG_FILE'], encoding='utf-8')
+    else:
+        file_handler = RotatingFileHandler(app.config['LOG_FILE'], maxBytes=app.config['LOG_MAX_BYTES'],
+                                           backupCount=app.config['LOG_BACKUP_COUNT'], encoding='utf-8')
+    file_handler.setFormatter(JsonFormatter())
+
+    queue_handler = queued(file_handler, app.config['LOG_QUEUE_SIZE'])
+    queue_handler.addFilter(SamplingFilter(app.config['LOG_SAMPLE_RATES'], app.config['LOG_SAMPLE_BURST'],
+                                           app.config['LOG_SAMPLE_WINDOW']))
+    queue_handler.addFilter(RequestContextFilter())
+    app.logger.addHandler(queue_handler)
+    return queue_handler
+
+
+@atexit.register
+def _stop_listeners():
+    while _listeners:
+        listener, _ = _listeners.pop()
+        listener.stop()
@@ -0,0 +1,179 @@
+import os
+
+from flask import Flask
+
+from models import db, login_manager, User, Meal, Order, Inventory
+from identity import load_user
+from migrations import upgrade as upgrade_schema
+from database import configure_database
+from routing import read_replica_url, READ_ONLY_BIND
+from wallet import credit, to_kopecks, OPENING
+from versions import track_changes
+from fragments import init_fragment_cache
+
+DEFAULT_CONFIG = 'config.DevelopmentConfig'
+
+
+def create_app(config=None, register_views=True, **overrides):
+    app = Flask(__name__)
+    app.config.from_object(config or os.environ.get('APP_CONFIG') or DEFAULT_CONFIG)
+    app.config.update(overrides)
+
+    replica_url = read_replica_url(app.config['SQLALCHEMY_DATABASE_URI'], app.config['READ_REPLICA_URL'])
+    if replica_url:
+        app.config['SQLALCHEMY_BINDS'] = {READ_ONLY_BIND: replica_url}
+
+    db.init_app(app)
+    configure_database(app)
+    track_changes()
+
+    if register_views:
+        init_web(app)
+    return app
+
+
+def init_web(app):
+    from flask_wtf.csrf import CSRFProtect
+    from views import register_blueprints
+    from app_logging import init_logging
+    from query_stats import init_query_stats
+    from metrics import init_metrics
+    from capture import init_capture
+
+    if not app.config.get('SECRET_KEY'):
+        raise RuntimeError('SECRET_KEY не задан: укажите его в переменной окружения SECRET_KEY')
+
+    init_logging(app)
+    CSRFProtect(app)
+    login_manager.init_app(app)
+    login_manager.user_loader(load_user)
+    login_manager.login_view = 'auth.login'
+    login_manager.login_message = 'Пожалуйста, войдите в систему.'
+    register_blueprints(app)
+    init_query_stats(app)
+    init_metrics(app)
+    init_capture(app)
+    init_fragment_cache(app)
+
+    if app.config['SCHEDULER_ENABLED']:
+        from scheduler import start_scheduler
+        start_scheduler(app)
+
+
+def init_database(app):
+    with app.app_context():
+        upgrade_schema()
+
+        admin_exists = User.query.filter_by(username='admin').first()
+        if not admin_exists:
+            print("=" * 60)
+            print("НАЧАЛЬНАЯ НАСТРОЙКА БАЗЫ ДАННЫХ")
+            print("=" * 60)
+
+            admin = User(
+                username='admin',
+                email='admin@school.ru',
+                role='администратор',
+                grade='Админ'
+            )
+            admin.set_password('Admin123!')
+
+            chef = User(
+                username='chef',
+                email='chef@school.ru',
+                role='повар',
+                grade='Повар'
+            )
+            chef.set_password('Chef123!')
+
+            student = User(
+                username='student',
+                email='student@school.ru',
+                role='ученик',
+                grade='10А'
+            )
+            student.set_password('Student123!')
+
+            db.session.add_all([admin, chef, student])
+            db.session.flush()
+            credit(admin.id, to_kopecks(10000), OPENING)
+            credit(chef.id, to_kopecks(5000), OPENING)
+            db.session.commit()
+            print("✅ Созданы тестовые пользователи")
+
+            if Inventory.query.count() == 0:
+                ingredients = [
+                    Inventory(ingredient='Мука пшеничная', quantity=50.0, unit='кг', min_quantity=10.0),
+                    Inventory(ingredient='Сахар', quantity=30.0, unit='кг', min_quantity=5.0),
+                    Inventory(ingredient='Яйца', quantity=200.0, unit='шт', min_quantity=50.0),
+                    Inventory(ingredient='Молоко', quantity=40.0, unit='л', min_quantity=10.0),
+                    Inventory(ingredient='Масло сливочное', quantity=10.0, unit='кг', min_quantity=2.0),
+                    Inventory(ingredient='Картофель', quantity=100.0, unit='кг', min_quantity=20.0),
+                    Inventory(ingredient='Морковь', quantity=30.0, unit='кг', min_quantity=5.0),
+                    Inventory(ingredient='Лук', quantity=20.0, unit='кг', min_quantity=5.0),
+                    Inventory(ingredient='Курица', quantity=25.0, unit='кг', min_quantity=10.0),
+                    Inventory(ingredient='Говядина', quantity=15.0, unit='кг', min_quantity=5.0),
+                    Inventory(ingredient='Рис', quantity=20.0, unit='кг', min_quantity=5.0),
+                    Inventory(ingredient='Макароны', quantity=25.0, unit='кг', min_quantity=5.0),
+                    Inventory(ingredient='Помидоры', quantity=15.0, unit='кг', min_quantity=3.0),
+                    Inventory(ingredient='Огурцы', quantity=10.0, unit='кг', min_quantity=2.0),
+                    Inventory(ingredient='Капуста', quantity=20.0, unit='кг', min_quantity=5.0),
+                    Inventory(ingredient='Сметана', quantity=15.0, unit='кг', min_quantity=3.0),
+                    Inventory(ingredient='Сыр', quantity=10.0, unit='кг', min_quantity=2.0),
+                    Inventory(ingredient='Хлеб', quantity=50.0, unit='шт', min_quantity=10.0),
+                    Inventory(ingredient='Масло растительное', quantity=20.0, unit='л', min_quantity=5.0),
+                    Inventory(ingredient='Соль', quantity=10.0, unit='кг', min_quantity=2.0),
+                    Inventory(ingredient='Колбаса', quantity=10.0, unit='кг', min_quantity=2.0),
+                    Inventory(ingredient='Сухофрукты', quantity=5.0, unit='кг', min_quantity=1.0),
+                    Inventory(ingredient='Чай', quantity=1.0, unit='кг', min_quantity=0.2),
+                ]
+                db.session.add_all(ingredients)
+                db.session.commit()
+                print(f"✅ Создано {len(ingredients)} ингредиентов")
+
+            if Meal.query.count() == 0:
+                meals = [
+                    Meal(name='Каша манная', description='Манная каша на молоке с сахаром', meal_type='завтрак',
+                         price=80.0, calories=250, ingredients='манка, молоко, сахар, масло',
+                         allergens='глютен, молоко', is_available=True),
+                    Meal(name='Омлет с сыром', description='Пышный омлет с сыром', meal_type='завтрак', price=95.0,
+                         calories=300, ingredients='яйца, молоко, сыр, масло', allergens='яйца, молоко',
+                         is_available=True),
+                    Meal(name='Бутерброды с колбасой', description='Бутерброды с докторской колбасой',
+                         meal_type='завтрак', price=75.0, calories=180, ingredients='хлеб, колбаса, масло',
+                         allergens='глютен', is_available=True),
+                    Meal(name='Суп куриный с лапшой', description='Наваристый куриный суп с лапшой', meal_type='обед',
+                         price=120.0, calories=350, ingredients='курица, лапша, морковь, лук, картофель',
+                         allergens='глютен', is_available=True),
+                    Meal(name='Котлета с картофельным пюре', description='Куриная котлета с пюре и овощами',
+                         meal_type='обед', price=135.0, calories=450,
+                         ingredients='курица, картофель, молоко, масло, лук', allergens='', is_available=True),
+                    Meal(name='Макароны по-флотски', description='Макароны с мясным фаршем', meal_type='обед',
+                         price=110.0, calories=380, ingredients='макароны, говядина, лук, морковь', allergens='глютен',
+                         is_available=True),
+                    Meal(name='Компот из сухофруктов', description='Компот из кураги и изюма', meal_type='напиток',
+                         price=25.0, calories=80, ingredients='сухофрукты, сахар, вода', allergens='',
+                         is_available=True),
+                    Meal(name='Чай с сахаром', description='Черный чай с сахаром', meal_type='напиток', price=20.0,
+                         calories=50, ingredients='чай, сахар, вода', allergens='', is_available=True),
+                ]
+                db.session.add_all(meals)
+                db.session.commit()
+                print(f"✅ Создано {len(meals)} блюд")
+
+            print("\n" + "=" * 60)
+            print("✅ БАЗА ДАННЫХ ГОТОВА К РАБОТЕ!")
+            print("=" * 60)
+            print("\nДанные для входа:")
+            print("  👨‍💼  Администратор: admin / Admin123!")
+            print("  👨‍🍳  Повар:       chef / Chef123!")
+            print("  👨‍🎓  Ученик:      student / Student123!")
+            print("\n💡 Ученик начинается с балансом 0 руб.")
+        else:
+            print("=" * 60)
+            print("✅ БАЗА ДАННЫХ УЖЕ НАСТРОЕНА")
+            print("=" * 60)
+            print(f"👥 Всего пользователей: {User.query.count()}")
+            print(f"🍽️  Блюд в меню: {Meal.query.count()}")
+            print(f"📦 Ингредиентов на складе: {Inventory.query.count()}")
+            print(f"📊 Всего заказов: {Order.query.count()}")
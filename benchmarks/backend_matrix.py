@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+import argparse
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir.parent))
+
+SMOKE_PAGES = {
+    ('admin', 'Admin123!'): ['/admin', '/admin/users', '/statistics', '/reports', '/manage_requests'],
+    ('chef', 'Chef123!'): ['/chef', '/inventory', '/prepared_meals', '/purchase_request', '/prepare_meal'],
+    ('student', 'Student123!'): ['/student', '/menu', '/order?type=обед', '/buy_subscription', '/add_balance',
+                                 '/allergies', '/feedback', '/notifications', '/api/notifications/unread'],
+}
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def login(app, username, password):
+    client = app.test_client()
+    response = client.post('/login', data={'username': username, 'password': password})
+    if response.status_code != 302 or not response.headers['Location'].endswith('/dashboard'):
+        raise AssertionError(f'login failed for {username}')
+    return client
+
+
+def reset_schema(app):
+    from app import db, create_tables
+
+    with app.app_context():
+        db.drop_all()
+    with contextlib.redirect_stdout(io.StringIO()):
+        create_tables()
+
+
+def run_smoke(app):
+    failures = []
+    for (username, password), pages in SMOKE_PAGES.items():
+        client = login(app, username, password)
+        for page in pages:
+            status = client.get(page).status_code
+            if status != 200:
+                failures.append(f'{username} {page}: {status}')
+    return failures
+
+
+def run_load(app, threads, iterations):
+    from app import db
+    from models import User, Inventory
+
+    with app.app_context():
+        student = User.query.filter_by(username='student').one()
+        ingredient = Inventory.query.filter_by(ingredient='Яйца').one()
+        ingredient.quantity = threads * iterations // 2
+        db.session.commit()
+        student_id, ingredient_id = student.id, ingredient.id
+        start_balance, start_stock = student.balance, ingredient.quantity
+
+    latencies = []
+    counters = {'topped_up': 0, 'used': 0, 'errors': 0}
+    lock = threading.Lock()
+
+    def client_loop(index):
+        client = login(app, 'student', 'Student123!') if index % 2 == 0 else login(app, 'chef', 'Chef123!')
+        for _ in range(iterations):
+            started = time.perf_counter()
+            if index % 2 == 0:
+                response = client.post('/add_balance', data={'amount': '10'})
+                key = 'topped_up'
+            else:
+                response = client.post('/use_ingredient', data={'ingredient_id': ingredient_id, 'amount': '1'})
+                key = 'used'
+            elapsed = (time.perf_counter() - started) * 1000
+            with client.session_transaction() as sess:
+                flashes = sess.pop('_flashes', [])
+            with lock:
+                latencies.append(elapsed)
+                if response.status_code != 302:
+                    counters['errors'] += 1
+                elif any(category == 'success' for category, _ in flashes):
+                    counters[key] += 1
+
+    workers = [threading.Thread(target=client_loop, args=(i,)) for i in range(threads)]
+    started = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    seconds = time.perf_counter() - started
+
+    with app.app_context():
+        balance = db.session.get(User, student_id).balance
+        stock = db.session.get(Inventory, ingredient_id).quantity
+
+    return {
+        'requests_per_second': len(latencies) / seconds if seconds else 0.0,
+        'p50': percentile(latencies, 50),
+        'p95': percentile(latencies, 95),
+        'errors': counters['errors'],
+        'lost_balance_updates': round((start_balance + 10 * counters['topped_up'] - balance) / 10),
+        'lost_stock_updates': round(stock - (start_stock - counters['used'])),
+        'negative_stock': stock < 0,
+    }
+
+
+def run_backend(args):
+    from app import app, db
+
+    app.config['WTF_CSRF_ENABLED'] = False
+    app.logger.disabled = True
+
+    started = time.perf_counter()
+    reset_schema(app)
+    failures = run_smoke(app)
+    smoke_seconds = time.perf_counter() - started
+
+    load = run_load(app, args.threads, args.iterations)
+    with app.app_context():
+        dialect = db.engine.dialect.name
+    return {'dialect': dialect, 'failures': failures, 'smoke_seconds': smoke_seconds, 'load': load}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Проверка приложения на SQLite и PostgreSQL')
+    parser.add_argument('--postgres-url', default=os.environ.get('POSTGRES_URL'),
+                        help='URL отдельной тестовой базы PostgreSQL (все таблицы будут пересозданы)')
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--iterations', type=int, default=25)
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_backend(args)))
+        return
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        backends = [('sqlite', f'sqlite:///{os.path.join(tmp, "matrix.db")}')]
+        if args.postgres_url:
+            backends.append(('postgresql', args.postgres_url))
+        else:
+            print("⚠️  POSTGRES_URL не задан, PostgreSQL пропущен")
+
+        for name, url in backends:
+            env = dict(os.environ, DATABASE_URL=url, APP_CONFIG='config.SQLiteTunedConfig')
+            env.setdefault('SECRET_KEY', 'benchmark-secret-key')
+            child = subprocess.run(
+                [sys.executable, __file__, '--child', '--threads', str(args.threads),
+                 '--iterations', str(args.iterations)],
+                env=env, cwd=tmp, capture_output=True, text=True
+            )
+            if child.returncode != 0:
+                rows.append((name, None, child.stderr.strip().splitlines()[-1:]))
+            else:
+                rows.append((name, json.loads(child.stdout.strip().splitlines()[-1]), []))
+
+    print("=" * 100)
+    print(f"BACKEND MATRIX: {args.threads} clients × {args.iterations} balance/stock updates")
+    print("=" * 100)
+    print(f"{'backend':<11} {'smoke':>7} {'req/s':>8} {'p50':>9} {'p95':>9} {'errors':>7} "
+          f"{'lost balance':>13} {'lost stock':>11}")
+    ok = True
+    for name, row, error in rows:
+        if row is None:
+            ok = False
+            print(f"{name:<11} ❌ {' '.join(error)}")
+            continue
+        load = row['load']
+        passed = not row['failures'] and not load['errors'] and not load['lost_balance_updates'] \
+            and not load['lost_stock_updates'] and not load['negative_stock']
+        ok = ok and passed
+        print(f"{name:<11} {'ok' if not row['failures'] else 'FAIL':>7} {load['requests_per_second']:>8.1f} "
+              f"{load['p50']:>7.1f}ms {load['p95']:>7.1f}ms {load['errors']:>7} "
+              f"{load['lost_balance_updates']:>13} {load['lost_stock_updates']:>11}")
+        for failure in row['failures']:
+            print(f"  • {failure}")
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
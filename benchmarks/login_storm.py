@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+import argparse
+import io
+import contextlib
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from pathlib import Path
+
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir.parent))
+
+BENCH_PASSWORD = 'Bench123!'
+
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def request(opener, url, data=None):
+    started = time.perf_counter()
+    try:
+        response = opener.open(url, data=data, timeout=120)
+        status = response.status
+        location = response.headers.get('Location', '')
+        response.read()
+    except urllib.error.HTTPError as e:
+        status = e.code
+        location = e.headers.get('Location', '')
+    return status, location, (time.perf_counter() - started) * 1000
+
+
+def setup_app(db_path, users, method):
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+    os.environ['PASSWORD_HASH_METHOD'] = method
+
+    from app import app, db, create_tables
+    from models import User
+    from werkzeug.security import generate_password_hash
+    from sqlalchemy import insert
+
+    app.config['WTF_CSRF_ENABLED'] = False
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        create_tables()
+
+    with app.app_context():
+        password_hash = generate_password_hash(BENCH_PASSWORD, method=method)
+        db.session.execute(insert(User), [
+            {
+                'username': f'bench{i}',
+                'email': f'bench{i}@school.ru',
+                'password_hash': password_hash,
+                'role': 'ученик',
+                'grade': '5А'
+            }
+            for i in range(users)
+        ])
+        db.session.commit()
+
+    return app
+
+
+def probe(base_url, stop, latencies):
+    opener = urllib.request.build_opener(NoRedirect)
+    while not stop.is_set():
+        status, _, elapsed = request(opener, f'{base_url}/home')
+        if status == 200:
+            latencies.append(elapsed)
+        time.sleep(0.01)
+
+
+def storm(base_url, users, logins, concurrency):
+    counter = iter(range(logins))
+    lock = threading.Lock()
+    latencies = []
+    results = {'ok': 0, 'throttled': 0, 'failed': 0}
+
+    def client():
+        opener = urllib.request.build_opener(NoRedirect)
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            data = urllib.parse.urlencode({'username': f'bench{i % users}', 'password': BENCH_PASSWORD}).encode()
+            status, location, elapsed = request(opener, f'{base_url}/login', data)
+            with lock:
+                latencies.append(elapsed)
+                if status == 302 and location.endswith('/dashboard'):
+                    results['ok'] += 1
+                elif status == 302:
+                    results['throttled'] += 1
+                else:
+                    results['failed'] += 1
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - started, latencies, results
+
+
+def run_mode(app, base_url, name, pool_size, args):
+    app.config['PASSWORD_POOL_SIZE'] = pool_size
+
+    idle = []
+    stop = threading.Event()
+    t = threading.Thread(target=probe, args=(base_url, stop, idle))
+    t.start()
+    time.sleep(2)
+    stop.set()
+    t.join()
+
+    busy = []
+    stop = threading.Event()
+    t = threading.Thread(target=probe, args=(base_url, stop, busy))
+    t.start()
+    seconds, login_latencies, results = storm(base_url, args.users, args.logins, args.concurrency)
+    stop.set()
+    t.join()
+
+    return {
+        'mode': name,
+        'logins_per_second': results['ok'] / seconds if seconds else 0.0,
+        'ok': results['ok'],
+        'throttled': results['throttled'],
+        'failed': results['failed'],
+        'login_p50': percentile(login_latencies, 50),
+        'login_p95': percentile(login_latencies, 95),
+        'idle_p50': percentile(idle, 50),
+        'busy_p50': percentile(busy, 50),
+        'busy_p95': percentile(busy, 95),
+        'busy_p99': percentile(busy, 99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Нагрузочный тест утреннего входа учеников')
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--logins', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--pool-size', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--method', default='scrypt')
+    args = parser.parse_args()
+
+    from werkzeug.serving import make_server
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = setup_app(os.path.join(tmp, 'bench.db'), args.users, args.method)
+        app.logger.disabled = True
+        logging.getLogger('werkzeug').setLevel(logging.ERROR)
+
+        server = make_server('127.0.0.1', 0, app, threaded=True)
+        server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+        server_thread.start()
+        base_url = f'http://127.0.0.1:{server.server_port}'
+
+        rows = [
+            run_mode(app, base_url, 'inline', 0, args),
+            run_mode(app, base_url, f'pool({args.pool_size})', args.pool_size, args),
+        ]
+        server.shutdown()
+
+    print("=" * 100)
+    print(f"LOGIN STORM: {args.logins} logins, {args.concurrency} clients, hash method {args.method}")
+    print("=" * 100)
+    print(f"{'mode':<10} {'logins/s':>9} {'ok':>5} {'thr':>5} {'err':>5} {'login p50':>10} {'login p95':>10} "
+          f"{'/home idle p50':>15} {'/home p50':>10} {'/home p95':>10} {'/home p99':>10}")
+    for row in rows:
+        print(f"{row['mode']:<10} {row['logins_per_second']:>9.1f} {row['ok']:>5} {row['throttled']:>5} "
+              f"{row['failed']:>5} {row['login_p50']:>8.0f}ms {row['login_p95']:>8.0f}ms "
+              f"{row['idle_p50']:>13.1f}ms {row['busy_p50']:>8.1f}ms {row['busy_p95']:>8.1f}ms "
+              f"{row['busy_p99']:>8.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
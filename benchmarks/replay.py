@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from pathlib import Path
+
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir.parent))
+
+from suite import percentile, route_of, scratch_app, setup_database, start_driver, summarize
+
+ADMIN_PASSWORD = 'Admin123!'
+REPLAY_PASSWORD = 'Replay123!'
+ISO_DATE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+
+
+def load_capture(path, since=None, until=None):
+    from capture import read_capture
+
+    entries = []
+    for entry in read_capture(path):
+        entry['at'] = datetime.fromisoformat(entry['ts'])
+        clock = entry['at'].astimezone().strftime('%H:%M')
+        if (since and clock < since) or (until and clock >= until):
+            continue
+        entries.append(entry)
+    entries.sort(key=lambda e: e['at'])
+    return entries
+
+
+def shift_dates(fields, days):
+    if not days:
+        return fields
+
+    def shift(value):
+        if isinstance(value, list):
+            return [shift(v) for v in value]
+        if isinstance(value, str) and ISO_DATE.match(value):
+            return date.fromordinal(date.fromisoformat(value).toordinal() + days).isoformat()
+        return value
+
+    return {name: shift(value) for name, value in fields.items()}
+
+
+class Replayer:
+    def __init__(self, app, new_session, days_shift):
+        from capture import SECRET_MARKER
+        from generate_school import STUDENT_PASSWORD, CHEF_PASSWORD
+        from models import db, User
+
+        self.new_session = new_session
+        self.days_shift = days_shift
+        self.secret = SECRET_MARKER
+        self.passwords = {'ученик': STUDENT_PASSWORD, 'повар': CHEF_PASSWORD, 'администратор': ADMIN_PASSWORD}
+        with app.app_context():
+            self.pools = {
+                role: [username for (username,) in db.session.query(User.username).filter(
+                    User.role == role
+                ).order_by(User.id)]
+                for role in self.passwords
+            }
+        self.sessions = {}
+        self.lock = threading.Lock()
+
+    def identity(self, entry):
+        pool = self.pools.get(entry['role']) or []
+        if not entry['user_id'] or not pool:
+            return None
+        return pool[entry['user_id'] % len(pool)], self.passwords[entry['role']]
+
+    def session_for(self, identity, entry):
+        if identity is None:
+            return self.new_session()
+
+        with self.lock:
+            session = self.sessions.get(identity)
+        if session is None:
+            session = self.new_session()
+            if entry['endpoint'] != 'auth.login':
+                session.request('POST', '/login', {'username': identity[0], 'password': identity[1]})
+            with self.lock:
+                self.sessions[identity] = session
+        return session
+
+    def request(self, entry):
+        identity = self.identity(entry)
+        session = self.session_for(identity, entry)
+
+        form = shift_dates(entry['form'], self.days_shift)
+        if entry['endpoint'] == 'auth.login' and identity:
+            form.update(username=identity[0], password=identity[1])
+        form = {name: REPLAY_PASSWORD if value == self.secret else value for name, value in form.items()}
+
+        args = shift_dates(entry['args'], self.days_shift)
+        path = entry['path'] + (f'?{urllib.parse.urlencode(args, doseq=True)}' if args else '')
+        status, _, queries, elapsed = session.request(entry['method'], path, form or None)
+        return status, queries, elapsed
+
+
+def replay(entries, replayer, speed, workers):
+    records = []
+    lags = []
+    mismatched = 0
+    skipped = 0
+    records_lock = threading.Lock()
+    queues = {}
+
+    def run(entry, due):
+        nonlocal mismatched
+        lag = max(0.0, time.perf_counter() - due) * 1000
+        try:
+            status, queries, elapsed = replayer.request(entry)
+        except Exception:
+            status, queries, elapsed = 599, 0, 0.0
+        with records_lock:
+            records.append((route_of(entry['path']), entry['method'], elapsed, queries, status < 500))
+            lags.append(lag)
+            if status != entry['status']:
+                mismatched += 1
+
+    def drain(key):
+        while True:
+            with records_lock:
+                if not queues[key]:
+                    del queues[key]
+                    return
+                entry, due = queues[key][0]
+            run(entry, due)
+            with records_lock:
+                queues[key].popleft()
+
+    started = time.perf_counter()
+    first = entries[0]['at'] if entries else None
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for entry in entries:
+            if entry['files']:
+                skipped += 1
+                continue
+            due = started + ((entry['at'] - first).total_seconds() / speed if speed else 0.0)
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+            key = replayer.identity(entry)
+            if key is None:
+                executor.submit(run, entry, due)
+                continue
+            with records_lock:
+                pending = queues.get(key)
+                if pending is not None:
+                    pending.append((entry, due))
+                    continue
+                queues[key] = deque([(entry, due)])
+            executor.submit(drain, key)
+    seconds = time.perf_counter() - started
+
+    report = summarize(seconds, records)
+    report.update(
+        skipped=skipped,
+        status_mismatches=mismatched,
+        lag_p95=round(percentile(lags, 95), 2),
+        captured_seconds=round((entries[-1]['at'] - first).total_seconds(), 1) if entries else 0.0
+    )
+    return report
+
+
+def prepare(args, tmp):
+    db_path = os.path.join(tmp, 'replay.db')
+    if not args.database:
+        app, _ = setup_database(db_path, args)
+        return app
+
+    from migrations import upgrade
+
+    with sqlite3.connect(args.database) as source, sqlite3.connect(db_path) as target:
+        source.backup(target)
+    app = scratch_app(db_path)
+    with app.app_context():
+        upgrade()
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Повтор записанного трафика на временной базе данных')
+    parser.add_argument('path', help='файл записи, например capture/requests.jsonl')
+    parser.add_argument('--speed', type=float, default=1.0, help='ускорение: 1 — в реальном времени, 0 — без пауз')
+    parser.add_argument('--since', help='начало окна в формате ЧЧ:ММ, например 11:30')
+    parser.add_argument('--until', help='конец окна в формате ЧЧ:ММ')
+    parser.add_argument('--driver', choices=['client', 'wsgi'], default='wsgi')
+    parser.add_argument('--workers', type=int, default=32)
+    parser.add_argument('--database', help='SQLite-файл, копия которого используется вместо сгенерированной школы')
+    parser.add_argument('--students', type=int, default=400)
+    parser.add_argument('--months', type=int, default=2)
+    parser.add_argument('--seed', type=int, default=20240901)
+    parser.add_argument('--json', action='store_true', help='вывести результат в JSON')
+    args = parser.parse_args()
+
+    os.environ.setdefault('APP_CONFIG', 'config.SQLiteTunedConfig')
+    os.environ.setdefault('SECRET_KEY', 'benchmark-secret-key')
+    os.environ['DATABASE_URL'] = 'sqlite:///replay.db'
+
+    entries = load_capture(args.path, args.since, args.until)
+    if not entries:
+        print("❌ В записи нет запросов для повтора")
+        sys.exit(1)
+    days_shift = (date.today() - entries[0]['at'].astimezone().date()).days
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = prepare(args, tmp)
+        server, new_session = start_driver(args.driver, app)
+        try:
+            report = replay(entries, Replayer(app, new_session, days_shift), args.speed, args.workers)
+        finally:
+            if server is not None:
+                server.shutdown()
+
+        from models import db
+        with app.app_context():
+            db.engine.dispose()
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return
+
+    print("=" * 100)
+    print(f"REPLAY: {args.path}, {len(entries)} requests over {report['captured_seconds']} s captured, "
+          f"speed {args.speed or 'max'}×, driver {args.driver}")
+    print("=" * 100)
+    print(f"  replayed in {report['seconds']} s, {report['throughput']} req/s, "
+          f"errors {report['errors']}, skipped uploads {report['skipped']}, "
+          f"status differs from capture {report['status_mismatches']}")
+    print(f"  latency p50 {report['p50']:.1f}ms p95 {report['p95']:.1f}ms p99 {report['p99']:.1f}ms, "
+          f"schedule lag p95 {report['lag_p95']:.1f}ms, queries/request {report['queries_per_request']:.1f}")
+    print()
+    print(f"{'route':<40} {'requests':>8} {'p50':>9} {'p95':>9} {'queries/req':>11} {'max':>5}")
+    for route, metrics in report['routes'].items():
+        print(f"{route:<40} {metrics['requests']:>8} {metrics['p50']:>7.1f}ms {metrics['p95']:>7.1f}ms "
+              f"{metrics['queries_per_request']:>11.1f} {metrics['max_queries']:>5}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir.parent))
+
+PROFILES = {
+    'default': None,
+    'tuned': 'config.SQLiteTunedConfig',
+}
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def seed(app, users, orders):
+    from app import db, create_tables
+    from models import User, Meal, Order, Notification
+    from sqlalchemy import insert
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        create_tables()
+
+    with app.app_context():
+        db.session.execute(insert(User), [
+            {
+                'username': f'bench{i}',
+                'email': f'bench{i}@school.ru',
+                'password_hash': '-',
+                'role': 'ученик',
+                'grade': f'{5 + i % 7}А',
+                'balance_kopecks': 100000
+            }
+            for i in range(users)
+        ])
+        meal_ids = [meal.id for meal in Meal.query.all()]
+        user_ids = [row.id for row in db.session.query(User.id).filter(User.username.like('bench%'))]
+        today = date.today()
+        db.session.execute(insert(Order), [
+            {
+                'user_id': random.choice(user_ids),
+                'meal_id': random.choice(meal_ids),
+                'meal_date': today + timedelta(days=random.randint(-30, 7)),
+                'meal_type': random.choice(['завтрак', 'обед']),
+                'quantity': 1,
+                'total_price': 100.0,
+                'status': random.choice(['paid', 'served']),
+                'payment_method': 'баланс'
+            }
+            for _ in range(orders)
+        ])
+        db.session.execute(insert(Notification), [
+            {'user_id': random.choice(user_ids), 'title': 'Меню', 'message': 'Новое меню', 'type': 'info'}
+            for _ in range(orders // 5)
+        ])
+        db.session.commit()
+        return user_ids, meal_ids
+
+
+def read_once(db, user_id):
+    from models import Order, Notification
+    from sqlalchemy import func
+
+    today = date.today()
+    Order.query.filter(Order.user_id == user_id, Order.meal_date >= today).order_by(Order.meal_date).limit(5).all()
+    db.session.query(func.count(Notification.id)).filter(
+        Notification.user_id == user_id, Notification.is_read == False
+    ).scalar()
+    db.session.query(func.sum(Order.total_price)).filter(
+        Order.meal_date == today, Order.status == 'paid'
+    ).scalar()
+    db.session.rollback()
+
+
+def write_once(db, user_id, meal_id):
+    from models import User, Order, Notification
+    from sqlalchemy import update, insert
+
+    db.session.execute(update(User).where(User.id == user_id).values(balance_kopecks=User.balance_kopecks - 10000))
+    db.session.execute(insert(Order).values(
+        user_id=user_id, meal_id=meal_id, meal_date=date.today(), meal_type='обед',
+        quantity=1, total_price=100.0, status='paid', payment_method='баланс'
+    ))
+    db.session.execute(insert(Notification).values(
+        user_id=user_id, title='Заказ оформлен', message='Заказ оплачен', type='success'
+    ))
+    db.session.commit()
+
+
+def worker(role, threads, seconds, user_ids, meal_ids, queue):
+    from app import app, db
+    from sqlalchemy.exc import OperationalError
+
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def loop():
+        rng = random.Random()
+        with app.app_context():
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    if role == 'read':
+                        read_once(db, rng.choice(user_ids))
+                    else:
+                        write_once(db, rng.choice(user_ids), rng.choice(meal_ids))
+                except OperationalError:
+                    db.session.rollback()
+                    with lock:
+                        errors[0] += 1
+                    continue
+                elapsed = (time.perf_counter() - started) * 1000
+                with lock:
+                    latencies.append(elapsed)
+
+    pool = [threading.Thread(target=loop) for _ in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    queue.put((role, latencies, errors[0]))
+
+
+def run_profile(args):
+    from app import app, db
+    from database import sqlite_settings
+
+    app.logger.disabled = True
+    user_ids, meal_ids = seed(app, args.users, args.orders)
+    with app.app_context():
+        settings = sqlite_settings(db.engine)
+
+    ctx = multiprocessing.get_context('fork')
+    queue = ctx.Queue()
+    processes = []
+    for role, count in (('read', args.readers), ('write', args.writers)):
+        for _ in range(args.processes):
+            processes.append(ctx.Process(
+                target=worker, args=(role, count, args.seconds, user_ids, meal_ids, queue)
+            ))
+
+    for p in processes:
+        p.start()
+    results = [queue.get() for _ in processes]
+    for p in processes:
+        p.join()
+
+    row = {'settings': settings}
+    for role in ('read', 'write'):
+        latencies = [value for r, values, _ in results if r == role for value in values]
+        row[role] = {
+            'ops': len(latencies) / args.seconds,
+            'errors': sum(e for r, _, e in results if r == role),
+            'p50': percentile(latencies, 50),
+            'p95': percentile(latencies, 95),
+            'p99': percentile(latencies, 99),
+        }
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Параллельное чтение и запись в SQLite: сравнение профилей')
+    parser.add_argument('--profiles', default=','.join(PROFILES))
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--orders', type=int, default=20000)
+    parser.add_argument('--processes', type=int, default=2)
+    parser.add_argument('--readers', type=int, default=4, help='потоков чтения в каждом процессе')
+    parser.add_argument('--writers', type=int, default=1, help='потоков записи в каждом процессе')
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_profile(args)))
+        return
+
+    rows = []
+    for name in args.profiles.split(','):
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ, DATABASE_URL=f'sqlite:///{os.path.join(tmp, "bench.db")}')
+            env.pop('APP_CONFIG', None)
+            env.setdefault('SECRET_KEY', 'benchmark-secret-key')
+            if PROFILES[name]:
+                env['APP_CONFIG'] = PROFILES[name]
+            child = subprocess.run(
+                [sys.executable, __file__, '--child',
+                 '--users', str(args.users), '--orders', str(args.orders), '--processes', str(args.processes),
+                 '--readers', str(args.readers), '--writers', str(args.writers), '--seconds', str(args.seconds)],
+                env=env, cwd=tmp, capture_output=True, text=True, check=True
+            )
+            rows.append((name, json.loads(child.stdout.strip().splitlines()[-1])))
+
+    print("=" * 100)
+    print(f"SQLITE CONCURRENCY: {args.processes} processes × ({args.readers} readers + {args.writers} writers), "
+          f"{args.seconds:g} s, {args.orders} orders")
+    print("=" * 100)
+    print(f"{'profile':<9} {'reads/s':>9} {'read p50':>9} {'read p95':>9} {'read p99':>9} "
+          f"{'writes/s':>9} {'write p50':>10} {'write p95':>10} {'write p99':>10} {'locked':>7}")
+    for name, row in rows:
+        r, w = row['read'], row['write']
+        print(f"{name:<9} {r['ops']:>9.1f} {r['p50']:>7.1f}ms {r['p95']:>7.1f}ms {r['p99']:>7.1f}ms "
+              f"{w['ops']:>9.1f} {w['p50']:>8.1f}ms {w['p95']:>8.1f}ms {w['p99']:>8.1f}ms "
+              f"{r['errors'] + w['errors']:>7}")
+    for name, row in rows:
+        print(f"  {name}: {', '.join(f'{k}={v}' for k, v in row['settings'].items())}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+import argparse
+import io
+import os
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+from pathlib import Path
+
+current_dir = Path(__file__).parent
+ROOT = current_dir.parent
+
+SCENARIOS = [
+    ('interpreter', ['-c', 'pass']),
+    ('import app', ['-c', 'from app import app']),
+    ('worker boot', ['-c', "from app import app; app.test_client().get('/login')"]),
+    ('wallet.py', ['{root}/wallet.py']),
+    ('migrations.py status', ['{root}/migrations.py', 'status']),
+]
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def checkout(rev, target):
+    archive = subprocess.run(['git', '-C', str(ROOT), 'archive', '--format=tar', rev],
+                             capture_output=True, check=True).stdout
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(target)
+    return Path(target)
+
+
+def environment(root, workdir):
+    env = dict(os.environ, PYTHONPATH=str(root), DATABASE_URL=f'sqlite:///{workdir / "startup.db"}')
+    env.pop('SCHEDULER_ENABLED', None)
+    return env
+
+
+def prepare(root, workdir):
+    workdir.mkdir(parents=True, exist_ok=True)
+    subprocess.run([sys.executable, '-c', 'from app import create_tables; create_tables()'],
+                   env=environment(root, workdir), cwd=workdir, capture_output=True, check=True)
+
+
+def run(root, workdir, args, *options):
+    command = [sys.executable, *options] + [arg.format(root=root) for arg in args]
+    started = time.perf_counter()
+    result = subprocess.run(command, env=environment(root, workdir), cwd=workdir, capture_output=True)
+    elapsed = (time.perf_counter() - started) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(f'{" ".join(args)} failed in {root}: {result.stderr.decode().strip()[-300:]}')
+    return elapsed, result.stderr.decode()
+
+
+def imported_modules(root, workdir, args):
+    _, stderr = run(root, workdir, args, '-X', 'importtime')
+    return sum(1 for line in stderr.splitlines() if line.startswith('import time:')) - 1
+
+
+def measure(trees, runs):
+    timings = {name: {scenario: [] for scenario, _ in SCENARIOS} for name, _, _ in trees}
+    modules = {name: {} for name, _, _ in trees}
+    for name, root, workdir in trees:
+        for scenario, args in SCENARIOS:
+            run(root, workdir, args)
+            modules[name][scenario] = imported_modules(root, workdir, args)
+
+    for _ in range(runs):
+        for scenario, args in SCENARIOS:
+            for name, root, workdir in trees:
+                timings[name][scenario].append(run(root, workdir, args)[0])
+    return timings, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Время запуска воркера и CLI-скриптов')
+    parser.add_argument('--baseline', help='git-ревизия для сравнения, например HEAD~1')
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        trees = []
+        if args.baseline:
+            trees.append((args.baseline, checkout(args.baseline, Path(tmp) / 'baseline')))
+        trees.append(('current', ROOT))
+
+        for index, (name, root) in enumerate(trees):
+            workdir = Path(tmp) / f'run-{index}'
+            prepare(root, workdir)
+            trees[index] = (name, root, workdir)
+
+        timings, modules = measure(trees, args.runs)
+
+    print("=" * 80)
+    print(f"STARTUP TIME: {args.runs} interleaved runs per scenario, fresh interpreter each run")
+    print("=" * 80)
+    header = f"{'scenario':<22}"
+    for name, _, _ in trees:
+        header += f" {name + ' p50':>14} {name + ' p90':>14} {'modules':>8}"
+    if args.baseline:
+        header += f" {'change':>8}"
+    print(header)
+
+    for scenario, _ in SCENARIOS:
+        row = f"{scenario:<22}"
+        for name, _, _ in trees:
+            values = timings[name][scenario]
+            row += f" {percentile(values, 50):>12.0f}ms {percentile(values, 90):>12.0f}ms {modules[name][scenario]:>8}"
+        if args.baseline:
+            before = percentile(timings[args.baseline][scenario], 50)
+            after = percentile(timings['current'][scenario], 50)
+            row += f" {(after - before) / before * 100:>+7.0f}%"
+        print(row)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,464 @@
+#!/usr/bin/env python3
+import argparse
+import contextlib
+import http.cookiejar
+import io
+import json
+import logging
+import os
+import platform
+import random
+import re
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from datetime import date, datetime
+from pathlib import Path
+
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir.parent))
+
+BASELINE_PATH = current_dir / 'baseline.json'
+SCENARIOS = ('login_storm', 'lunch_rush', 'serve_line', 'notification_polling', 'admin_reports')
+FAST_HASH = 'pbkdf2:sha256:1000'
+STORM_HASH = 'scrypt'
+QUERY_HEADER = 'X-Query-Count'
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def route_of(path):
+    return re.sub(r'/\d+', '/<id>', path.split('?')[0])
+
+
+class BrowserCache:
+    def __init__(self):
+        self.etags = {}
+
+    def conditional_headers(self, method, path):
+        etag = self.etags.get(path) if method == 'GET' else None
+        return {'If-None-Match': etag} if etag else {}
+
+    def remember(self, method, path, headers):
+        if method == 'GET' and headers.get('ETag'):
+            self.etags[path] = headers['ETag']
+
+
+class ClientSession(BrowserCache):
+    def __init__(self, app):
+        super().__init__()
+        self.client = app.test_client()
+
+    def request(self, method, path, data=None):
+        started = time.perf_counter()
+        response = self.client.open(path, method=method, data=data, headers=self.conditional_headers(method, path))
+        elapsed = (time.perf_counter() - started) * 1000
+        self.remember(method, path, response.headers)
+        return response.status_code, response.headers.get('Location', ''), \
+            int(response.headers.get(QUERY_HEADER, 0)), elapsed
+
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class HttpSession(BrowserCache):
+    def __init__(self, base_url):
+        super().__init__()
+        self.base_url = base_url
+        self.opener = urllib.request.build_opener(
+            NoRedirect, urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar())
+        )
+
+    def request(self, method, path, data=None):
+        body = urllib.parse.urlencode(data).encode() if data is not None else None
+        url = f'{self.base_url}{urllib.parse.quote(path, safe="/?=&%")}'
+        req = urllib.request.Request(url, data=body, method=method, headers=self.conditional_headers(method, path))
+        started = time.perf_counter()
+        try:
+            response = self.opener.open(req, timeout=120)
+            response.read()
+            status, headers = response.status, response.headers
+        except urllib.error.HTTPError as e:
+            e.read()
+            status, headers = e.code, e.headers
+        elapsed = (time.perf_counter() - started) * 1000
+        self.remember(method, path, headers)
+        return status, headers.get('Location', ''), int(headers.get(QUERY_HEADER, 0)), elapsed
+
+
+def login(session, username, password):
+    status, location, _, _ = session.request('POST', '/login', {'username': username, 'password': password})
+    if status != 302 or not location.endswith('/dashboard'):
+        raise AssertionError(f'login failed for {username}: {status} {location}')
+    return session
+
+
+def drive(flows, concurrency):
+    records = []
+    lock = threading.Lock()
+    queue = iter(flows)
+
+    def worker():
+        while True:
+            with lock:
+                flow = next(queue, None)
+            if flow is None:
+                return
+            session, steps = flow
+            for method, path, data, expected, *rejected in steps:
+                try:
+                    status, location, queries, elapsed = session.request(method, path, data)
+                    ok = status in expected and not any(fragment in location for fragment in ['/login', *rejected])
+                except Exception:
+                    queries, elapsed, ok = 0, 0.0, False
+                with lock:
+                    records.append((route_of(path), method, elapsed, queries, ok))
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - started, records
+
+
+def summarize(seconds, records):
+    latencies = [elapsed for _, _, elapsed, _, _ in records]
+    queries = [count for _, _, _, count, _ in records]
+    routes = defaultdict(list)
+    for route, method, elapsed, count, _ in records:
+        routes[f'{method} {route}'].append((elapsed, count))
+
+    return {
+        'requests': len(records),
+        'errors': sum(1 for *_, ok in records if not ok),
+        'seconds': round(seconds, 3),
+        'throughput': round(len(records) / seconds, 1) if seconds else 0.0,
+        'p50': round(percentile(latencies, 50), 2),
+        'p95': round(percentile(latencies, 95), 2),
+        'p99': round(percentile(latencies, 99), 2),
+        'queries_per_request': round(sum(queries) / len(queries), 2) if queries else 0.0,
+        'routes': {
+            route: {
+                'requests': len(values),
+                'p50': round(percentile([elapsed for elapsed, _ in values], 50), 2),
+                'p95': round(percentile([elapsed for elapsed, _ in values], 95), 2),
+                'queries_per_request': round(sum(count for _, count in values) / len(values), 2),
+                'max_queries': max(count for _, count in values)
+            }
+            for route, values in sorted(routes.items())
+        }
+    }
+
+
+class Suite:
+    def __init__(self, app, new_session, args):
+        self.app = app
+        self.new_session = new_session
+        self.args = args
+        self.rng = random.Random(args.seed)
+
+        from models import db, User
+
+        with app.app_context():
+            self.students = [
+                username for (username,) in db.session.query(User.username).filter(
+                    User.role == 'ученик', User.username != 'student'
+                ).order_by(User.id)
+            ]
+            self.chefs = [username for (username,) in db.session.query(User.username).filter(User.role == 'повар')]
+
+    def sessions(self, usernames, password):
+        return [login(self.new_session(), username, password) for username in usernames]
+
+    def login_storm(self):
+        from models import db, User
+        from werkzeug.security import generate_password_hash
+        from generate_school import STUDENT_PASSWORD
+
+        usernames = self.rng.sample(self.students, min(self.args.logins, len(self.students)))
+        with self.app.app_context():
+            storm_hash = generate_password_hash(STUDENT_PASSWORD, method=STORM_HASH)
+            db.session.query(User).filter(User.username.in_(usernames)).update(
+                {User.password_hash: storm_hash}, synchronize_session=False
+            )
+            db.session.commit()
+
+        self.app.config['PASSWORD_HASH_METHOD'] = STORM_HASH
+        try:
+            flows = [
+                (self.new_session(), [
+                    ('POST', '/login', {'username': username, 'password': STUDENT_PASSWORD}, (302,)),
+                    ('GET', '/student', None, (200,))
+                ])
+                for username in usernames
+            ]
+            return drive(flows, self.args.concurrency)
+        finally:
+            self.app.config['PASSWORD_HASH_METHOD'] = FAST_HASH
+
+    def lunch_rush(self):
+        from models import db, Meal, PreparedMeal, User
+        from wallet import credit, to_kopecks, TOP_UP
+        from generate_school import STUDENT_PASSWORD
+
+        today = date.today()
+        usernames = self.rng.sample(self.students, min(self.args.orders, len(self.students)))
+        with self.app.app_context():
+            lunches = [meal_id for (meal_id,) in db.session.query(PreparedMeal.meal_id).join(Meal).filter(
+                Meal.meal_type == 'обед',
+                PreparedMeal.expiry_date >= today,
+                PreparedMeal.quantity > 0
+            ).distinct()]
+            drinks = [meal_id for (meal_id,) in db.session.query(Meal.id).filter(Meal.meal_type == 'напиток')]
+            for (user_id,) in db.session.query(User.id).filter(User.username.in_(usernames)):
+                credit(user_id, to_kopecks(1000), TOP_UP)
+            db.session.commit()
+
+        flows = [
+            (session, [
+                ('GET', '/order?type=обед', None, (200,)),
+                ('POST', '/order?type=обед', {
+                    'meal_type': 'обед',
+                    'meal_id': self.rng.choice(lunches),
+                    'drink_id': self.rng.choice(drinks) if drinks and self.rng.random() < 0.5 else '',
+                    'meal_date': today.isoformat(),
+                    'payment_method': 'разовая'
+                }, (302,), '/add_balance')
+            ])
+            for session in self.sessions(usernames, STUDENT_PASSWORD)
+        ]
+        return drive(flows, self.args.concurrency)
+
+    def serve_line(self):
+        from models import db, Order
+        from generate_school import CHEF_PASSWORD
+
+        with self.app.app_context():
+            order_ids = [order_id for (order_id,) in db.session.query(Order.id).filter(
+                Order.meal_date == date.today(),
+                Order.status == 'paid',
+                Order.is_served == False
+            ).order_by(Order.id).limit(self.args.serves)]
+
+        chefs = self.sessions([name for name in self.chefs if name != 'chef'] or self.chefs, CHEF_PASSWORD)
+        flows = [
+            (chefs[index % len(chefs)], [('GET', f'/serve_order/{order_id}', None, (302,))] +
+             ([('GET', '/chef', None, (200,))] if index % 10 == 0 else []))
+            for index, order_id in enumerate(order_ids)
+        ]
+        return drive(flows, len(chefs) * 2)
+
+    def notification_polling(self):
+        from generate_school import STUDENT_PASSWORD
+
+        usernames = [self.students[i % len(self.students)] for i in range(self.args.tabs)]
+        tabs = self.sessions(usernames, STUDENT_PASSWORD)
+        flows = [
+            (tab, [('GET', '/api/notifications/unread', None, (200, 304))])
+            for _ in range(self.args.polls)
+            for tab in tabs
+        ]
+        return drive(flows, self.args.concurrency)
+
+    def admin_reports(self):
+        admins = self.sessions(['admin'] * 2, 'Admin123!')
+        pages = ['/admin', '/statistics', '/reports', '/admin/users', '/admin/users?page=3&sort=balance',
+                 '/admin/users?role=ученик&grade=5А', '/manage_requests']
+        flows = [
+            (admin, [('GET', page, None, (200,)) for page in pages])
+            for _ in range(self.args.reports)
+            for admin in admins
+        ]
+        return drive(flows, len(admins))
+
+
+def scratch_app(db_path):
+    from application import create_app
+
+    app = create_app(SQLALCHEMY_DATABASE_URI=f'sqlite:///{db_path}', WTF_CSRF_ENABLED=False,
+                     PASSWORD_HASH_METHOD=FAST_HASH, QUERY_STATS_ENABLED=True, QUERY_STATS_HEADERS=True,
+                     QUERY_STATS_LOG=False, CAPTURE_ENABLED=False)
+    app.logger.disabled = True
+    return app
+
+
+def setup_database(db_path, args):
+    from application import init_database
+    from generate_school import generate
+
+    app = scratch_app(db_path)
+    with contextlib.redirect_stdout(io.StringIO()):
+        init_database(app)
+    with app.app_context():
+        generated = generate(args.students, months=args.months, seed=args.seed)
+    return app, generated
+
+
+def start_driver(driver, app):
+    if driver != 'wsgi':
+        return None, lambda: ClientSession(app)
+
+    from werkzeug.serving import make_server
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f'http://127.0.0.1:{server.server_port}'
+    return server, lambda: HttpSession(base_url)
+
+
+def run_driver(driver, args):
+    with tempfile.TemporaryDirectory() as tmp:
+        app, generated = setup_database(os.path.join(tmp, 'suite.db'), args)
+
+        server, new_session = start_driver(driver, app)
+        suite = Suite(app, new_session, args)
+
+        results = {}
+        try:
+            for name in args.scenarios:
+                seconds, records = getattr(suite, name)()
+                results[name] = summarize(seconds, records)
+        finally:
+            if server is not None:
+                server.shutdown()
+
+        from models import db
+        with app.app_context():
+            db.engine.dispose()
+
+    return {'generated': generated['tables'], 'scenarios': results}
+
+
+def compare(current, baseline, latency_tolerance, query_tolerance):
+    regressions = []
+    for driver, result in current['drivers'].items():
+        base_driver = baseline.get('drivers', {}).get(driver)
+        if not base_driver:
+            continue
+        for name, metrics in result['scenarios'].items():
+            base = base_driver['scenarios'].get(name)
+            if not base:
+                continue
+            if metrics['p95'] > base['p95'] * (1 + latency_tolerance):
+                regressions.append(f'{driver}/{name}: p95 {base["p95"]:.1f} -> {metrics["p95"]:.1f} ms')
+            if metrics['throughput'] < base['throughput'] / (1 + latency_tolerance):
+                regressions.append(f'{driver}/{name}: throughput {base["throughput"]:.1f} -> '
+                                   f'{metrics["throughput"]:.1f} req/s')
+            for route, route_metrics in metrics['routes'].items():
+                base_route = base['routes'].get(route)
+                if base_route and route_metrics['queries_per_request'] > \
+                        base_route['queries_per_request'] * (1 + query_tolerance) + 0.5:
+                    regressions.append(f'{driver}/{name} {route}: queries/request '
+                                       f'{base_route["queries_per_request"]} -> {route_metrics["queries_per_request"]}')
+            if metrics['errors'] > base['errors']:
+                regressions.append(f'{driver}/{name}: errors {base["errors"]} -> {metrics["errors"]}')
+    return regressions
+
+
+def print_report(report):
+    meta = report['meta']
+    print("=" * 110)
+    print(f"BENCHMARK SUITE: {meta['students']} students × {meta['months']} months, seed {meta['seed']}, "
+          f"concurrency {meta['concurrency']}")
+    print("=" * 110)
+    print(f"{'driver':<7} {'scenario':<21} {'requests':>8} {'errors':>6} {'req/s':>8} {'p50':>9} {'p95':>9} "
+          f"{'p99':>9} {'queries/req':>11}")
+    for driver, result in report['drivers'].items():
+        for name, metrics in result['scenarios'].items():
+            print(f"{driver:<7} {name:<21} {metrics['requests']:>8} {metrics['errors']:>6} "
+                  f"{metrics['throughput']:>8.1f} {metrics['p50']:>7.1f}ms {metrics['p95']:>7.1f}ms "
+                  f"{metrics['p99']:>7.1f}ms {metrics['queries_per_request']:>11.1f}")
+    print()
+    print(f"{'route':<45} {'requests':>8} {'p50':>9} {'p95':>9} {'queries/req':>11} {'max':>5}")
+    for driver, result in report['drivers'].items():
+        for metrics in result['scenarios'].values():
+            for route, route_metrics in metrics['routes'].items():
+                print(f"{driver + ' ' + route:<45} {route_metrics['requests']:>8} {route_metrics['p50']:>7.1f}ms "
+                      f"{route_metrics['p95']:>7.1f}ms {route_metrics['queries_per_request']:>11.1f} "
+                      f"{route_metrics['max_queries']:>5}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Нагрузочные сценарии горячих страниц с сохранением baseline')
+    parser.add_argument('--driver', choices=['client', 'wsgi', 'both'], default='both')
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument('--students', type=int, default=400)
+    parser.add_argument('--months', type=int, default=2)
+    parser.add_argument('--seed', type=int, default=20240901)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--logins', type=int, default=100)
+    parser.add_argument('--orders', type=int, default=150)
+    parser.add_argument('--serves', type=int, default=150)
+    parser.add_argument('--tabs', type=int, default=1000)
+    parser.add_argument('--polls', type=int, default=2)
+    parser.add_argument('--reports', type=int, default=5)
+    parser.add_argument('--save-baseline', nargs='?', const=str(BASELINE_PATH), metavar='PATH')
+    parser.add_argument('--compare', nargs='?', const=str(BASELINE_PATH), metavar='PATH')
+    parser.add_argument('--latency-tolerance', type=float, default=0.5,
+                        help='допустимый рост p95 и падение пропускной способности (0.5 = 50%%)')
+    parser.add_argument('--query-tolerance', type=float, default=0.1)
+    parser.add_argument('--json', action='store_true', help='вывести результат в JSON')
+    args = parser.parse_args()
+
+    os.environ.setdefault('APP_CONFIG', 'config.SQLiteTunedConfig')
+    os.environ.setdefault('SECRET_KEY', 'benchmark-secret-key')
+    os.environ['DATABASE_URL'] = 'sqlite:///suite.db'
+
+    drivers = ['client', 'wsgi'] if args.driver == 'both' else [args.driver]
+    report = {
+        'meta': {
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'machine': platform.machine(),
+            'cpus': os.cpu_count(),
+            'students': args.students,
+            'months': args.months,
+            'seed': args.seed,
+            'concurrency': args.concurrency
+        },
+        'drivers': {driver: run_driver(driver, args) for driver in drivers}
+    }
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print_report(report)
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+            f.write('\n')
+        print(f"\n💾 Baseline сохранен: {args.save_baseline}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.latency_tolerance, args.query_tolerance)
+        if regressions:
+            print(f"\n❌ Регрессии относительно {args.compare}:")
+            for regression in regressions:
+                print(f"  • {regression}")
+            sys.exit(1)
+        print(f"\n✅ Регрессий относительно {args.compare} нет")
+
+
+if __name__ == '__main__':
+    main()
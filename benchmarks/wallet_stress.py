@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import date
+from pathlib import Path
+
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir.parent))
+
+BENCH_PASSWORD = 'Bench123!'
+
+
+def setup_app(db_path, users, start_balance):
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+    os.environ.setdefault('APP_CONFIG', 'config.SQLiteTunedConfig')
+    os.environ.setdefault('SECRET_KEY', 'benchmark-secret-key')
+
+    from app import app, db, create_tables
+    from models import User
+    from wallet import credit, OPENING
+    from werkzeug.security import generate_password_hash
+    from sqlalchemy import insert
+
+    app.config['WTF_CSRF_ENABLED'] = False
+    app.logger.disabled = True
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        create_tables()
+
+    with app.app_context():
+        password_hash = generate_password_hash(BENCH_PASSWORD, method='pbkdf2:sha256:1000')
+        db.session.execute(insert(User), [
+            {
+                'username': f'wallet{i}',
+                'email': f'wallet{i}@school.ru',
+                'password_hash': password_hash,
+                'role': 'ученик',
+                'grade': '7Б'
+            }
+            for i in range(users)
+        ])
+        user_ids = [row.id for row in db.session.query(User.id).filter(User.username.like('wallet%'))]
+        for user_id in user_ids:
+            credit(user_id, start_balance, OPENING)
+        db.session.commit()
+
+    return app, user_ids
+
+
+def hammer_wallet(app, user_ids, threads, operations):
+    from models import db
+    from wallet import credit, debit, InsufficientFunds, TOP_UP, ORDER
+
+    counters = Counter()
+    lock = threading.Lock()
+
+    def client():
+        rng = random.Random()
+        local = Counter()
+        with app.app_context():
+            for _ in range(operations):
+                user_id = rng.choice(user_ids)
+                amount = rng.randint(1, 500)
+                try:
+                    if rng.random() < 0.4:
+                        credit(user_id, amount, TOP_UP)
+                        local['credits'] += 1
+                    else:
+                        debit(user_id, amount, ORDER)
+                        local['debits'] += 1
+                    db.session.commit()
+                except InsufficientFunds:
+                    db.session.rollback()
+                    local['declined'] += 1
+        with lock:
+            counters.update(local)
+
+    workers = [threading.Thread(target=client) for _ in range(threads)]
+    started = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return time.perf_counter() - started, counters
+
+
+def double_click_payments(app, user_id, orders, clicks):
+    from models import db, User, Meal, Order
+    from wallet import credit, debit, to_kopecks, TOP_UP, ADJUSTMENT
+
+    with app.app_context():
+        username = db.session.get(User, user_id).username
+        meal = Meal.query.first()
+        debit(user_id, db.session.get(User, user_id).balance_kopecks, ADJUSTMENT)
+        credit(user_id, to_kopecks(meal.price) * orders // 2, TOP_UP)
+        order_ids = []
+        for _ in range(orders):
+            order = Order(user_id=user_id, meal_id=meal.id, meal_date=date.today(), meal_type='обед',
+                          total_price=meal.price, payment_method='разовая', status='pending')
+            db.session.add(order)
+            db.session.flush()
+            order_ids.append(order.id)
+        db.session.commit()
+
+    def client(order_ids):
+        http = app.test_client()
+        response = http.post('/login', data={'username': username, 'password': BENCH_PASSWORD})
+        if not response.headers.get('Location', '').endswith('/dashboard'):
+            raise AssertionError(f'login failed for {username}')
+        for order_id in order_ids:
+            http.get(f'/pay_order/{order_id}')
+
+    workers = [threading.Thread(target=client, args=(order_ids,)) for _ in range(clicks)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return order_ids
+
+
+def check_ledger_chain(user_ids):
+    from models import LedgerEntry
+
+    broken = []
+    for user_id in user_ids:
+        running = 0
+        for entry in LedgerEntry.query.filter_by(user_id=user_id).order_by(LedgerEntry.id):
+            running += entry.amount
+            if entry.balance_after != running or running < 0:
+                broken.append((user_id, entry.id))
+                break
+    return broken
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Стресс-тест кошелька: гонки списаний и сверка с журналом')
+    parser.add_argument('--users', type=int, default=5)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--operations', type=int, default=200)
+    parser.add_argument('--start-balance', type=int, default=5000, help='начальный баланс в копейках')
+    parser.add_argument('--orders', type=int, default=20)
+    parser.add_argument('--clicks', type=int, default=4, help='параллельных нажатий «оплатить» на каждый заказ')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app, user_ids = setup_app(os.path.join(tmp, 'wallet.db'), args.users, args.start_balance)
+        seconds, counters = hammer_wallet(app, user_ids, args.threads, args.operations)
+        order_ids = double_click_payments(app, user_ids[0], args.orders, args.clicks)
+
+        from models import db, Order, LedgerEntry
+        from wallet import reconcile
+
+        with app.app_context():
+            mismatches = reconcile(user_ids)
+            broken = check_ledger_chain(user_ids)
+            charges = Counter(
+                reference for (reference,) in db.session.query(LedgerEntry.reference).filter(
+                    LedgerEntry.reference.in_([f'order:{order_id}' for order_id in order_ids])
+                )
+            )
+            paid = Order.query.filter(Order.id.in_(order_ids), Order.status == 'paid').count()
+
+    double_charged = sum(1 for count in charges.values() if count > 1)
+    total_ops = sum(counters.values())
+
+    print("=" * 80)
+    print(f"WALLET STRESS: {args.threads} threads × {args.operations} ops on {args.users} wallets, "
+          f"{args.orders} orders × {args.clicks} clicks")
+    print("=" * 80)
+    print(f"operations/s:        {total_ops / seconds:.1f}")
+    print(f"credits / debits:    {counters['credits']} / {counters['debits']} "
+          f"(declined for insufficient funds: {counters['declined']})")
+    print(f"orders paid:         {paid} of {args.orders} (balance covers half), "
+          f"charged {sum(charges.values())} times")
+    print(f"double charges:      {double_charged}")
+    print(f"balance ≠ ledger:    {len(mismatches)}")
+    print(f"broken ledger chain: {len(broken)}")
+
+    ok = not mismatches and not broken and not double_charged and sum(charges.values()) == paid
+    print("✅ Балансы сходятся с журналом" if ok else "❌ Обнаружены расхождения")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
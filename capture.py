@@ -0,0 +1,93 @@
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from logging.handlers import TimedRotatingFileHandler, WatchedFileHandler
+
+from flask import g, request
+
+from app_logging import externally_rotated, queued
+
+CAPTURE_FILE = 'requests.jsonl'
+SECRET_MARKER = '***'
+SECRET_FIELDS = ('password', 'token', 'secret', 'csrf')
+EXCLUDED_ENDPOINTS = ('static', 'metrics.metrics')
+
+logger = logging.getLogger('capture')
+logger.propagate = False
+
+
+def is_secret(name):
+    name = name.lower()
+    return any(marker in name for marker in SECRET_FIELDS)
+
+
+def sanitize(fields):
+    return {
+        name: SECRET_MARKER if is_secret(name) else (values[0] if len(values) == 1 else values)
+        for name, values in fields.lists()
+    }
+
+
+def _start_request():
+    g.capture_started = time.perf_counter()
+
+
+def _record_status(response):
+    g.capture_status = response.status_code
+    return response
+
+
+def _capture(exc):
+    started = g.pop('capture_started', None)
+    if started is None or request.endpoint in EXCLUDED_ENDPOINTS:
+        return
+
+    user = g.get('_login_user')
+    authenticated = user is not None and getattr(user, 'is_authenticated', False)
+    entry = {
+        'ts': datetime.now(timezone.utc).isoformat(),
+        'method': request.method,
+        'path': request.path,
+        'endpoint': request.endpoint,
+        'args': sanitize(request.args),
+        'form': sanitize(request.form) if request.method != 'GET' else {},
+        'files': {name: upload.filename for name, upload in request.files.items()},
+        'user_id': user.id if authenticated else None,
+        'role': user.role if authenticated else None,
+        'status': g.pop('capture_status', 500),
+        'duration_ms': round((time.perf_counter() - started) * 1000, 1),
+        'request_id': g.get('request_id'),
+    }
+    logger.info(json.dumps(entry, ensure_ascii=False))
+
+
+def init_capture(app):
+    if not app.config['CAPTURE_ENABLED']:
+        return
+
+    if not logger.handlers:
+        os.makedirs(app.config['CAPTURE_DIR'], exist_ok=True)
+        path = os.path.join(app.config['CAPTURE_DIR'], CAPTURE_FILE)
+        if externally_rotated(app):
+            handler = WatchedFileHandler(path, encoding='utf-8')
+        else:
+            handler = TimedRotatingFileHandler(path, when='midnight', backupCount=app.config['CAPTURE_KEEP_DAYS'],
+                                               encoding='utf-8')
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(queued(handler, app.config['LOG_QUEUE_SIZE']))
+        logger.setLevel(logging.INFO)
+
+    app.before_request(_start_request)
+    app.after_request(_record_status)
+    app.teardown_request(_capture)
+
+
+def read_capture(path):
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
@@ -0,0 +1,53 @@
+import hashlib
+from datetime import date, datetime, timezone
+from functools import wraps
+
+from flask import make_response, request, session
+from flask_login import current_user
+
+from versions import current_versions, user_scope
+
+CACHE_CONTROL = 'private, no-cache'
+
+
+def validators(names):
+    versions = current_versions(*names)
+    today = date.today()
+    parts = [today.isoformat(), current_user.id, current_user.username, current_user.role]
+    parts += [f'{name}={version}' for name, (version, _) in sorted(versions.items())]
+    etag = hashlib.sha1('|'.join(map(str, parts)).encode()).hexdigest()[:20]
+
+    midnight = datetime.combine(today, datetime.min.time()).astimezone(timezone.utc)
+    modified = [updated.replace(tzinfo=timezone.utc) for _, updated in versions.values() if updated]
+    return etag, max(modified + [midnight]).replace(microsecond=0)
+
+
+def not_modified(etag, last_modified):
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    return request.if_modified_since is not None and last_modified <= request.if_modified_since
+
+
+def conditional(*names, per_user=()):
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if request.method not in ('GET', 'HEAD') or '_flashes' in session:
+                return f(*args, **kwargs)
+
+            etag, last_modified = validators(list(names) + [user_scope(name, current_user.id) for name in per_user])
+            if not_modified(etag, last_modified):
+                response = make_response('', 304)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag, weak=True)
+            response.last_modified = last_modified
+            response.headers['Cache-Control'] = CACHE_CONTROL
+            return response
+
+        return decorated_function
+
+    return decorator
@@ -2,18 +2,103 @@ import os
 import secrets
 
 
+def database_url():
+    url = os.environ.get('DATABASE_URL') or 'sqlite:///school_food.db'
+    if url.startswith('postgres://'):
+        url = 'postgresql://' + url[len('postgres://'):]
+    return url
+
+
+def is_sqlite(url):
+    return url.startswith('sqlite')
+
+
 class Config:
-    SECRET_KEY = os.environ.get('SECRET_KEY') or secrets.token_hex(32)
-    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///school_food.db'
+    SECRET_KEY = os.environ.get('SECRET_KEY')
+    SQLALCHEMY_DATABASE_URI = database_url()
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     WTF_CSRF_ENABLED = True
-    WTF_CSRF_SECRET_KEY = secrets.token_hex(32)
+    WTF_CSRF_SECRET_KEY = os.environ.get('WTF_CSRF_SECRET_KEY') or SECRET_KEY
+    SCHEDULER_ENABLED = os.environ.get('SCHEDULER_ENABLED') == '1'
+    IDENTITY_CACHE_TTL = 30
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt')
+    PASSWORD_POOL_SIZE = int(os.environ.get('PASSWORD_POOL_SIZE', os.cpu_count() or 1))
+    PASSWORD_QUEUE_LIMIT = int(os.environ.get('PASSWORD_QUEUE_LIMIT', 8 * (os.cpu_count() or 1)))
+    PASSWORD_QUEUE_TIMEOUT = 10
+    SQLITE_PRAGMAS = {}
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    READ_REPLICA_URL = os.environ.get('READ_REPLICA_URL')
+    READ_REPLICA_MAX_LAG = float(os.environ.get('READ_REPLICA_MAX_LAG', 5))
+    QUERY_STATS_ENABLED = os.environ.get('QUERY_STATS_ENABLED', '1') == '1'
+    QUERY_STATS_HEADERS = False
+    QUERY_STATS_LOG = True
+    QUERY_STATS_LOG_THRESHOLD = int(os.environ.get('QUERY_STATS_LOG_THRESHOLD', 50))
+    QUERY_STATS_N_PLUS_ONE = int(os.environ.get('QUERY_STATS_N_PLUS_ONE', 5))
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') == '1'
+    METRICS_DIR = os.environ.get('METRICS_DIR')
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    METRICS_PUBLIC = False
+    METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', 1))
+    LOG_FILE = os.environ.get('LOG_FILE', 'school_food.log')
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+    LOG_MAX_BYTES = int(os.environ.get('LOG_MAX_BYTES', 10 * 1024 * 1024))
+    LOG_BACKUP_COUNT = int(os.environ.get('LOG_BACKUP_COUNT', 10))
+    LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', 10000))
+    LOG_ROTATION = os.environ.get('LOG_ROTATION', 'internal')
+    LOG_ACCESS = os.environ.get('LOG_ACCESS', '1') == '1'
+    LOG_SAMPLE_RATES = {'DEBUG': 0.01, 'INFO': 1.0, 'WARNING': 0.1}
+    LOG_SAMPLE_BURST = 20
+    LOG_SAMPLE_WINDOW = 60
+    CAPTURE_ENABLED = os.environ.get('CAPTURE_ENABLED') == '1'
+    CAPTURE_DIR = os.environ.get('CAPTURE_DIR', 'capture')
+    CAPTURE_KEEP_DAYS = int(os.environ.get('CAPTURE_KEEP_DAYS', 14))
+    FRAGMENT_CACHE_ENABLED = os.environ.get('FRAGMENT_CACHE_ENABLED', '1') == '1'
+    FRAGMENT_CACHE_SIZE = int(os.environ.get('FRAGMENT_CACHE_SIZE', 256))
+
+
+class DevelopmentConfig(Config):
+    SECRET_KEY = os.environ.get('SECRET_KEY') or 'school-food-secret-key-2024'
+    WTF_CSRF_SECRET_KEY = os.environ.get('WTF_CSRF_SECRET_KEY') or SECRET_KEY
+    QUERY_STATS_HEADERS = True
+    METRICS_PUBLIC = True
+
+
+class TestingConfig(Config):
+    SECRET_KEY = os.environ.get('SECRET_KEY') or secrets.token_hex(32)
+    WTF_CSRF_SECRET_KEY = os.environ.get('WTF_CSRF_SECRET_KEY') or SECRET_KEY
+    TESTING = True
+    WTF_CSRF_ENABLED = False
+    QUERY_STATS_HEADERS = True
+    QUERY_STATS_LOG = False
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'
+    METRICS_PUBLIC = True
+
+
+class SQLiteTunedConfig(Config):
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000)),
+        'cache_size': -int(os.environ.get('SQLITE_CACHE_KB', 20000)),
+        'mmap_size': int(os.environ.get('SQLITE_MMAP_BYTES', 128 * 1024 * 1024)),
+        'temp_store': 'MEMORY'
+    }
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 20)),
+        'pool_timeout': 30,
+        'pool_pre_ping': not is_sqlite(database_url()),
+        'pool_recycle': 1800,
+        'connect_args': {'check_same_thread': False, 'timeout': 30} if is_sqlite(database_url()) else {}
+    }
 
 
-class ProductionConfig(Config):
+class ProductionConfig(SQLiteTunedConfig):
     SESSION_COOKIE_SECURE = True
     SESSION_COOKIE_HTTPONLY = True
     SESSION_COOKIE_SAMESITE = 'Lax'
     PERMANENT_SESSION_LIFETIME = 1800
+    LOG_ROTATION = os.environ.get('LOG_ROTATION', 'external')
     DEBUG = False
-    TESTING = False
\ No newline at end of file
+    TESTING = False
@@ -0,0 +1,86 @@
+import os
+
+from sqlalchemy import event, inspect, update, Integer
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+from models import db
+from routing import READ_ONLY_BIND
+
+READ_ONLY_PRAGMAS = ('busy_timeout', 'cache_size', 'mmap_size', 'temp_store')
+
+_engines = []
+
+
+def _apply_pragmas(pragmas):
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+
+    return on_connect
+
+
+def _dispose_in_child():
+    for engine in _engines:
+        engine.dispose(close=False)
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_dispose_in_child)
+
+
+def configure_database(app):
+    with app.app_context():
+        engines = dict(db.engines)
+
+    pragmas = app.config.get('SQLITE_PRAGMAS') or {}
+    for key, engine in engines.items():
+        if engine.dialect.name == 'sqlite':
+            if key == READ_ONLY_BIND:
+                engine_pragmas = {name: value for name, value in pragmas.items() if name in READ_ONLY_PRAGMAS}
+                engine_pragmas['query_only'] = 1
+            else:
+                engine_pragmas = pragmas
+            if engine_pragmas:
+                event.listen(engine, 'connect', _apply_pragmas(engine_pragmas))
+
+        if engine not in _engines:
+            _engines.append(engine)
+    return engines[None]
+
+
+def sqlite_settings(engine):
+    with engine.connect() as conn:
+        return {
+            name: conn.exec_driver_sql(f'PRAGMA {name}').scalar()
+            for name in ('journal_mode', 'synchronous', 'busy_timeout', 'cache_size', 'mmap_size')
+        }
+
+
+class days_between(FunctionElement):
+    type = Integer()
+    inherit_cache = True
+    name = 'days_between'
+
+
+@compiles(days_between)
+def _days_between(element, compiler, **kw):
+    start, end = list(element.clauses)
+    return f'({compiler.process(end, **kw)} - {compiler.process(start, **kw)})'
+
+
+@compiles(days_between, 'sqlite')
+def _days_between_sqlite(element, compiler, **kw):
+    start, end = list(element.clauses)
+    return f'CAST(julianday({compiler.process(end, **kw)}) - julianday({compiler.process(start, **kw)}) AS INTEGER)'
+
+
+def lock_for_update(model, ident):
+    if db.session.get_bind().dialect.name == 'sqlite':
+        pk = inspect(model).primary_key[0]
+        db.session.execute(
+            update(model).where(pk == ident).values({pk.key: pk}).execution_options(synchronize_session=False)
+        )
+    return db.session.get(model, ident, with_for_update=True, populate_existing=True)
@@ -0,0 +1,110 @@
+from datetime import date
+
+from flask import g, has_app_context
+from sqlalchemy import and_, event, func, select, union
+from sqlalchemy.orm import Session
+
+from models import db, Order, Subscription
+
+SUBSCRIPTION_PAYMENT = 'абонемент'
+SUBSCRIPTION_MEALS_PER_DAY = 1
+
+
+def _load_entitlements(user_id):
+    today = date.today()
+
+    active_filter = and_(
+        Subscription.user_id == user_id,
+        Subscription.is_active == True,
+        Subscription.start_date <= today,
+        Subscription.end_date >= today
+    )
+    usage_filter = and_(
+        Order.user_id == user_id,
+        Order.meal_date == today,
+        Order.payment_method == SUBSCRIPTION_PAYMENT
+    )
+
+    meal_types = union(
+        select(Subscription.meal_type).where(active_filter),
+        select(Order.meal_type).where(usage_filter)
+    ).subquery()
+
+    usage = select(
+        Order.meal_type,
+        func.count(Order.id).label('used_today')
+    ).where(usage_filter).group_by(Order.meal_type).subquery()
+
+    rows = db.session.query(
+        meal_types.c.meal_type,
+        Subscription,
+        usage.c.used_today
+    ).select_from(meal_types).outerjoin(
+        Subscription, and_(active_filter, Subscription.meal_type == meal_types.c.meal_type)
+    ).outerjoin(
+        usage, usage.c.meal_type == meal_types.c.meal_type
+    ).order_by(Subscription.id).all()
+
+    entitlements = {}
+    for meal_type, subscription, used_today in rows:
+        entitlement = entitlements.setdefault(meal_type, {
+            'subscription': None,
+            'used_today': used_today or 0
+        })
+        if entitlement['subscription'] is None:
+            entitlement['subscription'] = subscription
+
+    return entitlements
+
+
+def get_entitlements(user_id):
+    if not has_app_context():
+        return _load_entitlements(user_id)
+
+    cache = g.setdefault('_entitlements', {})
+    if user_id not in cache:
+        cache[user_id] = _load_entitlements(user_id)
+    return cache[user_id]
+
+
+def invalidate_entitlements(user_id=None):
+    if not has_app_context():
+        return
+
+    cache = g.get('_entitlements')
+    if not cache:
+        return
+    if user_id is None:
+        cache.clear()
+    else:
+        cache.pop(user_id, None)
+
+
+def get_active_subscription(user_id, meal_type):
+    entitlement = get_entitlements(user_id).get(meal_type)
+    return entitlement['subscription'] if entitlement else None
+
+
+def get_active_subscriptions(user_id):
+    return [e['subscription'] for e in get_entitlements(user_id).values() if e['subscription']]
+
+
+def get_used_today(user_id, meal_type):
+    entitlement = get_entitlements(user_id).get(meal_type)
+    return entitlement['used_today'] if entitlement else 0
+
+
+def can_use_subscription(user_id, meal_type):
+    subscription = get_active_subscription(user_id, meal_type)
+    if not subscription:
+        return False
+    if subscription.used_meals >= subscription.meals_per_week:
+        return False
+    return get_used_today(user_id, meal_type) < SUBSCRIPTION_MEALS_PER_DAY
+
+
+@event.listens_for(Session, 'after_flush')
+def _invalidate_on_flush(session, flush_context):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, (Subscription, Order)):
+            invalidate_entitlements(obj.user_id)
@@ -0,0 +1,59 @@
+import threading
+from collections import OrderedDict
+from datetime import date
+
+from flask import current_app
+
+from metrics import REGISTRY
+from versions import MENU, current_version
+
+
+class FragmentCache:
+    def __init__(self, size):
+        self.size = size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def cached_fragment(name, meal_type, build, variant=None):
+    cache = current_app.extensions.get('fragment_cache')
+    if cache is None:
+        return build()
+
+    key = (name, meal_type, variant, current_version(MENU), date.today())
+    labels = (('fragment', name),)
+    value = cache.get(key)
+    if value is not None:
+        REGISTRY.inc('fragment_cache_hits_total', labels)
+        return value
+
+    REGISTRY.inc('fragment_cache_misses_total', labels)
+    value = build()
+    cache.set(key, value)
+    return value
+
+
+def init_fragment_cache(app):
+    if app.config['FRAGMENT_CACHE_ENABLED']:
+        app.extensions['fragment_cache'] = FragmentCache(app.config['FRAGMENT_CACHE_SIZE'])
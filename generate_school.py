@@ -0,0 +1,448 @@
+#!/usr/bin/env python3
+import argparse
+import random
+import sys
+import time
+from collections import Counter, namedtuple
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import func, insert, text, update
+from werkzeug.security import generate_password_hash
+
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir))
+
+from models import db, User, Meal, Order, Allergy, Feedback, Notification, PreparedMeal, Subscription, \
+    PurchaseRequest, Inventory, LedgerEntry, BankTransaction
+from passwords import hash_method
+from wallet import to_kopecks, TOP_UP, BANK_TOP_UP, ORDER, SUBSCRIPTION
+from versions import bump_version, MENU, NOTIFICATIONS
+
+DEFAULT_SEED = 20240901
+BATCH_SIZE = 5000
+EMAIL_DOMAIN = 'pupils.school.ru'
+STUDENT_PASSWORD = 'Student123!'
+CHEF_PASSWORD = 'Chef123!'
+
+GRADES = [f'{number}{letter}' for number in range(1, 12) for letter in 'АБВ']
+SURNAMES = ['ivanov', 'petrov', 'sidorov', 'smirnov', 'kuznetsov', 'popov', 'vasiliev', 'sokolov', 'mikhailov',
+            'novikov', 'fedorov', 'morozov', 'volkov', 'alekseev', 'lebedev', 'semenov', 'egorov', 'pavlov',
+            'kozlov', 'stepanov', 'nikolaev', 'orlov', 'andreev', 'makarov', 'nikitin', 'zakharov', 'zaitsev',
+            'solovyov', 'borisov', 'yakovlev', 'grigoriev', 'romanov', 'vorobyov', 'sergeev', 'kuzmin', 'frolov']
+INITIALS = 'abdegiklmnoprstvz'
+ALLERGENS = ['глютен', 'молоко', 'яйца', 'орехи', 'рыба', 'цитрусовые', 'мед', 'шоколад']
+SEVERITIES = ['легкая', 'легкая', 'средняя', 'средняя', 'тяжелая']
+RATINGS = [1, 2, 3, 3, 4, 4, 4, 5, 5, 5, 5]
+COMMENTS = [None, None, 'Вкусно!', 'Порция маленькая', 'Было холодное', 'Очень понравилось', 'Пересолено',
+            'Как дома', 'Хотелось бы добавки', 'Нормально', 'Не понравилось']
+URGENCIES = ['низкая', 'средняя', 'средняя', 'высокая', 'критичная']
+SUBSCRIPTION_PRICES = {'завтрак': 200, 'обед': 350}
+SUBSCRIPTION_WEEKS = [1, 2, 4, 4, 8]
+SERVE_TIMES = {'завтрак': (8, 30), 'обед': (12, 30), 'напиток': (12, 30)}
+
+MenuItem = namedtuple('MenuItem', 'id name kopecks allergens')
+
+
+def school_days(start, end):
+    day = start
+    while day <= end:
+        if day.weekday() < 5:
+            yield day
+        day += timedelta(days=1)
+
+
+def at(day, hour, minute=0):
+    return datetime(day.year, day.month, day.day, hour, minute)
+
+
+class BulkWriter:
+    def __init__(self, batch_size):
+        self.batch_size = batch_size
+        self.pending = {}
+        self.counts = Counter()
+
+    def add(self, model, row):
+        rows = self.pending.setdefault(model, [])
+        rows.append(row)
+        if len(rows) >= self.batch_size:
+            self.flush(model)
+
+    def flush(self, model=None):
+        for model in [model] if model is not None else list(self.pending):
+            rows = self.pending.pop(model, [])
+            if rows:
+                db.session.execute(insert(model.__table__), rows)
+                self.counts[model.__tablename__] += len(rows)
+        db.session.commit()
+
+
+class SchoolGenerator:
+    def __init__(self, students, months=6, seed=DEFAULT_SEED, chefs=2, today=None, batch_size=BATCH_SIZE,
+                 subscription_rate=0.25, allergy_rate=0.15, feedback_rate=0.03, notification_rate=0.5):
+        self.students = students
+        self.months = months
+        self.chefs = chefs
+        self.today = today or date.today()
+        self.start = self.today - timedelta(days=30 * months)
+        self.rng = random.Random(seed)
+        self.writer = BulkWriter(batch_size)
+        self.subscription_rate = subscription_rate
+        self.allergy_rate = allergy_rate
+        self.feedback_rate = feedback_rate
+        self.notification_rate = notification_rate
+
+    def run(self):
+        started = time.perf_counter()
+        if User.query.filter(User.email.like(f'%@{EMAIL_DOMAIN}')).first():
+            raise ValueError('Синтетические данные уже сгенерированы в этой базе')
+
+        self.meals = {meal_type: [] for meal_type in ('завтрак', 'обед', 'напиток')}
+        for meal in Meal.query.filter(Meal.is_available == True):
+            allergens = frozenset(name.strip() for name in (meal.allergens or '').split(',') if name.strip())
+            self.meals.setdefault(meal.meal_type, []).append(
+                MenuItem(meal.id, meal.name, to_kopecks(meal.price), allergens)
+            )
+        if not self.meals['завтрак'] or not self.meals['обед']:
+            raise ValueError('В меню нет блюд: сначала выполните create_tables()')
+
+        self.admin_id = db.session.query(User.id).filter(User.role == 'администратор').order_by(User.id).scalar()
+        self.days = list(school_days(self.start, self.today + timedelta(days=3)))
+        self.next_order_id = (db.session.query(func.max(Order.id)).scalar() or 0) + 1
+        self.next_subscription_id = (db.session.query(func.max(Subscription.id)).scalar() or 0) + 1
+        self.next_transaction = db.session.query(func.count(BankTransaction.id)).scalar() + 1
+
+        self.chef_ids = self._create_chefs()
+        student_ids = self._create_students()
+        self._create_prepared_meals()
+        self._create_purchase_requests()
+
+        balances = []
+        for user_id in student_ids:
+            balances.append({'id': user_id, 'balance_kopecks': self._simulate_student(user_id)})
+            if len(balances) >= self.writer.batch_size:
+                db.session.execute(update(User), balances)
+                balances = []
+        if balances:
+            db.session.execute(update(User), balances)
+        self.writer.flush()
+        self._sync_sequences()
+        bump_version(db.session.connection(), MENU, NOTIFICATIONS)
+
+        seconds = time.perf_counter() - started
+        rows = sum(self.writer.counts.values())
+        return {
+            'students': len(student_ids),
+            'days': len(self.days),
+            'tables': dict(self.writer.counts),
+            'rows': rows,
+            'seconds': round(seconds, 1),
+            'rows_per_second': round(rows / seconds) if seconds else 0
+        }
+
+    def _create_chefs(self):
+        password_hash = generate_password_hash(CHEF_PASSWORD, method=hash_method())
+        for index in range(1, self.chefs + 1):
+            self.writer.add(User, {
+                'username': f'chef{index:02d}.gen',
+                'email': f'chef{index:02d}@{EMAIL_DOMAIN}',
+                'password_hash': password_hash,
+                'role': 'повар',
+                'grade': 'Повар',
+                'balance_kopecks': 0,
+                'created_at': at(self.start, 9)
+            })
+        self.writer.flush(User)
+        return [row.id for row in db.session.query(User.id).filter(User.role == 'повар')]
+
+    def _create_students(self):
+        password_hash = generate_password_hash(STUDENT_PASSWORD, method=hash_method())
+        for index in range(1, self.students + 1):
+            username = f'{self.rng.choice(SURNAMES)}.{self.rng.choice(INITIALS)}{index:05d}'
+            self.writer.add(User, {
+                'username': username,
+                'email': f'{username}@{EMAIL_DOMAIN}',
+                'password_hash': password_hash,
+                'role': 'ученик',
+                'grade': self.rng.choice(GRADES),
+                'balance_kopecks': 0,
+                'created_at': at(self.start - timedelta(days=self.rng.randint(0, 365)), 10)
+            })
+        self.writer.flush(User)
+        return [row.id for row in db.session.query(User.id).filter(
+            User.role == 'ученик',
+            User.email.like(f'%@{EMAIL_DOMAIN}')
+        ).order_by(User.id)]
+
+    def _create_prepared_meals(self):
+        for day in self.days:
+            for meal_type, meals in self.meals.items():
+                for meal in meals:
+                    upcoming = day >= self.today
+                    self.writer.add(PreparedMeal, {
+                        'meal_id': meal.id,
+                        'quantity': self.rng.randint(40, 150) if upcoming else self.rng.randint(0, 6),
+                        'prepared_date': day,
+                        'prepared_by': self.rng.choice(self.chef_ids),
+                        'expiry_date': day + timedelta(days=self.rng.choice([1, 2])),
+                        'notes': None
+                    })
+        self.writer.flush(PreparedMeal)
+
+    def _create_purchase_requests(self):
+        ingredients = db.session.query(Inventory.id, Inventory.ingredient, Inventory.unit, Inventory.min_quantity).all()
+        for day in self.days:
+            if day > self.today or self.rng.random() > 0.6:
+                continue
+            item = self.rng.choice(ingredients)
+            decided = (self.today - day).days > 3
+            status = self.rng.choice(['одобрена', 'одобрена', 'отклонена']) if decided else 'на рассмотрении'
+            self.writer.add(PurchaseRequest, {
+                'ingredient': item.ingredient,
+                'ingredient_id': item.id,
+                'quantity': round(item.min_quantity * self.rng.uniform(1, 5), 1),
+                'unit': item.unit,
+                'requested_by': self.rng.choice(self.chef_ids),
+                'requested_at': at(day, 14),
+                'urgency': self.rng.choice(URGENCIES),
+                'status': status,
+                'approved_by': self.admin_id if decided else None,
+                'approved_at': at(day + timedelta(days=1), 10) if decided else None,
+                'notes': None
+            })
+        self.writer.flush(PurchaseRequest)
+
+    def _notify(self, user_id, moment, title, message, kind, force=False):
+        if not force and self.rng.random() > self.notification_rate:
+            return
+        self.writer.add(Notification, {
+            'user_id': user_id,
+            'title': title,
+            'message': message,
+            'type': kind,
+            'is_read': (self.today - moment.date()).days > 7 or self.rng.random() < 0.5,
+            'created_at': moment
+        })
+
+    def _ledger(self, user_id, amount, balance, kind, reference, moment):
+        self.writer.add(LedgerEntry, {
+            'user_id': user_id,
+            'amount': amount,
+            'balance_after': balance,
+            'kind': kind,
+            'reference': reference,
+            'created_by': None,
+            'created_at': moment
+        })
+
+    def _top_up(self, user_id, balance, needed, day):
+        amount = to_kopecks(self.rng.choice([500, 1000, 1000, 1500, 2000, 3000]))
+        while balance + amount < needed:
+            amount += to_kopecks(1000)
+        balance += amount
+        moment = at(day - timedelta(days=1), self.rng.randint(18, 22), self.rng.randint(0, 59))
+
+        if self.rng.random() < 0.7:
+            transaction_id = f'GEN{self.next_transaction:09d}'
+            self.next_transaction += 1
+            self.writer.add(BankTransaction, {
+                'transaction_id': transaction_id,
+                'user_id': user_id,
+                'amount': amount,
+                'reference': f'Питание ученика #{user_id}',
+                'paid_on': moment.date(),
+                'statement': 'generated',
+                'imported_by': self.admin_id,
+                'imported_at': moment
+            })
+            self._ledger(user_id, amount, balance, BANK_TOP_UP, f'bank:{transaction_id}', moment)
+        else:
+            self._ledger(user_id, amount, balance, TOP_UP, None, moment)
+
+        self._notify(user_id, moment, 'Пополнение баланса',
+                     f'Ваш баланс пополнен на {amount / 100} руб. Текущий баланс: {balance / 100} руб.', 'оплата',
+                     force=True)
+        return balance
+
+    def _simulate_student(self, user_id):
+        rng = self.rng
+        appetite = {'завтрак': rng.uniform(0.1, 0.6), 'обед': rng.uniform(0.5, 0.95)}
+        drink_rate = rng.uniform(0.2, 0.7)
+
+        allergens = set()
+        if rng.random() < self.allergy_rate:
+            allergens = set(rng.sample(ALLERGENS, rng.choice([1, 1, 2])))
+            for allergen in sorted(allergens):
+                self.writer.add(Allergy, {
+                    'user_id': user_id,
+                    'allergen': allergen,
+                    'severity': rng.choice(SEVERITIES),
+                    'notes': None
+                })
+        menu = {
+            meal_type: [meal for meal in meals if not allergens & meal.allergens] or meals
+            for meal_type, meals in self.meals.items()
+        }
+
+        subscription_type = rng.choice(['завтрак', 'обед', 'обед']) if rng.random() < self.subscription_rate else None
+        subscription = None
+        week_start = self.today - timedelta(days=self.today.weekday())
+        balance = 0
+
+        for day in self.days:
+            if subscription_type and (subscription is None or subscription['end_date'] < day):
+                subscription = self._finish_subscription(subscription)
+                weeks = rng.choice(SUBSCRIPTION_WEEKS)
+                price = to_kopecks(SUBSCRIPTION_PRICES[subscription_type] * weeks)
+                if balance < price:
+                    balance = self._top_up(user_id, balance, price, day)
+                balance -= price
+                subscription = {
+                    'id': self.next_subscription_id,
+                    'user_id': user_id,
+                    'meal_type': subscription_type,
+                    'start_date': day,
+                    'end_date': day + timedelta(days=7 * weeks),
+                    'meals_per_week': 5,
+                    'used_meals': 0,
+                    'is_active': True
+                }
+                self.next_subscription_id += 1
+                moment = at(day, 7, rng.randint(0, 59))
+                self._ledger(user_id, -price, balance, SUBSCRIPTION, f'subscription:{subscription["id"]}', moment)
+                self._notify(user_id, moment, 'Абонемент куплен',
+                             f'Вы купили абонемент на {subscription_type} на {weeks} недель за {price / 100} руб.',
+                             'оплата', force=True)
+
+            for meal_type in ('завтрак', 'обед'):
+                if rng.random() > appetite[meal_type]:
+                    continue
+                meal = rng.choice(menu[meal_type])
+                drink = rng.choice(menu['напиток']) if menu['напиток'] and rng.random() < drink_rate else None
+                by_subscription = subscription is not None and subscription_type == meal_type
+                balance = self._order(user_id, day, meal_type, meal, drink, by_subscription, balance, subscription,
+                                      week_start)
+
+        self._finish_subscription(subscription)
+        return balance
+
+    def _finish_subscription(self, subscription):
+        if subscription is None:
+            return None
+        subscription['is_active'] = subscription['end_date'] >= self.today and \
+            subscription['used_meals'] < subscription['meals_per_week']
+        self.writer.add(Subscription, subscription)
+        return None
+
+    def _order(self, user_id, day, meal_type, meal, drink, by_subscription, balance, subscription, week_start):
+        rng = self.rng
+        ordered_at = at(day - timedelta(days=rng.choice([0, 0, 0, 1, 2])), rng.randint(7, 11), rng.randint(0, 59))
+        if ordered_at.date() > self.today:
+            ordered_at = at(self.today, 7)
+
+        items = [(meal, meal_type)] + ([(drink, 'напиток')] if drink else [])
+        total = 0 if by_subscription else sum(item.kopecks for item, _ in items)
+        if total and balance < total:
+            balance = self._top_up(user_id, balance, total, ordered_at.date())
+
+        past = day < self.today
+        served = past and rng.random() < 0.97
+        if by_subscription:
+            status = 'served' if served else 'paid'
+            if week_start <= day <= self.today:
+                subscription['used_meals'] = min(subscription['meals_per_week'], subscription['used_meals'] + 1)
+        else:
+            status = 'served' if served else 'paid'
+
+        hour, minute = SERVE_TIMES[meal_type]
+        main_id = self.next_order_id
+        for item, item_type in items:
+            order_id = self.next_order_id
+            self.next_order_id += 1
+            price = 0 if by_subscription else item.kopecks
+            self.writer.add(Order, {
+                'id': order_id,
+                'user_id': user_id,
+                'meal_id': item.id,
+                'order_date': ordered_at,
+                'meal_date': day,
+                'meal_type': item_type,
+                'quantity': 1,
+                'total_price': price / 100,
+                'payment_method': 'абонемент' if by_subscription else 'разовая',
+                'status': status,
+                'is_served': status == 'served',
+                'served_at': at(day, hour, minute + rng.randint(0, 25)) if status == 'served' else None,
+                'served_by': rng.choice(self.chef_ids) if status == 'served' else None,
+                'payment_date': ordered_at if status != 'pending' else None,
+                'notes': f'Дополнение к заказу #{main_id} ({meal_type})' if item_type == 'напиток' else None
+            })
+            if price:
+                balance -= price
+                self._ledger(user_id, -price, balance, ORDER, f'order:{order_id}', ordered_at)
+
+        self._notify(user_id, ordered_at, 'Новый заказ',
+                     f'Вы заказали {meal.name} на {day.strftime("%d.%m.%Y")}', 'заказ')
+        if status == 'served':
+            served_at = at(day, hour, minute)
+            self._notify(user_id, served_at, 'Питание выдано', f'Ваш {meal_type} ({meal.name}) был выдан', 'система')
+            if rng.random() < self.feedback_rate:
+                self.writer.add(Feedback, {
+                    'user_id': user_id,
+                    'meal_id': meal.id,
+                    'rating': rng.choice(RATINGS),
+                    'comment': rng.choice(COMMENTS),
+                    'created_at': served_at + timedelta(hours=rng.randint(1, 6))
+                })
+        return balance
+
+    def _sync_sequences(self):
+        if db.engine.dialect.name != 'postgresql':
+            return
+        for table in (Order.__tablename__, Subscription.__tablename__):
+            db.session.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT max(id) FROM {table}))"
+            ))
+        db.session.commit()
+
+
+def generate(students, **options):
+    return SchoolGenerator(students, **options).run()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Генерация синтетической школы для нагрузочного тестирования')
+    parser.add_argument('--students', type=int, default=2000)
+    parser.add_argument('--months', type=int, default=6)
+    parser.add_argument('--chefs', type=int, default=2)
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--today', type=date.fromisoformat, help='дата «сегодня» в формате ГГГГ-ММ-ДД')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--notification-rate', type=float, default=0.5)
+    args = parser.parse_args()
+
+    from application import create_app, init_database
+
+    app = create_app(register_views=False)
+    init_database(app)
+
+    with app.app_context():
+        try:
+            report = generate(args.students, months=args.months, chefs=args.chefs, seed=args.seed,
+                              today=args.today, batch_size=args.batch_size,
+                              notification_rate=args.notification_rate)
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+
+    print("=" * 60)
+    print("ГЕНЕРАЦИЯ СИНТЕТИЧЕСКОЙ ШКОЛЫ")
+    print("=" * 60)
+    print(f"👨‍🎓 Учеников: {report['students']}, учебных дней: {report['days']}")
+    for table, count in sorted(report['tables'].items()):
+        print(f"  • {table:<20} {count:>10}")
+    print(f"⏱️  Время: {report['seconds']} с ({report['rows_per_second']} строк/с)")
+
+
+if __name__ == '__main__':
+    main()
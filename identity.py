@@ -0,0 +1,77 @@
+import threading
+import time
+
+from flask import current_app
+from flask_login import UserMixin
+
+from models import db, User
+
+DEFAULT_IDENTITY_CACHE_TTL = 30
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+class CachedIdentity(UserMixin):
+    _own_attributes = ('id', 'username', 'role', '_user')
+
+    def __init__(self, id, username, role):
+        object.__setattr__(self, 'id', id)
+        object.__setattr__(self, 'username', username)
+        object.__setattr__(self, 'role', role)
+        object.__setattr__(self, '_user', None)
+
+    @property
+    def user(self):
+        if self._user is None:
+            object.__setattr__(self, '_user', db.session.get(User, self.id))
+        return self._user
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(self.user, name)
+
+    def __setattr__(self, name, value):
+        if name in self._own_attributes:
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self.user, name, value)
+
+    def __repr__(self):
+        return f'<CachedIdentity {self.username}>'
+
+
+def _ttl():
+    return current_app.config.get('IDENTITY_CACHE_TTL', DEFAULT_IDENTITY_CACHE_TTL)
+
+
+def get_identity(user_id):
+    now = time.monotonic()
+
+    with _cache_lock:
+        entry = _cache.get(user_id)
+    if entry and entry[0] > now:
+        return CachedIdentity(*entry[1])
+
+    row = db.session.query(User.id, User.username, User.role).filter(User.id == user_id).first()
+    if row is None:
+        invalidate_identity(user_id)
+        return None
+
+    fields = (row.id, row.username, row.role)
+    with _cache_lock:
+        _cache[user_id] = (now + _ttl(), fields)
+    return CachedIdentity(*fields)
+
+
+def invalidate_identity(user_id=None):
+    with _cache_lock:
+        if user_id is None:
+            _cache.clear()
+        else:
+            _cache.pop(user_id, None)
+
+
+def load_user(user_id):
+    return get_identity(int(user_id))
@@ -0,0 +1,87 @@
+from datetime import datetime
+
+from sqlalchemy import String, cast, delete, insert, literal, select, update
+
+from models import db, User, Order, ArchivedOrder, ArchivedUser, Allergy, Feedback, Notification, \
+    Subscription, PreparedMeal, PurchaseRequest
+from entitlements import invalidate_entitlements
+from identity import invalidate_identity
+from versions import touch, user_scope, MENU, NOTIFICATIONS
+from wallet import close_accounts
+
+ORDER_COLUMNS = ['id', 'user_id', 'meal_id', 'order_date', 'meal_date', 'meal_type', 'quantity', 'total_price',
+                 'payment_method', 'status', 'is_served', 'served_at', 'served_by', 'payment_date', 'notes']
+USER_COLUMNS = ['id', 'username', 'email', 'role', 'grade', 'balance_kopecks', 'created_at']
+
+
+def select_users(grade=None, user_ids=None, role=None, exclude_ids=()):
+    query = select(User.id)
+    if grade is not None:
+        query = query.where(User.grade == grade)
+    if user_ids is not None:
+        query = query.where(User.id.in_(user_ids))
+    if role is not None:
+        query = query.where(User.role == role)
+    if exclude_ids:
+        query = query.where(User.id.not_in(exclude_ids))
+    return query
+
+
+def archived_profile(keep_profiles):
+    columns = {c: getattr(User, c) for c in USER_COLUMNS}
+    if not keep_profiles:
+        columns['username'] = literal('deleted-', String) + cast(User.id, String)
+        columns['email'] = literal('', String)
+    return [columns[c] for c in USER_COLUMNS]
+
+
+def remove_users(target, keep_profiles=True, created_by=None):
+    now = datetime.utcnow()
+    user_ids = [row.id for row in db.session.execute(target)]
+    if not user_ids:
+        return {'users': 0, 'orders': 0, 'closed': 0}
+
+    try:
+        db.session.execute(
+            insert(ArchivedUser).from_select(
+                USER_COLUMNS + ['archived_at'],
+                select(*archived_profile(keep_profiles), literal(now)).where(User.id.in_(user_ids))
+            )
+        )
+        closed = close_accounts(user_ids, created_by=created_by)
+
+        archived_orders = db.session.execute(
+            insert(ArchivedOrder).from_select(
+                ORDER_COLUMNS + ['archived_at'],
+                select(*[getattr(Order, c) for c in ORDER_COLUMNS], literal(now)).where(Order.user_id.in_(user_ids))
+            )
+        ).rowcount
+
+        db.session.execute(delete(Order).where(Order.user_id.in_(user_ids)))
+        db.session.execute(delete(Allergy).where(Allergy.user_id.in_(user_ids)))
+        db.session.execute(delete(Feedback).where(Feedback.user_id.in_(user_ids)))
+        db.session.execute(delete(Notification).where(Notification.user_id.in_(user_ids)))
+        db.session.execute(delete(Subscription).where(Subscription.user_id.in_(user_ids)))
+
+        db.session.execute(update(Order).where(Order.served_by.in_(user_ids)).values(served_by=None))
+        db.session.execute(update(PreparedMeal).where(PreparedMeal.prepared_by.in_(user_ids)).values(prepared_by=None))
+        db.session.execute(
+            update(PurchaseRequest).where(PurchaseRequest.requested_by.in_(user_ids)).values(requested_by=None)
+        )
+        db.session.execute(
+            update(PurchaseRequest).where(PurchaseRequest.approved_by.in_(user_ids)).values(approved_by=None)
+        )
+
+        removed_users = db.session.execute(delete(User).where(User.id.in_(user_ids))).rowcount
+        touch(db.session, MENU, *(user_scope(NOTIFICATIONS, user_id) for user_id in user_ids))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    db.session.expire_all()
+    for user_id in user_ids:
+        invalidate_identity(user_id)
+        invalidate_entitlements(user_id)
+
+    return {'users': removed_users, 'orders': archived_orders, 'closed': closed}
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+import sys
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import and_, delete, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import aliased
+
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir))
+
+from models import db, Subscription, Notification, MaintenanceState
+from entitlements import invalidate_entitlements
+from versions import touch, user_scope, NOTIFICATIONS
+
+WEEKLY_RESET = 'weekly_subscription_reset'
+
+
+def iso_week(day):
+    year, week, _ = day.isocalendar()
+    return f'{year}-W{week:02d}'
+
+
+def claim_weekly_reset(today):
+    week = iso_week(today)
+    claimed = db.session.execute(
+        update(MaintenanceState)
+        .where(MaintenanceState.name == WEEKLY_RESET, MaintenanceState.value < week)
+        .values(value=week, updated_at=datetime.utcnow())
+    ).rowcount
+    if claimed:
+        return True
+    if db.session.get(MaintenanceState, WEEKLY_RESET) is not None:
+        return False
+
+    try:
+        with db.session.begin_nested():
+            db.session.add(MaintenanceState(name=WEEKLY_RESET, value=week))
+    except IntegrityError:
+        return False
+    return True
+
+
+def deactivate_expired_subscriptions(today=None):
+    today = today or date.today()
+
+    result = db.session.execute(
+        update(Subscription)
+        .where(
+            Subscription.is_active == True,
+            Subscription.end_date < today
+        )
+        .values(is_active=False)
+    )
+    db.session.commit()
+    invalidate_entitlements()
+    return result.rowcount
+
+
+def reset_weekly_subscription_usage(today=None):
+    today = today or date.today()
+
+    other = aliased(Subscription)
+    db.session.execute(
+        update(Subscription)
+        .where(
+            Subscription.is_active == False,
+            Subscription.end_date >= today,
+            Subscription.used_meals >= Subscription.meals_per_week,
+            ~select(other.id).where(
+                other.user_id == Subscription.user_id,
+                other.meal_type == Subscription.meal_type,
+                other.end_date >= today,
+                or_(
+                    other.is_active == True,
+                    and_(other.id > Subscription.id, other.used_meals >= other.meals_per_week)
+                )
+            ).exists()
+        )
+        .values(is_active=True)
+    )
+    result = db.session.execute(
+        update(Subscription)
+        .where(
+            Subscription.end_date >= today,
+            Subscription.used_meals > 0
+        )
+        .values(used_meals=0)
+    )
+    claim_weekly_reset(today)
+    db.session.commit()
+    invalidate_entitlements()
+    return result.rowcount
+
+
+def reset_weekly_usage_if_due(today=None):
+    today = today or date.today()
+
+    if not claim_weekly_reset(today):
+        db.session.rollback()
+        return 0
+    return reset_weekly_subscription_usage(today)
+
+
+def sweep_subscriptions(today=None):
+    today = today or date.today()
+
+    expired = deactivate_expired_subscriptions(today)
+    reset = reset_weekly_usage_if_due(today)
+
+    return {'expired': expired, 'reset': reset}
+
+
+def cleanup_read_notifications(days=30):
+    cutoff = datetime.utcnow() - timedelta(days=days)
+
+    user_ids = db.session.execute(
+        delete(Notification)
+        .where(
+            Notification.is_read == True,
+            Notification.created_at < cutoff
+        )
+        .returning(Notification.user_id)
+    ).scalars().all()
+    touch(db.session, *{user_scope(NOTIFICATIONS, user_id) for user_id in user_ids})
+    db.session.commit()
+    return len(user_ids)
+
+
+def main():
+    from application import create_app
+
+    app = create_app(register_views=False)
+
+    command = sys.argv[1] if len(sys.argv) > 1 else 'sweep'
+
+    with app.app_context():
+        if command == 'expire':
+            print(f"✅ Деактивировано истекших абонементов: {deactivate_expired_subscriptions()}")
+        elif command == 'reset-week':
+            print(f"✅ Сброшено недельных счетчиков: {reset_weekly_subscription_usage()}")
+        elif command == 'sweep':
+            result = sweep_subscriptions()
+            print(f"✅ Деактивировано истекших абонементов: {result['expired']}")
+            print(f"✅ Сброшено недельных счетчиков: {result['reset']}")
+        else:
+            print("Использование: python maintenance.py [sweep|expire|reset-week]")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
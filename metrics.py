@@ -0,0 +1,322 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from datetime import date, datetime, timedelta
+
+from flask import current_app, g, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, func
+
+from models import db, Meal, Order, PreparedMeal, PurchaseRequest
+
+PREFIX = 'school_food_'
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COMMIT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+MAX_SHARDS = 64
+
+METRICS = {
+    'http_requests_total': ('counter', 'Обработанные запросы по эндпоинту, методу и статусу'),
+    'http_request_duration_seconds': ('histogram', 'Время обработки запроса'),
+    'http_requests_in_flight': ('gauge', 'Запросы в обработке'),
+    'db_commit_duration_seconds': ('histogram', 'Время фиксации транзакции, включая flush'),
+    'db_pool_size': ('gauge', 'Размер пула соединений'),
+    'db_pool_checked_out': ('gauge', 'Соединения, выданные из пула'),
+    'db_pool_overflow': ('gauge', 'Соединения сверх размера пула'),
+    'orders_created_total': ('counter', 'Зафиксированные заказы по типу питания'),
+    'orders_last_minute': ('gauge', 'Заказы, созданные за последнюю минуту'),
+    'portions_available': ('gauge', 'Доступные приготовленные порции по типу питания'),
+    'purchase_requests_pending': ('gauge', 'Заявки на закупку на рассмотрении'),
+    'fragment_cache_hits_total': ('counter', 'Фрагменты страниц, взятые из кэша'),
+    'fragment_cache_misses_total': ('counter', 'Фрагменты страниц, отрисованные заново'),
+}
+BUCKETS = {
+    'http_request_duration_seconds': DEFAULT_BUCKETS,
+    'db_commit_duration_seconds': COMMIT_BUCKETS,
+}
+
+
+class Registry:
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards = []
+        self._retired = {}
+        self.collectors = {}
+
+    def reset(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards = []
+        self._retired = {}
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards.append((threading.current_thread(), shard))
+                if len(self._shards) > MAX_SHARDS:
+                    self._retire()
+        return shard
+
+    def _retire(self):
+        alive = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                alive.append((thread, shard))
+            else:
+                _merge(self._retired, shard)
+        self._shards = alive
+
+    def inc(self, name, labels=(), amount=1):
+        shard = self._shard()
+        key = (name, labels)
+        shard[key] = shard.get(key, 0) + amount
+
+    def observe(self, name, value, labels=()):
+        shard = self._shard()
+        key = (name, labels)
+        values = shard.get(key)
+        if values is None:
+            buckets = BUCKETS[name]
+            values = shard[key] = [0] * (len(buckets) + 1) + [0.0]
+        values[bisect_left(BUCKETS[name], value)] += 1
+        values[-1] += value
+
+    def snapshot(self):
+        with self._lock:
+            self._retire()
+            samples = {}
+            _merge(samples, self._retired)
+            for _, shard in self._shards:
+                _merge(samples, shard)
+
+        for collect in list(self.collectors.values()):
+            for name, labels, value in collect():
+                samples[(name, labels)] = value
+        return samples
+
+
+def _merge(target, source):
+    for key, value in list(source.items()):
+        if isinstance(value, list):
+            current = target.get(key)
+            target[key] = [a + b for a, b in zip(current, value)] if current else list(value)
+        else:
+            target[key] = target.get(key, 0) + value
+
+
+REGISTRY = Registry()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=REGISTRY.reset)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def write_snapshot(directory):
+    path = os.path.join(directory, f'metrics-{os.getpid()}.json')
+    payload = {
+        'pid': os.getpid(),
+        'samples': [[name, list(labels), value] for (name, labels), value in REGISTRY.snapshot().items()]
+    }
+    tmp = f'{path}.{threading.get_ident()}.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(payload, f)
+    os.replace(tmp, path)
+
+
+def aggregate(directory=None):
+    if not directory:
+        return REGISTRY.snapshot()
+
+    write_snapshot(directory)
+    samples = {}
+    for filename in os.listdir(directory):
+        if not filename.startswith('metrics-') or not filename.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(directory, filename), encoding='utf-8') as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            continue
+
+        alive = _pid_alive(payload['pid'])
+        process_samples = {}
+        for name, labels, value in payload['samples']:
+            if METRICS[name][0] == 'gauge' and not alive:
+                continue
+            process_samples[(name, tuple(tuple(pair) for pair in labels))] = value
+        _merge(samples, process_samples)
+    return samples
+
+
+def business_gauges():
+    now = datetime.utcnow()
+    today = date.today()
+    samples = {
+        ('orders_last_minute', ()): db.session.query(func.count(Order.id)).filter(
+            Order.order_date >= now - timedelta(minutes=1)
+        ).scalar() or 0,
+        ('purchase_requests_pending', ()): db.session.query(func.count(PurchaseRequest.id)).filter(
+            PurchaseRequest.status == 'на рассмотрении'
+        ).scalar() or 0,
+    }
+    portions = db.session.query(Meal.meal_type, func.sum(PreparedMeal.quantity)).join(
+        Meal, PreparedMeal.meal_id == Meal.id
+    ).filter(
+        PreparedMeal.expiry_date >= today,
+        PreparedMeal.quantity > 0
+    ).group_by(Meal.meal_type).all()
+    for meal_type, quantity in portions:
+        samples[('portions_available', (('meal_type', meal_type),))] = int(quantity or 0)
+    return samples
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in pairs) + '}'
+
+
+def _number(value):
+    if isinstance(value, float):
+        return repr(value) if value != int(value) else str(int(value))
+    return str(value)
+
+
+def render(samples):
+    by_name = {}
+    for (name, labels), value in samples.items():
+        by_name.setdefault(name, []).append((labels, value))
+
+    lines = []
+    for name, (kind, help_text) in METRICS.items():
+        series = sorted(by_name.get(name, []))
+        if not series:
+            continue
+        metric = PREFIX + name
+        lines.append(f'# HELP {metric} {help_text}')
+        lines.append(f'# TYPE {metric} {kind}')
+        for labels, value in series:
+            if kind != 'histogram':
+                lines.append(f'{metric}{_labels(labels)} {_number(value)}')
+                continue
+            cumulative = 0
+            for bound, count in zip(BUCKETS[name] + ('+Inf',), value[:-1]):
+                cumulative += count
+                lines.append(f'{metric}_bucket{_labels(labels, [("le", bound)])} {cumulative}')
+            lines.append(f'{metric}_sum{_labels(labels)} {_number(value[-1])}')
+            lines.append(f'{metric}_count{_labels(labels)} {cumulative}')
+    return '\n'.join(lines) + '\n'
+
+
+def _pool_collector(engines):
+    def collect():
+        for key, engine in engines.items():
+            pool = engine.pool
+            if not hasattr(pool, 'checkedout'):
+                continue
+            labels = (('bind', key or 'default'),)
+            yield 'db_pool_size', labels, pool.size()
+            yield 'db_pool_checked_out', labels, pool.checkedout()
+            yield 'db_pool_overflow', labels, max(0, pool.overflow())
+
+    return collect
+
+
+def _before_commit(session):
+    session.info['metrics_commit_started'] = time.perf_counter()
+
+
+def _after_flush(session, flush_context):
+    created = session.info.setdefault('metrics_new_orders', [])
+    created.extend(obj.meal_type for obj in session.new if isinstance(obj, Order))
+
+
+def _after_commit(session):
+    started = session.info.pop('metrics_commit_started', None)
+    if started is not None:
+        REGISTRY.observe('db_commit_duration_seconds', time.perf_counter() - started)
+    for meal_type in session.info.pop('metrics_new_orders', []):
+        REGISTRY.inc('orders_created_total', (('meal_type', meal_type),))
+
+
+def _after_rollback(session, previous_transaction):
+    session.info.pop('metrics_commit_started', None)
+    session.info.pop('metrics_new_orders', None)
+
+
+_session_hooks = []
+
+
+def instrument_sessions():
+    if _session_hooks:
+        return
+    for name, hook in (('before_commit', _before_commit), ('after_flush', _after_flush),
+                       ('after_commit', _after_commit), ('after_soft_rollback', _after_rollback)):
+        event.listen(Session, name, hook)
+        _session_hooks.append(name)
+
+
+def _start_request():
+    g.metrics_started = time.perf_counter()
+    REGISTRY.inc('http_requests_in_flight')
+
+
+def _record_status(response):
+    g.metrics_status = response.status_code
+    return response
+
+
+def _finish_request(exc):
+    started = g.pop('metrics_started', None)
+    if started is None:
+        return
+
+    REGISTRY.inc('http_requests_in_flight', amount=-1)
+    endpoint = request.endpoint or 'unmatched'
+    status = g.pop('metrics_status', 500)
+    REGISTRY.inc('http_requests_total', (('endpoint', endpoint), ('method', request.method), ('status', str(status))))
+    REGISTRY.observe('http_request_duration_seconds', time.perf_counter() - started, (('endpoint', endpoint),))
+
+    directory = current_app.config['METRICS_DIR']
+    if directory:
+        now = time.monotonic()
+        if now >= current_app.extensions['metrics_next_flush']:
+            current_app.extensions['metrics_next_flush'] = now + current_app.config['METRICS_FLUSH_INTERVAL']
+            write_snapshot(directory)
+
+
+def init_metrics(app):
+    if not app.config['METRICS_ENABLED']:
+        return
+
+    directory = app.config['METRICS_DIR']
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    with app.app_context():
+        REGISTRY.collectors['db_pool'] = _pool_collector(dict(db.engines))
+    instrument_sessions()
+
+    app.extensions['metrics_next_flush'] = 0.0
+    app.before_request(_start_request)
+    app.after_request(_record_status)
+    app.teardown_request(_finish_request)
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+import re
+import sys
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import func, inspect, select, text, update
+
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir))
+
+from models import db, SchemaMigration, MaintenanceState, User, Order, LedgerEntry, Notification, PreparedMeal, \
+    Allergy, Feedback, MealIngredient, PurchaseRequest, Subscription
+from maintenance import iso_week, WEEKLY_RESET
+
+
+def create_index(conn, name, table, columns):
+    conn.execute(text(f'CREATE INDEX IF NOT EXISTS {name} ON {table} ({", ".join(columns)})'))
+
+
+def add_column(conn, table, column, ddl):
+    existing = {c['name'] for c in inspect(conn).get_columns(table)}
+    if column not in existing:
+        conn.execute(text(f'ALTER TABLE {table} ADD COLUMN {column} {ddl}'))
+
+
+def migration_0001(conn):
+    create_index(conn, 'ix_subscriptions_user_type_active_end', 'subscriptions',
+                 ['user_id', 'meal_type', 'is_active', 'end_date'])
+    create_index(conn, 'ix_users_role_grade', 'users', ['role', 'grade'])
+    create_index(conn, 'ix_users_grade', 'users', ['grade'])
+    create_index(conn, 'ix_users_created_at', 'users', ['created_at'])
+
+
+def migration_0002(conn):
+    create_index(conn, 'ix_orders_meal_date_status', 'orders', ['meal_date', 'status'])
+    create_index(conn, 'ix_orders_user_meal_date', 'orders', ['user_id', 'meal_date'])
+    create_index(conn, 'ix_orders_user_status', 'orders', ['user_id', 'status'])
+    create_index(conn, 'ix_notifications_user_read_created', 'notifications', ['user_id', 'is_read', 'created_at'])
+    create_index(conn, 'ix_prepared_meals_meal_expiry', 'prepared_meals', ['meal_id', 'expiry_date'])
+    create_index(conn, 'ix_prepared_meals_expiry_date', 'prepared_meals', ['expiry_date'])
+    create_index(conn, 'ix_allergies_user_id', 'allergies', ['user_id'])
+    create_index(conn, 'ix_feedbacks_user_meal', 'feedbacks', ['user_id', 'meal_id'])
+    create_index(conn, 'ix_meal_ingredients_meal_id', 'meal_ingredients', ['meal_id'])
+    create_index(conn, 'ix_purchase_requests_status', 'purchase_requests', ['status'])
+
+
+def migration_0003(conn):
+    for table in ('users', 'users_archive'):
+        columns = {c['name'] for c in inspect(conn).get_columns(table)}
+        if 'balance' not in columns:
+            continue
+
+        add_column(conn, table, 'balance_kopecks', 'BIGINT NOT NULL DEFAULT 0')
+        conn.execute(text(f'UPDATE {table} SET balance_kopecks = CAST(ROUND(COALESCE(balance, 0) * 100) AS BIGINT)'))
+        if table == 'users':
+            conn.execute(text(
+                'INSERT INTO wallet_ledger (user_id, amount, balance_after, kind, created_at) '
+                'SELECT id, balance_kopecks, balance_kopecks, :kind, :now FROM users WHERE balance_kopecks <> 0'
+            ), {'kind': 'начальный баланс', 'now': datetime.utcnow()})
+        conn.execute(text(f'ALTER TABLE {table} DROP COLUMN balance'))
+
+
+def migration_0004(conn):
+    create_index(conn, 'ix_orders_order_date', 'orders', ['order_date'])
+
+
+def rebuild_with_autoincrement(conn, table):
+    ddl = conn.execute(text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                       {'name': table.name}).scalar()
+    if ddl is None or 'AUTOINCREMENT' in ddl.upper():
+        return
+
+    old = f'{table.name}_before_autoincrement'
+    columns = ', '.join(c['name'] for c in inspect(conn).get_columns(table.name) if c['name'] in table.c)
+    conn.execute(text('PRAGMA legacy_alter_table = ON'))
+    conn.execute(text(f'ALTER TABLE {table.name} RENAME TO {old}'))
+    indexes = conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = :name "
+                                "AND sql IS NOT NULL"), {'name': old}).scalars().all()
+    for index in indexes:
+        conn.execute(text(f'DROP INDEX {index}'))
+    table.create(conn)
+    conn.execute(text(f'INSERT INTO {table.name} ({columns}) SELECT {columns} FROM {old}'))
+    conn.execute(text(f'DROP TABLE {old}'))
+    conn.execute(text('PRAGMA legacy_alter_table = OFF'))
+
+
+def reserve_ids(conn, table, *sources):
+    floor = max(conn.execute(text(f'SELECT MAX({column}) FROM {source}')).scalar() or 0
+                for source, column in sources)
+    seq = conn.execute(text('SELECT seq FROM sqlite_sequence WHERE name = :name'), {'name': table}).scalar()
+    if seq is None:
+        conn.execute(text('INSERT INTO sqlite_sequence (name, seq) VALUES (:name, :seq)'), {'name': table, 'seq': floor})
+    elif seq < floor:
+        conn.execute(text('UPDATE sqlite_sequence SET seq = :seq WHERE name = :name'), {'name': table, 'seq': floor})
+
+
+def migration_0005(conn):
+    if conn.dialect.name != 'sqlite':
+        return
+
+    rebuild_with_autoincrement(conn, User.__table__)
+    rebuild_with_autoincrement(conn, Order.__table__)
+    reserve_ids(conn, 'users', ('users', 'id'), ('users_archive', 'id'), ('orders_archive', 'user_id'),
+                ('wallet_ledger', 'user_id'))
+    reserve_ids(conn, 'orders', ('orders', 'id'), ('orders_archive', 'id'))
+
+
+def migration_0006(conn):
+    orders = Order.__table__
+    wallet_since = conn.execute(
+        select(SchemaMigration.__table__.c.applied_at).where(SchemaMigration.__table__.c.version == 3)
+    ).scalar()
+    pending = conn.execute(
+        select(orders.c.id, orders.c.order_date, orders.c.notes)
+        .where(orders.c.status == 'pending', orders.c.payment_method == 'разовая')
+    ).all()
+    if not pending:
+        return
+
+    paid = []
+    charged_by = {}
+    for row in pending:
+        if wallet_since is not None and row.order_date < wallet_since:
+            paid.append(row.id)
+            continue
+        addon = re.match(r'Дополнение к заказу #(\d+) ', row.notes or '')
+        charged_by[row.id] = f'order:{addon.group(1) if addon else row.id}'
+
+    references = sorted(set(charged_by.values()))
+    ledger = LedgerEntry.__table__
+    charged = set()
+    for start in range(0, len(references), 500):
+        charged.update(conn.execute(
+            select(ledger.c.reference).where(ledger.c.reference.in_(references[start:start + 500]))
+        ).scalars())
+
+    paid += [order_id for order_id, reference in charged_by.items() if reference in charged]
+    for start in range(0, len(paid), 500):
+        conn.execute(
+            update(orders)
+            .where(orders.c.id.in_(paid[start:start + 500]), orders.c.status == 'pending')
+            .values(status='paid', payment_date=func.coalesce(orders.c.payment_date, orders.c.order_date))
+        )
+
+def migration_0007(conn):
+    today = date.today()
+    last_reset = today if today.weekday() else today - timedelta(days=7)
+    state = MaintenanceState.__table__
+    if conn.execute(select(state.c.name).where(state.c.name == WEEKLY_RESET)).first() is None:
+        conn.execute(state.insert().values(name=WEEKLY_RESET, value=iso_week(last_reset), updated_at=datetime.utcnow()))
+
+
+def migration_0008(conn):
+    create_index(conn, 'ix_users_username_lower', 'users', ['lower(username)'])
+    create_index(conn, 'ix_users_email_lower', 'users', ['lower(email)'])
+
+
+MIGRATIONS = [
+    (1, 'indexes for subscriptions and user directory', migration_0001),
+    (2, 'composite indexes for hot query paths', migration_0002),
+    (3, 'integer kopeck balances with wallet ledger', migration_0003),
+    (4, 'order date index for order rate metrics', migration_0004),
+    (5, 'never reuse user and order ids after removal', migration_0005),
+    (6, 'mark one-off orders charged at creation as paid', migration_0006),
+    (7, 'remember the last weekly subscription reset', migration_0007),
+    (8, 'case-insensitive user directory search', migration_0008),
+]
+
+
+def applied_versions():
+    return {row.version for row in db.session.query(SchemaMigration.version)}
+
+
+def upgrade():
+    db.create_all(bind_key=None)
+    done = applied_versions()
+    applied = []
+
+    for version, name, migrate in MIGRATIONS:
+        if version in done:
+            continue
+        with db.engine.begin() as conn:
+            migrate(conn)
+            conn.execute(SchemaMigration.__table__.insert().values(
+                version=version, name=name, applied_at=datetime.utcnow()
+            ))
+        applied.append((version, name))
+
+    return applied
+
+
+def hot_queries():
+    today = date.today()
+    return [
+        ('непрочитанные уведомления', select(func.count(Notification.id)).where(
+            Notification.user_id == 1, Notification.is_read == False
+        ), ('ix_notifications_user_read_created',)),
+        ('ближайшие заказы ученика', select(Order.id).where(
+            Order.user_id == 1, Order.meal_date >= today
+        ).order_by(Order.meal_date.desc()).limit(5), ('ix_orders_user_meal_date',)),
+        ('сумма оплаченных заказов ученика', select(func.sum(Order.total_price)).where(
+            Order.user_id == 1, Order.status == 'paid'
+        ), ('ix_orders_user_status', 'ix_orders_user_meal_date')),
+        ('выручка за день', select(func.sum(Order.total_price)).where(
+            Order.meal_date == today, Order.status == 'paid'
+        ), ('ix_orders_meal_date_status',)),
+        ('заказы на сегодня для повара', select(Order.id).where(
+            Order.meal_date == today
+        ), ('ix_orders_meal_date_status',)),
+        ('абонементы на сегодня', select(func.count(Order.id)).where(
+            Order.user_id == 1, Order.meal_date == today, Order.payment_method == 'абонемент'
+        ), ('ix_orders_user_meal_date',)),
+        ('доступные порции блюда', select(func.sum(PreparedMeal.quantity)).where(
+            PreparedMeal.meal_id == 1, PreparedMeal.expiry_date >= today
+        ), ('ix_prepared_meals_meal_expiry',)),
+        ('приготовленные блюда', select(PreparedMeal.id).where(
+            PreparedMeal.expiry_date >= today
+        ), ('ix_prepared_meals_expiry_date',)),
+        ('аллергии ученика', select(Allergy.allergen).where(
+            Allergy.user_id == 1
+        ), ('ix_allergies_user_id',)),
+        ('отзыв ученика о блюде', select(Feedback.id).where(
+            Feedback.user_id == 1, Feedback.meal_id == 1
+        ), ('ix_feedbacks_user_meal',)),
+        ('ингредиенты блюда', select(MealIngredient.id).where(
+            MealIngredient.meal_id == 1
+        ), ('ix_meal_ingredients_meal_id',)),
+        ('заказы за последнюю минуту', select(func.count(Order.id)).where(
+            Order.order_date >= datetime.utcnow() - timedelta(minutes=1)
+        ), ('ix_orders_order_date',)),
+        ('заявки на рассмотрении', select(func.count(PurchaseRequest.id)).where(
+            PurchaseRequest.status == 'на рассмотрении'
+        ), ('ix_purchase_requests_status',)),
+        ('активный абонемент', select(Subscription.id).where(
+            Subscription.user_id == 1, Subscription.meal_type == 'обед',
+            Subscription.is_active == True, Subscription.end_date >= today
+        ), ('ix_subscriptions_user_type_active_end',)),
+        ('пользователи класса', select(User.id).where(
+            User.role == 'ученик', User.grade == '10А'
+        ), ('ix_users_role_grade',)),
+    ]
+
+
+def explain(conn, statement):
+    compiled = statement.compile(dialect=conn.dialect, compile_kwargs={'render_postcompile': True})
+    params = compiled.construct_params()
+    values = []
+    for name in compiled.positiontup:
+        value = params[name]
+        if isinstance(value, (date, datetime)):
+            value = value.isoformat()
+        values.append(value)
+    rows = conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {compiled}', tuple(values)).all()
+    return [row[-1] for row in rows]
+
+
+def check_query_plans():
+    results = []
+    with db.engine.connect() as conn:
+        if conn.dialect.name != 'sqlite':
+            return results
+        for name, statement, expected in hot_queries():
+            plan = explain(conn, statement)
+            used = next((index for index in expected if any(index in step for step in plan)), None)
+            results.append({'name': name, 'ok': used is not None, 'index': used, 'plan': plan})
+    return results
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else 'upgrade'
+
+    from application import create_app
+
+    app = create_app(register_views=False)
+
+    with app.app_context():
+        if command == 'upgrade':
+            applied = upgrade()
+            for version, name in applied:
+                print(f"✅ Применена миграция {version:04d}: {name}")
+            if not applied:
+                print("✅ Схема базы данных актуальна")
+
+        elif command == 'status':
+            db.create_all()
+            done = applied_versions()
+            for version, name, _ in MIGRATIONS:
+                mark = '✅' if version in done else '⏳'
+                print(f"  {mark} {version:04d} {name}")
+
+        elif command == 'check':
+            results = check_query_plans()
+            for result in results:
+                mark = '✅' if result['ok'] else '❌'
+                print(f"  {mark} {result['name']}: {result['index'] or ' | '.join(result['plan'])}")
+            if not all(result['ok'] for result in results):
+                sys.exit(1)
+
+        else:
+            print("Использование: python migrations.py [upgrade|status|check]")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,17 +1,13 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin, LoginManager
 from datetime import datetime, date
-from werkzeug.security import generate_password_hash, check_password_hash
+from passwords import hash_password, verify_password
+from routing import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 login_manager = LoginManager()
 
 
-@login_manager.user_loader
-def load_user(user_id):
-    return db.session.get(User, int(user_id))
-
-
 class User(UserMixin, db.Model):
     __tablename__ = 'users'
 
@@ -21,7 +17,7 @@ class User(UserMixin, db.Model):
     password_hash = db.Column(db.String(256), nullable=False)
     role = db.Column(db.String(20), nullable=False, default='ученик')
     grade = db.Column(db.String(10))
-    balance = db.Column(db.Float, default=0.0)
+    balance_kopecks = db.Column(db.BigInteger, default=0, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     allergies = db.relationship('Allergy', backref='user', lazy='dynamic')
@@ -33,29 +29,32 @@ class User(UserMixin, db.Model):
                                      lazy='dynamic')
     served_orders = db.relationship('Order', foreign_keys='Order.served_by', backref='served_by_user', lazy='dynamic')
 
+    __table_args__ = (
+        db.Index('ix_users_role_grade', 'role', 'grade'),
+        db.Index('ix_users_grade', 'grade'),
+        db.Index('ix_users_created_at', 'created_at'),
+        db.Index('ix_users_username_lower', db.text('lower(username)')),
+        db.Index('ix_users_email_lower', db.text('lower(email)')),
+        {'sqlite_autoincrement': True},
+    )
+
+    @property
+    def balance(self):
+        return (self.balance_kopecks or 0) / 100
+
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return verify_password(self.password_hash, password)
 
     def has_active_subscription(self, meal_type):
-        today = date.today()
-        return Subscription.query.filter(
-            Subscription.user_id == self.id,
-            Subscription.meal_type == meal_type,
-            Subscription.is_active == True,
-            Subscription.end_date >= today
-        ).first() is not None
+        from entitlements import get_active_subscription
+        return get_active_subscription(self.id, meal_type) is not None
 
     def get_active_subscription(self, meal_type):
-        today = date.today()
-        return Subscription.query.filter(
-            Subscription.user_id == self.id,
-            Subscription.meal_type == meal_type,
-            Subscription.is_active == True,
-            Subscription.end_date >= today
-        ).first()
+        from entitlements import get_active_subscription
+        return get_active_subscription(self.id, meal_type)
 
     def __repr__(self):
         return f'<User {self.username}>'
@@ -65,7 +64,7 @@ class Allergy(db.Model):
     __tablename__ = 'allergies'
 
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     allergen = db.Column(db.String(100), nullable=False)
     severity = db.Column(db.String(20))
     notes = db.Column(db.Text)
@@ -197,10 +196,60 @@ class Order(db.Model):
     payment_date = db.Column(db.DateTime)
     notes = db.Column(db.Text)
 
+    __table_args__ = (
+        db.Index('ix_orders_meal_date_status', 'meal_date', 'status'),
+        db.Index('ix_orders_user_meal_date', 'user_id', 'meal_date'),
+        db.Index('ix_orders_user_status', 'user_id', 'status'),
+        db.Index('ix_orders_order_date', 'order_date'),
+        {'sqlite_autoincrement': True},
+    )
+
     def __repr__(self):
         return f'<Order {self.id} - {self.user_id}>'
 
 
+class ArchivedOrder(db.Model):
+    __tablename__ = 'orders_archive'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    user_id = db.Column(db.Integer, nullable=False, index=True)
+    meal_id = db.Column(db.Integer, db.ForeignKey('meals.id'), nullable=False)
+    order_date = db.Column(db.DateTime, nullable=False)
+    meal_date = db.Column(db.Date, nullable=False, index=True)
+    meal_type = db.Column(db.String(20), nullable=False)
+    quantity = db.Column(db.Integer, default=1)
+    total_price = db.Column(db.Float, nullable=False)
+    payment_method = db.Column(db.String(20))
+    status = db.Column(db.String(20))
+    is_served = db.Column(db.Boolean, default=False)
+    served_at = db.Column(db.DateTime)
+    served_by = db.Column(db.Integer)
+    payment_date = db.Column(db.DateTime)
+    notes = db.Column(db.Text)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    meal = db.relationship('Meal')
+
+    def __repr__(self):
+        return f'<ArchivedOrder {self.id} - {self.user_id}>'
+
+
+class ArchivedUser(db.Model):
+    __tablename__ = 'users_archive'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    username = db.Column(db.String(64), nullable=False)
+    email = db.Column(db.String(120), nullable=False)
+    role = db.Column(db.String(20), nullable=False)
+    grade = db.Column(db.String(10), index=True)
+    balance_kopecks = db.Column(db.BigInteger, default=0, nullable=False)
+    created_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f'<ArchivedUser {self.username}>'
+
+
 class Feedback(db.Model):
     __tablename__ = 'feedbacks'
 
@@ -211,6 +260,10 @@ class Feedback(db.Model):
     comment = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_feedbacks_user_meal', 'user_id', 'meal_id'),
+    )
+
     def __repr__(self):
         return f'<Feedback {self.rating} stars>'
 
@@ -233,7 +286,7 @@ class MealIngredient(db.Model):
     __tablename__ = 'meal_ingredients'
 
     id = db.Column(db.Integer, primary_key=True)
-    meal_id = db.Column(db.Integer, db.ForeignKey('meals.id'), nullable=False)
+    meal_id = db.Column(db.Integer, db.ForeignKey('meals.id'), nullable=False, index=True)
     ingredient_id = db.Column(db.Integer, db.ForeignKey('inventory.id'), nullable=False)
     quantity_required = db.Column(db.Float, nullable=False)
     unit = db.Column(db.String(20))
@@ -255,6 +308,11 @@ class PreparedMeal(db.Model):
     expiry_date = db.Column(db.Date)
     notes = db.Column(db.Text)
 
+    __table_args__ = (
+        db.Index('ix_prepared_meals_meal_expiry', 'meal_id', 'expiry_date'),
+        db.Index('ix_prepared_meals_expiry_date', 'expiry_date'),
+    )
+
     def __repr__(self):
         return f'<PreparedMeal {self.id}: {self.quantity} порций>'
 
@@ -271,6 +329,10 @@ class Subscription(db.Model):
     used_meals = db.Column(db.Integer, default=0)
     is_active = db.Column(db.Boolean, default=True)
 
+    __table_args__ = (
+        db.Index('ix_subscriptions_user_type_active_end', 'user_id', 'meal_type', 'is_active', 'end_date'),
+    )
+
     def __repr__(self):
         return f'<Subscription {self.id}: {self.meal_type}>'
 
@@ -299,6 +361,10 @@ class PurchaseRequest(db.Model):
     approved_at = db.Column(db.DateTime)
     notes = db.Column(db.Text)
 
+    __table_args__ = (
+        db.Index('ix_purchase_requests_status', 'status'),
+    )
+
     requested_by_user = db.relationship('User', foreign_keys=[requested_by])
     approved_by_user = db.relationship('User', foreign_keys=[approved_by])
     ingredient_ref = db.relationship('Inventory', foreign_keys=[ingredient_id])
@@ -318,5 +384,109 @@ class Notification(db.Model):
     is_read = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_notifications_user_read_created', 'user_id', 'is_read', 'created_at'),
+    )
+
+    def __repr__(self):
+        return f'<Notification {self.title}>'
+
+
+class JobLock(db.Model):
+    __tablename__ = 'job_locks'
+
+    name = db.Column(db.String(100), primary_key=True)
+    locked_by = db.Column(db.String(200))
+    locked_until = db.Column(db.DateTime)
+    last_scheduled_for = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return f'<JobLock {self.name}: {self.locked_by}>'
+
+
+class JobRun(db.Model):
+    __tablename__ = 'job_runs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    job_name = db.Column(db.String(100), nullable=False, index=True)
+    trigger = db.Column(db.String(20), default='schedule')
+    worker = db.Column(db.String(200))
+    started_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    finished_at = db.Column(db.DateTime)
+    duration_ms = db.Column(db.Float)
+    status = db.Column(db.String(20), default='running')
+    result = db.Column(db.Text)
+    error = db.Column(db.Text)
+
+    def __repr__(self):
+        return f'<JobRun {self.job_name}: {self.status}>'
+
+
+class MaintenanceState(db.Model):
+    __tablename__ = 'maintenance_state'
+
+    name = db.Column(db.String(100), primary_key=True)
+    value = db.Column(db.String(50), nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f'<MaintenanceState {self.name}: {self.value}>'
+
+
+class SchemaMigration(db.Model):
+    __tablename__ = 'schema_migrations'
+
+    version = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    name = db.Column(db.String(200), nullable=False)
+    applied_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f'<SchemaMigration {self.version}: {self.name}>'
+
+
+class LedgerEntry(db.Model):
+    __tablename__ = 'wallet_ledger'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    amount = db.Column(db.BigInteger, nullable=False)
+    balance_after = db.Column(db.BigInteger, nullable=False)
+    kind = db.Column(db.String(30), nullable=False)
+    reference = db.Column(db.String(50))
+    created_by = db.Column(db.Integer)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_wallet_ledger_user_id', 'user_id', 'id'),
+    )
+
+    def __repr__(self):
+        return f'<LedgerEntry {self.user_id}: {self.amount:+d} ({self.kind})>'
+
+
+class BankTransaction(db.Model):
+    __tablename__ = 'bank_transactions'
+
+    id = db.Column(db.Integer, primary_key=True)
+    transaction_id = db.Column(db.String(64), unique=True, nullable=False)
+    user_id = db.Column(db.Integer, nullable=False, index=True)
+    amount = db.Column(db.BigInteger, nullable=False)
+    reference = db.Column(db.String(255))
+    paid_on = db.Column(db.Date)
+    statement = db.Column(db.String(255))
+    imported_by = db.Column(db.Integer)
+    imported_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f'<BankTransaction {self.transaction_id}: {self.amount}>'
+
+
+class CacheVersion(db.Model):
+    __tablename__ = 'cache_versions'
+
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
     def __repr__(self):
-        return f'<Notification {self.title}>'
\ No newline at end of file
+        return f'<CacheVersion {self.name}: {self.version}>'
@@ -0,0 +1,110 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app, has_app_context
+from werkzeug.security import generate_password_hash, check_password_hash
+
+DEFAULT_HASH_METHOD = 'scrypt'
+DEFAULT_POOL_SIZE = os.cpu_count() or 1
+DEFAULT_QUEUE_LIMIT = DEFAULT_POOL_SIZE * 8
+DEFAULT_QUEUE_TIMEOUT = 10
+
+
+class PasswordPoolBusy(Exception):
+    pass
+
+
+def _setting(name, default):
+    if has_app_context():
+        return current_app.config.get(name, default)
+    return default
+
+
+class PasswordPool:
+    def __init__(self, size, queue_limit):
+        self.size = size
+        self.queue_limit = queue_limit
+        self._slots = threading.BoundedSemaphore(queue_limit)
+        self._executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix='password') if size else None
+
+    def run(self, func, *args, timeout=DEFAULT_QUEUE_TIMEOUT):
+        if self._executor is None:
+            return func(*args)
+
+        if not self._slots.acquire(timeout=timeout):
+            raise PasswordPoolBusy()
+        try:
+            return self._executor.submit(func, *args).result()
+        finally:
+            self._slots.release()
+
+    def map(self, func, items, timeout=DEFAULT_QUEUE_TIMEOUT):
+        if self._executor is None:
+            return [func(*args) for args in items]
+
+        futures = []
+        try:
+            for args in items:
+                if not self._slots.acquire(timeout=timeout):
+                    raise PasswordPoolBusy()
+                future = self._executor.submit(func, *args)
+                future.add_done_callback(lambda _: self._slots.release())
+                futures.append(future)
+            return [future.result() for future in futures]
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+_method_prefixes = {}
+
+
+def get_pool():
+    global _pool
+    size = _setting('PASSWORD_POOL_SIZE', DEFAULT_POOL_SIZE)
+    queue_limit = _setting('PASSWORD_QUEUE_LIMIT', DEFAULT_QUEUE_LIMIT)
+
+    with _pool_lock:
+        if _pool is None or (_pool.size, _pool.queue_limit) != (size, queue_limit):
+            if _pool is not None:
+                _pool.shutdown()
+            _pool = PasswordPool(size, queue_limit)
+        return _pool
+
+
+def hash_method():
+    return _setting('PASSWORD_HASH_METHOD', DEFAULT_HASH_METHOD)
+
+
+def _method_prefix(method):
+    if method not in _method_prefixes:
+        _method_prefixes[method] = generate_password_hash('', method=method).split('$', 1)[0]
+    return _method_prefixes[method]
+
+
+def hash_password(password):
+    timeout = _setting('PASSWORD_QUEUE_TIMEOUT', DEFAULT_QUEUE_TIMEOUT)
+    return get_pool().run(generate_password_hash, password, hash_method(), timeout=timeout)
+
+
+def hash_passwords(passwords):
+    timeout = _setting('PASSWORD_QUEUE_TIMEOUT', DEFAULT_QUEUE_TIMEOUT)
+    method = hash_method()
+    return get_pool().map(generate_password_hash, [(password, method) for password in passwords], timeout=timeout)
+
+
+def verify_password(password_hash, password):
+    timeout = _setting('PASSWORD_QUEUE_TIMEOUT', DEFAULT_QUEUE_TIMEOUT)
+    return get_pool().run(check_password_hash, password_hash, password, timeout=timeout)
+
+
+def needs_rehash(password_hash):
+    return password_hash.split('$', 1)[0] != _method_prefix(hash_method())
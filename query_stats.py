@@ -0,0 +1,140 @@
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from flask import current_app, g, request
+from sqlalchemy import event
+
+from models import db
+
+COUNT_HEADER = 'X-Query-Count'
+TIME_HEADER = 'X-Query-Time'
+N_PLUS_ONE_HEADER = 'X-Query-N-Plus-One'
+DEFAULT_N_PLUS_ONE_THRESHOLD = 5
+
+_local = threading.local()
+_engines = set()
+
+
+class QueryStats:
+    def __init__(self, n_plus_one_threshold=DEFAULT_N_PLUS_ONE_THRESHOLD):
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = defaultdict(lambda: [0, 0.0, set()])
+
+    def record(self, statement, parameters, seconds, executemany):
+        self.count += 1
+        self.seconds += seconds
+        entry = self.statements[statement]
+        entry[0] += 1
+        entry[1] += seconds
+        if not executemany:
+            entry[2].add(repr(parameters))
+
+    def n_plus_one(self):
+        suspects = [
+            (statement, executions, seconds)
+            for statement, (executions, seconds, parameters) in self.statements.items()
+            if len(parameters) >= self.n_plus_one_threshold
+        ]
+        return sorted(suspects, key=lambda s: s[1], reverse=True)
+
+    def summary(self, limit=3):
+        lines = [f'{self.count} запросов за {self.seconds * 1000:.1f} мс']
+        for statement, executions, seconds in self.n_plus_one()[:limit]:
+            lines.append(f'  N+1 ×{executions} ({seconds * 1000:.1f} мс): {" ".join(statement.split())[:200]}')
+        return '\n'.join(lines)
+
+
+def _collectors():
+    if not hasattr(_local, 'collectors'):
+        _local.collectors = []
+    return _local.collectors
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _collectors():
+        context.query_stats_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    collectors = _collectors()
+    started = getattr(context, 'query_stats_started', None)
+    if not collectors or started is None:
+        return
+    seconds = time.perf_counter() - started
+    for stats in collectors:
+        stats.record(statement, parameters, seconds, executemany)
+
+
+def instrument(engine):
+    if engine in _engines:
+        return
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    _engines.add(engine)
+
+
+@contextmanager
+def collect(n_plus_one_threshold=DEFAULT_N_PLUS_ONE_THRESHOLD):
+    stats = QueryStats(n_plus_one_threshold)
+    collectors = _collectors()
+    collectors.append(stats)
+    try:
+        yield stats
+    finally:
+        collectors.remove(stats)
+
+
+@contextmanager
+def assert_max_queries(limit, allow_n_plus_one=True):
+    with collect() as stats:
+        yield stats
+    if stats.count > limit:
+        raise AssertionError(f'Ожидалось не больше {limit} запросов, выполнено {stats.summary()}')
+    if not allow_n_plus_one and stats.n_plus_one():
+        raise AssertionError(f'Обнаружен N+1: {stats.summary()}')
+
+
+def _start_request():
+    stats = QueryStats(current_app.config['QUERY_STATS_N_PLUS_ONE'])
+    _collectors().append(stats)
+    g.query_stats = stats
+
+
+def _finish_request(response):
+    stats = g.get('query_stats')
+    if stats is None:
+        return response
+
+    if current_app.config['QUERY_STATS_HEADERS']:
+        response.headers[COUNT_HEADER] = str(stats.count)
+        response.headers[TIME_HEADER] = f'{stats.seconds * 1000:.1f}'
+        response.headers[N_PLUS_ONE_HEADER] = str(len(stats.n_plus_one()))
+        response.headers.add('Server-Timing', f'db;dur={stats.seconds * 1000:.1f};desc="{stats.count} queries"')
+
+    if current_app.config['QUERY_STATS_LOG'] and (
+            stats.n_plus_one() or stats.count > current_app.config['QUERY_STATS_LOG_THRESHOLD']):
+        current_app.logger.warning(f'{request.method} {request.path} ({request.endpoint}): {stats.summary()}')
+    return response
+
+
+def _teardown_request(exc):
+    stats = g.pop('query_stats', None)
+    if stats is not None and stats in _collectors():
+        _collectors().remove(stats)
+
+
+def init_query_stats(app):
+    if not app.config['QUERY_STATS_ENABLED']:
+        return
+
+    with app.app_context():
+        for engine in db.engines.values():
+            instrument(engine)
+
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.teardown_request(_teardown_request)
@@ -6,7 +6,8 @@ from pathlib import Path
 current_dir = Path(__file__).parent
 sys.path.append(str(current_dir))
 
-from app import app, db
+from application import create_app, init_database
+from models import db
 
 
 def main():
@@ -14,6 +15,7 @@ def main():
     print("ПОЛНОЕ ПЕРЕСОЗДАНИЕ БАЗЫ ДАННЫХ ШКОЛЬНОГО ПИТАНИЯ")
     print("=" * 60)
 
+    app = create_app(register_views=False)
     with app.app_context():
         db_file = current_dir / 'school_food.db'
         if db_file.exists():
@@ -29,9 +31,8 @@ def main():
         print("🆕 Создаем новые таблицы...")
         db.create_all()
 
-        from app import create_tables
         print("\n📊 Заполняем начальными данными...")
-        create_tables()
+        init_database(app)
 
         print("\n" + "=" * 60)
         print("✅ БАЗА ДАННЫХ УСПЕШНО ПЕРЕСОЗДАНА!")
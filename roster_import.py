@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+
+from email_validator import validate_email, EmailNotValidError
+from sqlalchemy import insert, or_
+from werkzeug.security import generate_password_hash
+
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir))
+
+from models import db, User
+from passwords import hash_method, hash_passwords
+
+ROLES = ('ученик', 'повар', 'администратор')
+REQUIRED_FIELDS = ('username', 'email', 'password')
+MIN_PASSWORD_LENGTH = 6
+
+
+def parse_roster(stream, fmt='csv'):
+    if isinstance(stream, bytes):
+        stream = stream.decode('utf-8-sig')
+    if isinstance(stream, str):
+        stream = io.StringIO(stream)
+
+    if fmt == 'json':
+        data = json.load(stream)
+        if isinstance(data, dict):
+            data = data.get('users', [])
+        if not isinstance(data, list) or not all(isinstance(row, dict) for row in data):
+            raise ValueError('Ожидается список пользователей')
+        return [(index, row) for index, row in enumerate(data, start=1)]
+
+    sample = stream.read(4096)
+    stream.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.DictReader(stream, dialect=dialect)
+    return [(reader.line_num, row) for row in reader]
+
+
+def _validate_rows(rows):
+    valid = []
+    errors = []
+    seen_usernames = set()
+    seen_emails = set()
+
+    for line, row in rows:
+        record = {
+            key.strip().lower(): str(value).strip() if value is not None else ''
+            for key, value in row.items() if key
+        }
+
+        missing = [field for field in REQUIRED_FIELDS if not record.get(field)]
+        if missing:
+            errors.append({'line': line, 'error': f'Не заполнены поля: {", ".join(missing)}'})
+            continue
+
+        if len(record['password']) < MIN_PASSWORD_LENGTH:
+            errors.append({'line': line, 'error': f'Пароль короче {MIN_PASSWORD_LENGTH} символов'})
+            continue
+
+        role = record.get('role') or 'ученик'
+        if role not in ROLES:
+            errors.append({'line': line, 'error': f'Неизвестная роль: {role}'})
+            continue
+
+        try:
+            email = validate_email(record['email'], check_deliverability=False).normalized
+        except EmailNotValidError:
+            errors.append({'line': line, 'error': f'Некорректный email: {record["email"]}'})
+            continue
+
+        username = record['username']
+        if username in seen_usernames:
+            errors.append({'line': line, 'error': f'Имя {username} повторяется в файле'})
+            continue
+        if email in seen_emails:
+            errors.append({'line': line, 'error': f'Email {email} повторяется в файле'})
+            continue
+
+        seen_usernames.add(username)
+        seen_emails.add(email)
+        valid.append({
+            'line': line,
+            'username': username,
+            'email': email,
+            'password': record['password'],
+            'role': role,
+            'grade': record.get('grade', '')
+        })
+
+    return valid, errors
+
+
+def _filter_existing(records, errors):
+    if not records:
+        return records
+
+    usernames = [r['username'] for r in records]
+    emails = [r['email'] for r in records]
+    existing = db.session.query(User.username, User.email).filter(
+        or_(User.username.in_(usernames), User.email.in_(emails))
+    ).all()
+
+    taken_usernames = {row.username for row in existing}
+    taken_emails = {row.email for row in existing}
+
+    fresh = []
+    for record in records:
+        if record['username'] in taken_usernames:
+            errors.append({'line': record['line'], 'error': f'Пользователь {record["username"]} уже существует'})
+        elif record['email'] in taken_emails:
+            errors.append({'line': record['line'], 'error': f'Email {record["email"]} уже зарегистрирован'})
+        else:
+            fresh.append(record)
+    return fresh
+
+
+def _hash_passwords(passwords, workers=None, processes=False):
+    if not processes:
+        return hash_passwords(passwords)
+
+    hasher = partial(generate_password_hash, method=hash_method())
+    if len(passwords) < 2 or workers == 1:
+        return [hasher(password) for password in passwords]
+
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(passwords) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(hasher, passwords, chunksize=chunksize))
+
+
+def import_roster(rows, workers=None, dry_run=False, processes=False):
+    started = time.perf_counter()
+
+    records, errors = _validate_rows(rows)
+    records = _filter_existing(records, errors)
+
+    hash_started = time.perf_counter()
+    hashes = _hash_passwords([r['password'] for r in records], workers, processes) if not dry_run else []
+    hash_seconds = time.perf_counter() - hash_started
+
+    if records and not dry_run:
+        db.session.execute(insert(User), [
+            {
+                'username': record['username'],
+                'email': record['email'],
+                'password_hash': password_hash,
+                'role': record['role'],
+                'grade': record['grade']
+            }
+            for record, password_hash in zip(records, hashes)
+        ])
+        db.session.commit()
+
+    total_seconds = time.perf_counter() - started
+    errors.sort(key=lambda e: e['line'])
+
+    return {
+        'total': len(rows),
+        'imported': 0 if dry_run else len(records),
+        'valid': len(records),
+        'errors': errors,
+        'dry_run': dry_run,
+        'seconds': round(total_seconds, 3),
+        'hash_seconds': round(hash_seconds, 3),
+        'rows_per_second': round(len(rows) / total_seconds, 1) if total_seconds else 0.0,
+        'hashes_per_second': round(len(hashes) / hash_seconds, 1) if hashes and hash_seconds else 0.0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Импорт списка учеников из CSV или JSON')
+    parser.add_argument('path')
+    parser.add_argument('--format', choices=['csv', 'json'])
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--dry-run', action='store_true')
+    args = parser.parse_args()
+
+    fmt = args.format or ('json' if args.path.lower().endswith('.json') else 'csv')
+    with open(args.path, encoding='utf-8-sig', newline='') as f:
+        rows = parse_roster(f, fmt)
+
+    from application import create_app
+
+    app = create_app(register_views=False)
+
+    with app.app_context():
+        report = import_roster(rows, workers=args.workers, dry_run=args.dry_run, processes=True)
+
+    print("=" * 60)
+    print("ИМПОРТ СПИСКА ПОЛЬЗОВАТЕЛЕЙ")
+    print("=" * 60)
+    print(f"📄 Строк в файле: {report['total']}")
+    print(f"✅ {'Готово к импорту' if report['dry_run'] else 'Импортировано'}: {report['valid']}")
+    print(f"❌ Ошибок: {len(report['errors'])}")
+    print(f"⏱️  Время: {report['seconds']} с ({report['rows_per_second']} строк/с, "
+          f"хеширование {report['hashes_per_second']} паролей/с)")
+    for error in report['errors']:
+        print(f"  • строка {error['line']}: {error['error']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+import logging
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, g, has_app_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import text
+
+READ_ONLY_BIND = 'readonly'
+DEFAULT_REPLICA_MAX_LAG = 5
+LAG_CHECK_INTERVAL = 5
+
+logger = logging.getLogger('routing')
+
+_lag_cache = {}
+_lag_lock = threading.Lock()
+
+
+def read_replica_url(primary_url, replica_url=None):
+    if replica_url:
+        return replica_url
+    if primary_url.startswith('sqlite:///') and ':memory:' not in primary_url:
+        path = primary_url[len('sqlite:///'):]
+        if not path.startswith('file:'):
+            return f'sqlite:///file:{path}?mode=ro&uri=true'
+    return None
+
+
+def read_only(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        g.read_only = True
+        return f(*args, **kwargs)
+
+    return decorated_function
+
+
+def replica_lag(engine):
+    if engine.dialect.name != 'postgresql':
+        return 0.0
+
+    now = time.monotonic()
+    with _lag_lock:
+        entry = _lag_cache.get(engine)
+    if entry and entry[0] > now:
+        return entry[1]
+
+    try:
+        with engine.connect() as conn:
+            lag = conn.execute(text(
+                'SELECT CASE WHEN pg_is_in_recovery() '
+                'THEN EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) ELSE 0 END'
+            )).scalar()
+        lag = float(lag or 0.0)
+    except Exception:
+        logger.exception('Could not measure replica lag')
+        lag = float('inf')
+
+    with _lag_lock:
+        _lag_cache[engine] = (now + LAG_CHECK_INTERVAL, lag)
+    return lag
+
+
+def _writes(clause):
+    if clause is None:
+        return False
+    return getattr(clause, 'is_dml', False) or getattr(clause, '_for_update_arg', None) is not None
+
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and not _writes(clause) \
+                and has_app_context() and g.get('read_only'):
+            replica = self._db.engines.get(READ_ONLY_BIND)
+            if replica is not None:
+                max_lag = current_app.config.get('READ_REPLICA_MAX_LAG', DEFAULT_REPLICA_MAX_LAG)
+                lag = replica_lag(replica)
+                if lag <= max_lag:
+                    return replica
+                logger.warning(f'Replica lag {lag:.1f}s exceeds {max_lag}s, reading from primary')
+
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+import argparse
+import importlib
+import json
+import logging
+import os
+import socket
+import sys
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import insert, update, or_
+from sqlalchemy.exc import IntegrityError
+
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir))
+
+from models import db, JobLock, JobRun
+
+DEFAULT_LOCK_TIMEOUT = 600
+
+logger = logging.getLogger('scheduler')
+
+
+class CronSchedule:
+    RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+
+    def __init__(self, expression):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f'Cron expression must have 5 fields: {expression!r}')
+
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, weekdays = [
+            self._parse_field(field, low, high) for field, (low, high) in zip(fields, self.RANGES)
+        ]
+        self.weekdays = {value % 7 for value in weekdays}
+        self.any_day = fields[2] == '*'
+        self.any_weekday = fields[4] == '*'
+
+    @staticmethod
+    def _parse_field(field, low, high):
+        values = set()
+        for part in field.split(','):
+            step = 1
+            if '/' in part:
+                part, step = part.split('/')
+                step = int(step)
+
+            if part == '*':
+                start, end = low, high
+            elif '-' in part:
+                start, end = map(int, part.split('-'))
+            else:
+                start = int(part)
+                end = high if step > 1 else start
+
+            if start < low or end > high or start > end:
+                raise ValueError(f'Value out of range in cron field {field!r}')
+            values.update(range(start, end + 1, step))
+
+        return values
+
+    def matches(self, moment):
+        if moment.minute not in self.minutes or moment.hour not in self.hours or moment.month not in self.months:
+            return False
+
+        day_ok = moment.day in self.days
+        weekday_ok = (moment.weekday() + 1) % 7 in self.weekdays
+        if self.any_day or self.any_weekday:
+            return day_ok and weekday_ok
+        return day_ok or weekday_ok
+
+    def next_after(self, moment):
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        for _ in range(366 * 24 * 60):
+            if self.matches(candidate):
+                return candidate
+            candidate += timedelta(minutes=1)
+        return None
+
+    def __repr__(self):
+        return f'<CronSchedule {self.expression}>'
+
+
+class Job:
+    def __init__(self, name, target, schedule, lock_timeout=DEFAULT_LOCK_TIMEOUT):
+        self.name = name
+        self.target = target
+        self.schedule = CronSchedule(schedule)
+        self.lock_timeout = lock_timeout
+
+    @property
+    def func(self):
+        module_name, func_name = self.target.split(':')
+        return getattr(importlib.import_module(module_name), func_name)
+
+    def __repr__(self):
+        return f'<Job {self.name}: {self.schedule.expression}>'
+
+
+jobs = {}
+
+
+def register_job(name, target, schedule, lock_timeout=DEFAULT_LOCK_TIMEOUT):
+    jobs[name] = Job(name, target, schedule, lock_timeout)
+    return jobs[name]
+
+
+register_job('expire_subscriptions', 'maintenance:deactivate_expired_subscriptions', '5 0 * * *')
+register_job('reset_weekly_subscriptions', 'maintenance:reset_weekly_usage_if_due', '10 0 * * *')
+register_job('cleanup_notifications', 'maintenance:cleanup_read_notifications', '30 3 * * *')
+
+
+def worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}'
+
+
+def acquire_lock(job_obj, owner, scheduled_for=None):
+    now = datetime.utcnow()
+    values = {'locked_by': owner, 'locked_until': now + timedelta(seconds=job_obj.lock_timeout)}
+    if scheduled_for:
+        values['last_scheduled_for'] = scheduled_for
+
+    try:
+        db.session.execute(insert(JobLock).values(name=job_obj.name, **values))
+        db.session.commit()
+        return True
+    except IntegrityError:
+        db.session.rollback()
+
+    conditions = [
+        JobLock.name == job_obj.name,
+        or_(JobLock.locked_until == None, JobLock.locked_until < now)
+    ]
+    if scheduled_for:
+        conditions.append(or_(JobLock.last_scheduled_for == None, JobLock.last_scheduled_for < scheduled_for))
+
+    result = db.session.execute(update(JobLock).where(*conditions).values(**values))
+    db.session.commit()
+    return result.rowcount == 1
+
+
+def release_lock(job_obj, owner):
+    db.session.execute(
+        update(JobLock)
+        .where(JobLock.name == job_obj.name, JobLock.locked_by == owner)
+        .values(locked_until=None)
+    )
+    db.session.commit()
+
+
+def run_job(app, name, trigger='manual', scheduled_for=None):
+    job_obj = jobs.get(name)
+    if job_obj is None:
+        raise KeyError(f'Unknown job: {name}')
+
+    owner = worker_id()
+
+    with app.app_context():
+        if not acquire_lock(job_obj, owner, scheduled_for):
+            logger.info(f'Job {name} is locked by another worker, skipping')
+            return None
+
+        run = JobRun(job_name=name, trigger=trigger, worker=owner, status='running')
+        db.session.add(run)
+        db.session.commit()
+
+        started = time.perf_counter()
+        try:
+            result = job_obj.func()
+            run.status = 'success'
+            run.result = json.dumps(result, ensure_ascii=False, default=str)
+        except Exception:
+            db.session.rollback()
+            run.status = 'error'
+            run.error = traceback.format_exc()
+            logger.exception(f'Job {name} failed')
+        finally:
+            run.finished_at = datetime.utcnow()
+            run.duration_ms = (time.perf_counter() - started) * 1000
+            db.session.commit()
+            release_lock(job_obj, owner)
+
+        logger.info(f'Job {name} finished with status {run.status} in {run.duration_ms:.1f} ms')
+        return run.status
+
+
+class Scheduler:
+    def __init__(self, app):
+        self.app = app
+        self._stop = threading.Event()
+        self._thread = None
+
+    def run_pending(self, moment):
+        slot = moment.replace(second=0, microsecond=0)
+        for name, job_obj in list(jobs.items()):
+            if job_obj.schedule.matches(slot):
+                try:
+                    run_job(self.app, name, trigger='schedule', scheduled_for=slot)
+                except Exception:
+                    logger.exception(f'Scheduler failed to run job {name}')
+
+    def run_forever(self):
+        logger.info(f'Scheduler started with jobs: {", ".join(sorted(jobs))}')
+        while not self._stop.is_set():
+            now = datetime.now()
+            self.run_pending(now)
+            next_minute = now.replace(second=0, microsecond=0) + timedelta(minutes=1)
+            self._stop.wait(max(0.0, (next_minute - datetime.now()).total_seconds()))
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self.run_forever, name='scheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+
+_scheduler = None
+
+
+def start_scheduler(app):
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = Scheduler(app)
+    _scheduler.start()
+    return _scheduler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Планировщик фоновых задач школьного питания')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('worker', help='запустить планировщик как отдельный процесс')
+    subparsers.add_parser('list', help='показать зарегистрированные задачи')
+    run_parser = subparsers.add_parser('run', help='запустить задачу немедленно')
+    run_parser.add_argument('job')
+    history_parser = subparsers.add_parser('history', help='показать историю запусков')
+    history_parser.add_argument('--job')
+    history_parser.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s: %(message)s')
+
+    from application import create_app
+
+    app = create_app(register_views=False)
+
+    with app.app_context():
+        db.create_all()
+
+    if args.command == 'worker':
+        try:
+            Scheduler(app).run_forever()
+        except KeyboardInterrupt:
+            print("\n⏹️  Планировщик остановлен")
+
+    elif args.command == 'list':
+        now = datetime.now()
+        for name, job_obj in sorted(jobs.items()):
+            print(f"  • {name:<32} {job_obj.schedule.expression:<16} "
+                  f"следующий запуск: {job_obj.schedule.next_after(now):%d.%m.%Y %H:%M}")
+
+    elif args.command == 'run':
+        if args.job not in jobs:
+            print(f"❌ Неизвестная задача: {args.job}")
+            sys.exit(1)
+        status = run_job(app, args.job)
+        if status is None:
+            print(f"⚠️  Задача {args.job} уже выполняется другим процессом")
+            sys.exit(1)
+        print(f"{'✅' if status == 'success' else '❌'} Задача {args.job}: {status}")
+        sys.exit(0 if status == 'success' else 1)
+
+    elif args.command == 'history':
+        with app.app_context():
+            query = JobRun.query
+            if args.job:
+                query = query.filter(JobRun.job_name == args.job)
+            for run in query.order_by(JobRun.started_at.desc()).limit(args.limit):
+                duration = f'{run.duration_ms:.1f} ms' if run.duration_ms is not None else '—'
+                print(f"  {run.started_at:%d.%m.%Y %H:%M:%S}  {run.job_name:<32} {run.status:<8} "
+                      f"{duration:>12}  {run.trigger}  {run.result or ''}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+import argparse
+import csv
+import io
+import re
+import sys
+import time
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from pathlib import Path
+
+from sqlalchemy import func, insert
+from sqlalchemy.exc import IntegrityError
+
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir))
+
+from models import db, User, BankTransaction
+from wallet import credit_many, reconcile, to_kopecks, to_rubles, BANK_TOP_UP
+
+CHUNK_SIZE = 500
+MAX_REPORTED_ERRORS = 200
+COLUMNS = {
+    'transaction_id': ('transaction_id', 'id', 'номер', 'номер операции'),
+    'amount': ('amount', 'сумма', 'сумма зачисления'),
+    'reference': ('reference', 'purpose', 'назначение', 'назначение платежа'),
+    'date': ('date', 'дата', 'дата операции'),
+}
+REQUIRED_COLUMNS = ('transaction_id', 'amount', 'reference')
+DATE_FORMATS = ('%d.%m.%Y', '%Y-%m-%d', '%d/%m/%Y')
+EMAIL_RE = re.compile(r'[\w.+-]+@[\w-]+(?:\.[\w-]+)+')
+LOGIN_RE = re.compile(r'(?:login|логин)\s*:\s*([\w.@+-]+)', re.IGNORECASE)
+LOOKUP_BATCH = 500
+
+
+def open_statement(stream):
+    if isinstance(stream, bytes):
+        stream = io.BytesIO(stream)
+    if isinstance(stream, io.TextIOBase):
+        return stream
+    return io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+
+
+def _column_map(header):
+    names = [name.strip().lower() for name in header]
+    columns = {}
+    for field, aliases in COLUMNS.items():
+        for alias in aliases:
+            if alias in names:
+                columns[field] = names.index(alias)
+                break
+
+    missing = [field for field in REQUIRED_COLUMNS if field not in columns]
+    if missing:
+        raise ValueError(f'В выписке нет колонок: {", ".join(missing)}')
+    return columns
+
+
+def _parse_amount(value):
+    cleaned = value.replace('\xa0', '').replace(' ', '').replace(',', '.')
+    try:
+        kopecks = to_kopecks(Decimal(cleaned))
+    except InvalidOperation:
+        raise ValueError(f'Некорректная сумма: {value}')
+    if kopecks <= 0:
+        raise ValueError(f'Сумма должна быть положительной: {value}')
+    return kopecks
+
+
+def _parse_date(value):
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value.strip(), fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def iter_statement(stream, chunk_size=CHUNK_SIZE):
+    stream = open_statement(stream)
+    sample = stream.read(4096)
+    stream.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+    except csv.Error:
+        dialect = csv.excel
+
+    reader = csv.reader(stream, dialect=dialect)
+    header = next(reader, None)
+    if header is None:
+        return
+    columns = _column_map(header)
+
+    def records():
+        for row in reader:
+            if not any(cell.strip() for cell in row):
+                continue
+            yield reader.line_num, {
+                field: row[index].strip() if index < len(row) else ''
+                for field, index in columns.items()
+            }
+
+    rows = records()
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _explicit_references(reference):
+    logins = set(LOGIN_RE.findall(reference))
+    emails = {email.lower() for email in EMAIL_RE.findall(reference)}
+    return logins, emails
+
+
+def _match_users(references):
+    logins, emails = set(), set()
+    for reference in references:
+        found_logins, found_emails = _explicit_references(reference)
+        logins |= found_logins
+        emails |= found_emails
+
+    matches = {'login': {}, 'email': {}}
+    for field, values in (('login', sorted(logins)), ('email', sorted(emails))):
+        column = User.username if field == 'login' else func.lower(User.email)
+        for start in range(0, len(values), LOOKUP_BATCH):
+            for user_id, key in db.session.query(User.id, column).filter(
+                User.role == 'ученик',
+                column.in_(values[start:start + LOOKUP_BATCH])
+            ):
+                matches[field][key] = user_id
+    return matches
+
+
+def _find_user(reference, matches):
+    logins, emails = _explicit_references(reference)
+    candidates = {matches['login'][login] for login in logins if login in matches['login']}
+    candidates |= {matches['email'][email] for email in emails if email in matches['email']}
+    if len(candidates) != 1:
+        return None, len(candidates)
+    return candidates.pop(), 1
+
+
+def _add_error(report, line, error):
+    report['error_count'] += 1
+    if len(report['errors']) < MAX_REPORTED_ERRORS:
+        report['errors'].append({'line': line, 'error': error})
+
+
+def _process_chunk(chunk, report, seen, statement, imported_by, dry_run):
+    parsed = {}
+    for line, record in chunk:
+        transaction_id = record['transaction_id']
+        if not transaction_id:
+            _add_error(report, line, 'Не указан номер операции')
+            continue
+        try:
+            kopecks = _parse_amount(record['amount'])
+        except ValueError as e:
+            _add_error(report, line, str(e))
+            continue
+        if transaction_id in parsed or transaction_id in seen:
+            report['duplicates'] += 1
+            continue
+        parsed[transaction_id] = (line, record, kopecks)
+
+    if not parsed:
+        return
+
+    existing = {
+        row.transaction_id for row in db.session.query(BankTransaction.transaction_id).filter(
+            BankTransaction.transaction_id.in_(list(parsed))
+        )
+    }
+    report['already_imported'] += len(existing)
+
+    matches = _match_users(record['reference'] for _, record, _ in parsed.values())
+    transactions = []
+    credits = {}
+    for transaction_id, (line, record, kopecks) in parsed.items():
+        if transaction_id in existing:
+            continue
+        user_id, candidates = _find_user(record['reference'], matches)
+        if user_id is None:
+            report['unmatched'] += 1
+            report['unmatched_kopecks'] += kopecks
+            if candidates:
+                _add_error(report, line, f'Назначение платежа указывает на нескольких учеников: {record["reference"]}')
+            else:
+                _add_error(report, line, f'Не найден ученик по назначению платежа: {record["reference"]}')
+            continue
+
+        transactions.append({
+            'transaction_id': transaction_id,
+            'user_id': user_id,
+            'amount': kopecks,
+            'reference': record['reference'][:255],
+            'paid_on': _parse_date(record.get('date', '')),
+            'statement': statement,
+            'imported_by': imported_by
+        })
+        credits.setdefault(user_id, []).append((kopecks, f'bank:{transaction_id}'[:50]))
+
+    if dry_run:
+        seen.update(parsed.keys())
+    elif transactions:
+        db.session.execute(insert(BankTransaction), transactions)
+        credit_many(credits, BANK_TOP_UP, created_by=imported_by)
+        db.session.commit()
+
+    report['imported'] += len(transactions)
+    report['credited_kopecks'] += sum(t['amount'] for t in transactions)
+    report['users'].update(credits.keys())
+
+
+def import_statement(stream, statement=None, imported_by=None, dry_run=False, chunk_size=CHUNK_SIZE):
+    started = time.perf_counter()
+    report = {
+        'rows': 0,
+        'imported': 0,
+        'duplicates': 0,
+        'already_imported': 0,
+        'unmatched': 0,
+        'unmatched_kopecks': 0,
+        'credited_kopecks': 0,
+        'error_count': 0,
+        'errors': [],
+        'users': set(),
+        'dry_run': dry_run
+    }
+    seen = set()
+
+    for chunk in iter_statement(stream, chunk_size):
+        report['rows'] += len(chunk)
+        snapshot = {key: value.copy() if isinstance(value, (list, set)) else value for key, value in report.items()}
+        try:
+            _process_chunk(chunk, report, seen, statement, imported_by, dry_run)
+        except IntegrityError:
+            db.session.rollback()
+            report.update(snapshot)
+            _process_chunk(chunk, report, seen, statement, imported_by, dry_run)
+
+    mismatches = reconcile(list(report['users'])) if report['users'] and not dry_run else []
+    seconds = time.perf_counter() - started
+
+    report.update({
+        'users': len(report['users']),
+        'mismatches': mismatches,
+        'reconciled': not mismatches,
+        'credited': to_rubles(report['credited_kopecks']),
+        'unmatched_amount': to_rubles(report['unmatched_kopecks']),
+        'seconds': round(seconds, 3),
+        'rows_per_second': round(report['rows'] / seconds, 1) if seconds else 0.0
+    })
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Зачисление родительских платежей из банковской выписки (CSV)')
+    parser.add_argument('path')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--dry-run', action='store_true')
+    args = parser.parse_args()
+
+    from application import create_app
+
+    app = create_app(register_views=False)
+
+    with app.app_context(), open(args.path, 'rb') as f:
+        report = import_statement(f, statement=Path(args.path).name, dry_run=args.dry_run,
+                                  chunk_size=args.chunk_size)
+
+    print("=" * 60)
+    print("ИМПОРТ БАНКОВСКОЙ ВЫПИСКИ")
+    print("=" * 60)
+    print(f"📄 Строк в выписке: {report['rows']}")
+    print(f"✅ {'Готово к зачислению' if report['dry_run'] else 'Зачислено'}: {report['imported']} "
+          f"платежей на {report['credited']:.2f} ₽ ({report['users']} учеников)")
+    print(f"🔁 Уже были импортированы: {report['already_imported']}, повторы в файле: {report['duplicates']}")
+    print(f"❓ Не найден ученик: {report['unmatched']} на {report['unmatched_amount']:.2f} ₽")
+    print(f"❌ Ошибок: {report['error_count']}")
+    print(f"⏱️  Время: {report['seconds']} с ({report['rows_per_second']} строк/с)")
+    if report['reconciled']:
+        print("✅ Сверка балансов с журналом: сходится")
+    else:
+        print(f"❌ Сверка балансов с журналом: расхождений {len(report['mismatches'])}")
+    for error in report['errors']:
+        print(f"  • строка {error['line']}: {error['error']}")
+
+    if not report['reconciled']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
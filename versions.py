@@ -0,0 +1,126 @@
+import logging
+from datetime import datetime
+from itertools import chain
+
+from flask import current_app, g, has_app_context, has_request_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, insert, inspect, select, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+
+from models import db, CacheVersion, Meal, PreparedMeal, Inventory, MealIngredient, Notification
+
+MENU = 'menu'
+INGREDIENTS = 'ingredients'
+NOTIFICATIONS = 'notifications'
+
+TRACKED_MODELS = {
+    Meal: (MENU, INGREDIENTS),
+    PreparedMeal: (MENU,),
+    Inventory: (INGREDIENTS,),
+    MealIngredient: (INGREDIENTS,),
+}
+UPSERTS = {'sqlite': sqlite_insert, 'postgresql': postgresql_insert}
+
+logger = logging.getLogger('versions')
+
+
+def user_scope(name, user_id):
+    return f'{name}:{user_id}'
+
+
+def changed_versions(obj):
+    if isinstance(obj, Notification):
+        user_id = inspect(obj).dict.get('user_id')
+        return (user_scope(NOTIFICATIONS, user_id),) if user_id is not None else (NOTIFICATIONS,)
+    return TRACKED_MODELS.get(type(obj), ())
+
+
+def current_versions(*names):
+    known = g.setdefault('cache_versions', {}) if has_request_context() else {}
+    missing = [name for name in names if name not in known]
+    if missing:
+        rows = db.session.query(CacheVersion.name, CacheVersion.version, CacheVersion.updated_at).filter(
+            CacheVersion.name.in_(missing)
+        )
+        found = {row.name: (row.version, row.updated_at) for row in rows}
+        for name in missing:
+            known[name] = found.get(name, (0, None))
+    return {name: known[name] for name in names}
+
+
+def current_version(name):
+    return current_versions(name)[name][0]
+
+
+def bump_version(conn, *names):
+    table = CacheVersion.__table__
+    now = datetime.utcnow()
+    rows = [{'name': name, 'version': 1, 'updated_at': now} for name in sorted(set(names))]
+
+    upsert = UPSERTS.get(conn.dialect.name)
+    if upsert is not None:
+        statement = upsert(table).values(rows)
+        conn.execute(statement.on_conflict_do_update(
+            index_elements=[table.c.name], set_={'version': table.c.version + 1, 'updated_at': now}
+        ))
+        return
+
+    result = conn.execute(
+        update(table).where(table.c.name.in_(names)).values(version=table.c.version + 1, updated_at=now)
+    )
+    if result.rowcount < len(rows):
+        existing = set(conn.execute(select(table.c.name).where(table.c.name.in_(names))).scalars())
+        conn.execute(insert(table), [row for row in rows if row['name'] not in existing])
+
+
+def touch(session, *names):
+    session.info.setdefault('versions_changed', set()).update(names)
+
+
+def _after_flush(session, flush_context):
+    names = set()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        names.update(changed_versions(obj))
+    if names:
+        touch(session, *names)
+
+
+def _after_commit(session):
+    names = session.info.pop('versions_changed', None)
+    if not names:
+        return
+
+    try:
+        _bump_committed(sorted(names))
+    except Exception:
+        logger.exception(f'Не удалось обновить версии {", ".join(sorted(names))}, локальный кэш фрагментов сброшен')
+        cache = current_app.extensions.get('fragment_cache') if has_app_context() else None
+        if cache is not None:
+            cache.clear()
+
+
+def _bump_committed(names):
+    try:
+        with db.engine.begin() as conn:
+            bump_version(conn, *names)
+    except IntegrityError:
+        with db.engine.begin() as conn:
+            bump_version(conn, *names)
+
+
+def _after_rollback(session, previous_transaction):
+    session.info.pop('versions_changed', None)
+
+
+_session_hooks = []
+
+
+def track_changes():
+    if _session_hooks:
+        return
+    for name, hook in (('after_flush', _after_flush), ('after_commit', _after_commit),
+                       ('after_soft_rollback', _after_rollback)):
+        event.listen(Session, name, hook)
+        _session_hooks.append(name)
@@ -0,0 +1,30 @@
+from functools import wraps
+
+from flask import current_app, redirect, url_for, flash, request
+from flask_login import login_required, current_user
+
+
+def role_required(roles):
+    def decorator(f):
+        @wraps(f)
+        @login_required
+        def decorated_function(*args, **kwargs):
+            if not current_user.is_authenticated:
+                flash('Войдите в систему.', 'danger')
+                return redirect(url_for('auth.login'))
+            if current_user.role not in roles:
+                current_app.logger.warning(f'Unauthorized access attempt by user {current_user.id} to {request.endpoint}')
+                flash('У вас нет прав для доступа к этой странице.', 'danger')
+                return redirect(url_for('main.dashboard'))
+            return f(*args, **kwargs)
+
+        return decorated_function
+
+    return decorator
+
+
+def register_blueprints(app):
+    from views import main, auth, student, chef, admin, metrics
+
+    for module in (main, auth, student, chef, admin, metrics):
+        app.register_blueprint(module.bp)
@@ -0,0 +1,793 @@
+import csv
+from datetime import datetime, date, timedelta
+from flask import Blueprint, current_app, render_template, redirect, url_for, flash, request
+from flask_login import login_required, current_user
+from sqlalchemy import func, case, update, insert, select, union_all, literal, or_, and_
+from markupsafe import escape
+
+from models import db, User, Meal, Order, Allergy, Feedback, Inventory, PurchaseRequest, Notification, \
+    PreparedMeal, Subscription, ArchivedOrder, ArchivedUser
+from lifecycle import remove_users, select_users
+from identity import invalidate_identity
+from database import days_between, lock_for_update
+from wallet import set_balance, to_kopecks, to_rubles, BalanceChanged
+from routing import read_only
+from versions import touch, user_scope, INGREDIENTS, NOTIFICATIONS
+from views import role_required
+
+bp = Blueprint('admin', __name__)
+
+
+@bp.route('/admin')
+@login_required
+@role_required(['администратор'])
+@read_only
+def admin_dashboard():
+    today = date.today()
+
+    stats = {
+        'total_users': User.query.count(),
+        'total_orders_today': Order.query.filter(Order.meal_date == today).count(),
+        'total_revenue_today': db.session.query(func.sum(Order.total_price)).filter(
+            Order.meal_date == today,
+            Order.status == 'paid'
+        ).scalar() or 0.0,
+        'pending_requests': PurchaseRequest.query.filter(
+            PurchaseRequest.status == 'на рассмотрении'
+        ).count(),
+        'total_all_orders': Order.query.count(),
+        'active_meals': Meal.query.filter(Meal.is_available == True).count(),
+        'students_count': User.query.filter(User.role == 'ученик').count(),
+        'chefs_count': User.query.filter(User.role == 'повар').count(),
+        'admins_count': User.query.filter(User.role == 'администратор').count()
+    }
+
+    return render_template('admin_dashboard.html', **stats)
+
+
+USER_SORT_COLUMNS = {
+    'id': User.id,
+    'username': User.username,
+    'email': User.email,
+    'role': User.role,
+    'grade': User.grade,
+    'balance': User.balance_kopecks,
+    'created_at': User.created_at
+}
+
+
+def get_user_activity_counts(user_ids):
+    counts = {user_id: {'orders': 0, 'feedbacks': 0, 'allergies': 0} for user_id in user_ids}
+    if not counts:
+        return counts
+
+    activity = union_all(
+        select(Order.user_id.label('user_id'), literal('orders').label('kind')).where(Order.user_id.in_(user_ids)),
+        select(Feedback.user_id, literal('feedbacks')).where(Feedback.user_id.in_(user_ids)),
+        select(Allergy.user_id, literal('allergies')).where(Allergy.user_id.in_(user_ids))
+    ).subquery()
+
+    rows = db.session.query(
+        activity.c.user_id,
+        activity.c.kind,
+        func.count().label('count')
+    ).group_by(activity.c.user_id, activity.c.kind).all()
+
+    for user_id, kind, count in rows:
+        counts[user_id][kind] = count
+    return counts
+
+
+@bp.route('/admin/users')
+@login_required
+@role_required(['администратор'])
+def admin_users():
+    search = request.args.get('q', '').strip()
+    role = request.args.get('role', '')
+    grade = request.args.get('grade', '').strip()
+    sort = request.args.get('sort', 'id')
+    direction = request.args.get('direction', 'asc')
+    page = request.args.get('page', 1, type=int)
+    per_page = min(max(request.args.get('per_page', 50, type=int), 10), 200)
+
+    if sort not in USER_SORT_COLUMNS:
+        sort = 'id'
+    if direction not in ('asc', 'desc'):
+        direction = 'asc'
+
+    filters = []
+    if search:
+        filters.append(or_(*[
+            and_(column >= value, column < value + '\uffff')
+            for column, value in ((func.lower(User.username), search.lower()), (func.lower(User.email), search.lower()),
+                                  (User.username, search), (User.email, search))
+        ]))
+    if role:
+        filters.append(User.role == role)
+    if grade:
+        filters.append(User.grade == grade)
+
+    query = User.query.filter(*filters)
+    sort_column = USER_SORT_COLUMNS[sort]
+    query = query.order_by(sort_column.desc() if direction == 'desc' else sort_column.asc(), User.id.asc())
+
+    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+    activity_counts = get_user_activity_counts([user.id for user in pagination.items])
+
+    role_counts = dict(db.session.query(User.role, func.count(User.id)).filter(*filters).group_by(User.role).all())
+
+    return render_template('admin_users.html',
+                           users=pagination.items,
+                           pagination=pagination,
+                           activity_counts=activity_counts,
+                           role_counts=role_counts,
+                           search=search,
+                           role=role,
+                           grade=grade,
+                           sort=sort,
+                           direction=direction,
+                           per_page=per_page)
+
+
+@bp.route('/admin/user/add', methods=['GET', 'POST'])
+@login_required
+@role_required(['администратор'])
+def add_user():
+    if request.method == 'POST':
+        username = request.form.get('username', '').strip()
+        email = request.form.get('email', '').strip()
+        password = request.form.get('password', '')
+        role = request.form.get('role', 'ученик')
+        grade = request.form.get('grade', '')
+
+        if not username or not email or not password:
+            flash('Заполните все обязательные поля!', 'danger')
+            return redirect(url_for('admin.add_user'))
+
+        if User.query.filter_by(username=username).first():
+            flash('Пользователь с таким именем уже существует!', 'danger')
+            return redirect(url_for('admin.add_user'))
+
+        if User.query.filter_by(email=email).first():
+            flash('Пользователь с таким email уже существует!', 'danger')
+            return redirect(url_for('admin.add_user'))
+
+        if len(password) < 6:
+            flash('Пароль должен содержать минимум 6 символов', 'danger')
+            return redirect(url_for('admin.add_user'))
+
+        user = User(
+            username=username,
+            email=email,
+            role=role,
+            grade=grade
+        )
+        user.set_password(password)
+
+        db.session.add(user)
+        db.session.commit()
+
+        flash(f'Пользователь {username} успешно добавлен!', 'success')
+        return redirect(url_for('admin.admin_users'))
+
+    return render_template('add_user.html')
+
+
+@bp.route('/admin/users/import', methods=['GET', 'POST'])
+@login_required
+@role_required(['администратор'])
+def import_users():
+    report = None
+
+    if request.method == 'POST':
+        upload = request.files.get('roster')
+
+        if not upload or not upload.filename:
+            flash('Выберите файл со списком пользователей.', 'danger')
+            return redirect(url_for('admin.import_users'))
+
+        fmt = 'json' if upload.filename.lower().endswith('.json') else 'csv'
+
+        from roster_import import parse_roster, import_roster
+
+        try:
+            rows = parse_roster(upload.read(), fmt)
+        except (ValueError, UnicodeDecodeError, csv.Error) as e:
+            flash(f'Не удалось прочитать файл: {escape(str(e))}', 'danger')
+            return redirect(url_for('admin.import_users'))
+
+        report = import_roster(rows, dry_run=bool(request.form.get('dry_run')))
+        current_app.logger.info(f'Roster import by {current_user.id}: {report["imported"]} imported, '
+                        f'{len(report["errors"])} errors, {report["seconds"]}s')
+
+        if report['imported']:
+            flash(f'Импортировано пользователей: {report["imported"]}.', 'success')
+        elif report['dry_run'] and report['valid']:
+            flash(f'Проверка прошла: {report["valid"]} строк готовы к импорту.', 'info')
+        if report['errors']:
+            flash(f'Строк с ошибками: {len(report["errors"])}.', 'warning')
+
+    return render_template('import_users.html', report=report)
+
+
+@bp.route('/admin/topups/import', methods=['GET', 'POST'])
+@login_required
+@role_required(['администратор'])
+def import_topups():
+    report = None
+
+    if request.method == 'POST':
+        upload = request.files.get('statement')
+
+        if not upload or not upload.filename:
+            flash('Выберите файл банковской выписки.', 'danger')
+            return redirect(url_for('admin.import_topups'))
+
+        from topup_import import import_statement
+
+        try:
+            report = import_statement(upload.stream, statement=upload.filename, imported_by=current_user.id,
+                                      dry_run=bool(request.form.get('dry_run')))
+        except (ValueError, UnicodeDecodeError, csv.Error) as e:
+            db.session.rollback()
+            flash(f'Не удалось прочитать выписку: {escape(str(e))}', 'danger')
+            return redirect(url_for('admin.import_topups'))
+
+        current_app.logger.info(f'Bank statement {upload.filename} imported by {current_user.id}: '
+                        f'{report["imported"]} credited, {report["already_imported"]} already imported, '
+                        f'{report["unmatched"]} unmatched, {report["seconds"]}s')
+
+        if not report['reconciled']:
+            flash(f'Балансы не сходятся с журналом у {len(report["mismatches"])} учеников!', 'danger')
+        if report['imported']:
+            flash(f'{"Готово к зачислению" if report["dry_run"] else "Зачислено"} платежей: {report["imported"]} '
+                  f'на {report["credited"]:.2f} руб.', 'success' if not report['dry_run'] else 'info')
+        if report['unmatched'] or report['error_count']:
+            flash(f'Строк, требующих ручной проверки: {report["error_count"]}.', 'warning')
+
+    return render_template('import_topups.html', report=report)
+
+
+@bp.route('/admin/user/<int:user_id>/edit', methods=['GET', 'POST'])
+@login_required
+@role_required(['администратор'])
+def edit_user(user_id):
+    user = User.query.get_or_404(user_id)
+
+    if request.method == 'POST':
+        username = request.form.get('username', '').strip()
+        email = request.form.get('email', '').strip()
+        role = request.form.get('role', 'ученик')
+        grade = request.form.get('grade', '')
+        balance = to_kopecks(request.form.get('balance', 0) or 0)
+        expected_balance = request.form.get('expected_balance', type=int)
+
+        if balance < 0:
+            flash('Баланс не может быть отрицательным!', 'danger')
+            return redirect(url_for('admin.edit_user', user_id=user_id))
+
+        if username != user.username and User.query.filter_by(username=username).first():
+            flash('Пользователь с таким именем уже существует!', 'danger')
+            return redirect(url_for('admin.edit_user', user_id=user_id))
+
+        if email != user.email and User.query.filter_by(email=email).first():
+            flash('Пользователь с таким email уже существует!', 'danger')
+            return redirect(url_for('admin.edit_user', user_id=user_id))
+
+        user.username = username
+        user.email = email
+        user.role = role
+        user.grade = grade
+
+        try:
+            if expected_balance is None:
+                raise BalanceChanged()
+            set_balance(user.id, balance, expected=expected_balance, created_by=current_user.id)
+        except BalanceChanged:
+            db.session.rollback()
+            flash('Баланс пользователя изменился, пока вы редактировали форму. Проверьте его и сохраните снова.',
+                  'warning')
+            return redirect(url_for('admin.edit_user', user_id=user_id))
+
+        db.session.commit()
+        invalidate_identity(user.id)
+
+        flash(f'Пользователь {username} успешно обновлен!', 'success')
+        return redirect(url_for('admin.admin_users'))
+
+    activity = get_user_activity_counts([user.id])[user.id]
+
+    return render_template('edit_user.html',
+                           user=user,
+                           orders_count=activity['orders'],
+                           feedbacks_count=activity['feedbacks'],
+                           allergies_count=activity['allergies'])
+
+
+@bp.route('/admin/user/<int:user_id>/delete')
+@login_required
+@role_required(['администратор'])
+def delete_user(user_id):
+    if user_id == current_user.id:
+        flash('Вы не можете удалить себя!', 'danger')
+        return redirect(url_for('admin.admin_users'))
+
+    user = User.query.get_or_404(user_id)
+    username = user.username
+
+    try:
+        result = remove_users(select_users(user_ids=[user_id]), keep_profiles=False,
+                              created_by=current_user.id)
+    except Exception as e:
+        current_app.logger.error(f'Removal of user {user_id} failed: {e}')
+        flash('Ошибка при удалении пользователя. Изменения отменены.', 'danger')
+        return redirect(url_for('admin.admin_users'))
+
+    message = f'Пользователь {username} удален! Заказов перенесено в архив: {result["orders"]}.'
+    if result['closed']:
+        message += f' Остаток баланса {to_rubles(result["closed"]):.2f} руб. списан при закрытии счёта.'
+    flash(message, 'success')
+    return redirect(url_for('admin.admin_users'))
+
+
+@bp.route('/admin/users/lifecycle', methods=['GET', 'POST'])
+@login_required
+@role_required(['администратор'])
+def user_lifecycle():
+    if request.method == 'POST':
+        grade = request.form.get('grade', '').strip()
+        mode = request.form.get('mode', 'archive')
+        confirmation = request.form.get('confirm_grade', '').strip()
+
+        if not grade or mode not in ('archive', 'delete'):
+            flash('Выберите класс и действие.', 'danger')
+            return redirect(url_for('admin.user_lifecycle'))
+
+        if confirmation != grade:
+            flash('Для подтверждения введите название класса точно так же, как в списке.', 'danger')
+            return redirect(url_for('admin.user_lifecycle'))
+
+        try:
+            result = remove_users(
+                select_users(grade=grade, role='ученик', exclude_ids=[current_user.id]),
+                keep_profiles=(mode == 'archive'),
+                created_by=current_user.id
+            )
+        except Exception as e:
+            current_app.logger.error(f'Bulk removal of grade {grade} failed: {e}')
+            flash('Ошибка при обработке класса. Изменения отменены.', 'danger')
+            return redirect(url_for('admin.user_lifecycle'))
+
+        current_app.logger.info(f'Admin {current_user.id} removed grade {grade} ({mode}): '
+                        f'{result["users"]} users, {result["orders"]} orders archived')
+        action = 'архивированы' if mode == 'archive' else 'удалены'
+        flash(f'Ученики класса {grade} {action}: {result["users"]}. '
+              f'Заказов перенесено в архив: {result["orders"]}.', 'success')
+        return redirect(url_for('admin.user_lifecycle'))
+
+    grades = db.session.query(
+        User.grade,
+        func.count(User.id).label('students')
+    ).filter(
+        User.role == 'ученик'
+    ).group_by(User.grade).order_by(User.grade).all()
+
+    archived = db.session.query(
+        ArchivedUser.grade,
+        func.count(ArchivedUser.id).label('students'),
+        func.max(ArchivedUser.archived_at).label('archived_at')
+    ).group_by(ArchivedUser.grade).order_by(ArchivedUser.grade).all()
+
+    return render_template('user_lifecycle.html', grades=grades, archived=archived)
+
+
+def sales_history():
+    columns = ['id', 'meal_id', 'meal_date', 'meal_type', 'total_price', 'status']
+    return union_all(
+        select(*[getattr(Order, c) for c in columns]),
+        select(*[getattr(ArchivedOrder, c) for c in columns])
+    ).subquery('sales')
+
+
+@bp.route('/statistics')
+@login_required
+@role_required(['администратор'])
+@read_only
+def statistics():
+    sales = sales_history()
+    dates = []
+    revenue_data = []
+    orders_data = []
+
+    for i in range(6, -1, -1):
+        day = date.today() - timedelta(days=i)
+        dates.append(day.strftime('%d.%m'))
+
+        revenue = db.session.query(func.sum(sales.c.total_price)).filter(
+            sales.c.meal_date == day,
+            sales.c.status == 'paid'
+        ).scalar() or 0
+        revenue_data.append(float(revenue))
+
+        orders = db.session.query(func.count(sales.c.id)).filter(sales.c.meal_date == day).scalar()
+        orders_data.append(orders)
+
+    popular_meals = db.session.query(
+        Meal.name,
+        func.count(sales.c.id).label('orders_count')
+    ).join(sales, sales.c.meal_id == Meal.id).group_by(Meal.id).order_by(func.count(sales.c.id).desc()).limit(5).all()
+
+    return render_template('statistics.html',
+                           dates=dates,
+                           revenue_data=revenue_data,
+                           orders_data=orders_data,
+                           popular_meals=popular_meals)
+
+
+@bp.route('/reports')
+@login_required
+@role_required(['администратор'])
+@read_only
+def reports():
+    today = date.today()
+    start_of_week = today - timedelta(days=today.weekday())
+    end_of_week = start_of_week + timedelta(days=6)
+
+    sales = sales_history()
+
+    total_users = User.query.count()
+    total_meals = Meal.query.count()
+    total_orders = db.session.query(func.count(sales.c.id)).filter(
+        sales.c.status.in_(['paid', 'served'])
+    ).scalar()
+    total_revenue = db.session.query(func.sum(sales.c.total_price)).filter(
+        sales.c.status.in_(['paid', 'served'])
+    ).scalar() or 0
+
+    weekly_orders = db.session.query(
+        Meal.name,
+        func.count(sales.c.id).label('sold_count'),
+        func.sum(sales.c.total_price).label('revenue')
+    ).join(sales, sales.c.meal_id == Meal.id).filter(
+        sales.c.meal_date >= start_of_week,
+        sales.c.meal_date <= end_of_week,
+        sales.c.status.in_(['paid', 'served']),
+        sales.c.meal_type.in_(['завтрак', 'обед'])
+    ).group_by(Meal.id).order_by(func.count(sales.c.id).desc()).all()
+
+    total_weekly_sales = sum(order.sold_count for order in weekly_orders)
+    total_weekly_revenue = sum(float(order.revenue or 0) for order in weekly_orders)
+
+    spoiled_meals = db.session.query(
+        Meal.name,
+        func.sum(PreparedMeal.quantity).label('spoiled_count')
+    ).join(PreparedMeal).filter(
+        PreparedMeal.expiry_date >= start_of_week,
+        PreparedMeal.expiry_date <= end_of_week,
+        PreparedMeal.quantity > 0
+    ).group_by(Meal.id).all()
+
+    total_spoiled = sum(meal.spoiled_count for meal in spoiled_meals)
+
+    weekly_purchases = db.session.query(
+        PurchaseRequest.ingredient,
+        PurchaseRequest.quantity,
+        PurchaseRequest.unit,
+        PurchaseRequest.notes,
+        PurchaseRequest.status
+    ).filter(
+        PurchaseRequest.requested_at >= start_of_week,
+        PurchaseRequest.requested_at <= end_of_week + timedelta(days=1),
+        PurchaseRequest.status == 'одобрена'
+    ).all()
+
+    purchase_summary = {}
+    for purchase in weekly_purchases:
+        key = f"{purchase.ingredient} ({purchase.unit})"
+        if key not in purchase_summary:
+            purchase_summary[key] = 0
+        purchase_summary[key] += purchase.quantity
+
+    weekly_subscriptions = db.session.query(
+        Subscription.meal_type,
+        func.count(Subscription.id).label('count'),
+        func.sum(
+            case(
+                (Subscription.meal_type == 'завтрак', 200),
+                (Subscription.meal_type == 'обед', 350),
+                else_=0
+            ) *
+            (days_between(Subscription.start_date, Subscription.end_date) / 7)
+        ).label('revenue')
+    ).filter(
+        Subscription.start_date >= start_of_week,
+        Subscription.start_date <= end_of_week
+    ).group_by(Subscription.meal_type).all()
+
+    total_subscriptions_count = sum(sub.count for sub in weekly_subscriptions)
+    total_subscriptions_revenue = sum(float(sub.revenue or 0) for sub in weekly_subscriptions)
+
+    popular_meals = db.session.query(
+        Meal.name,
+        func.count(sales.c.id).label('orders_count')
+    ).join(sales, sales.c.meal_id == Meal.id).filter(
+        sales.c.status.in_(['paid', 'served'])
+    ).group_by(Meal.id).order_by(func.count(sales.c.id).desc()).limit(5).all()
+
+    daily_stats = []
+    for i in range(7):
+        day = start_of_week + timedelta(days=i)
+        day_name = ['Пн', 'Вт', 'Ср', 'Чт', 'Пт', 'Сб', 'Вс'][i]
+
+        orders_count = db.session.query(func.count(sales.c.id)).filter(
+            sales.c.meal_date == day,
+            sales.c.status.in_(['paid', 'served'])
+        ).scalar()
+
+        daily_revenue = db.session.query(func.sum(sales.c.total_price)).filter(
+            sales.c.meal_date == day,
+            sales.c.status.in_(['paid', 'served'])
+        ).scalar() or 0
+
+        daily_stats.append({
+            'day': day_name,
+            'date': day.strftime('%d.%m'),
+            'orders': orders_count,
+            'revenue': float(daily_revenue)
+        })
+
+    return render_template('reports.html',
+                           total_users=total_users,
+                           total_meals=total_meals,
+                           total_orders=total_orders,
+                           total_revenue=total_revenue,
+
+                           start_of_week=start_of_week.strftime('%d.%m.%Y'),
+                           end_of_week=end_of_week.strftime('%d.%m.%Y'),
+
+                           weekly_orders=weekly_orders,
+                           total_weekly_sales=total_weekly_sales,
+                           total_weekly_revenue=total_weekly_revenue,
+
+                           spoiled_meals=spoiled_meals,
+                           total_spoiled=total_spoiled,
+
+                           purchase_summary=purchase_summary,
+                           weekly_purchases=weekly_purchases,
+
+                           weekly_subscriptions=weekly_subscriptions,
+                           total_subscriptions_count=total_subscriptions_count,
+                           total_subscriptions_revenue=total_subscriptions_revenue,
+
+                           popular_meals=popular_meals,
+
+                           daily_stats=daily_stats,
+
+                           today=today)
+
+
+@bp.route('/manage_requests')
+@login_required
+@role_required(['администратор'])
+def manage_requests():
+    purchase_requests = PurchaseRequest.query.order_by(
+        PurchaseRequest.requested_at.desc()
+    ).all()
+
+    for req in purchase_requests:
+        if req.requested_by:
+            req.requested_by_user = User.query.get(req.requested_by)
+        if req.approved_by:
+            req.approved_by_user = User.query.get(req.approved_by)
+
+    return render_template('manage_requests.html', purchase_requests=purchase_requests)
+
+
+@bp.route('/approve_request/<int:request_id>')
+@login_required
+@role_required(['администратор'])
+def approve_request(request_id):
+    purchase_request = PurchaseRequest.query.get_or_404(request_id)
+    lock_for_update(PurchaseRequest, purchase_request.id)
+
+    if purchase_request.status != 'на рассмотрении':
+        flash('Эта заявка уже обработана.', 'warning')
+        return redirect(url_for('admin.manage_requests'))
+
+    purchase_request.status = 'одобрена'
+    purchase_request.approved_by = current_user.id
+    purchase_request.approved_at = datetime.utcnow()
+
+    if purchase_request.ingredient_id:
+        inventory_item = Inventory.query.get(purchase_request.ingredient_id)
+    else:
+        inventory_item = Inventory.query.filter(
+            Inventory.ingredient == purchase_request.ingredient
+        ).first()
+
+    if inventory_item:
+        lock_for_update(Inventory, inventory_item.id)
+        inventory_item.quantity += purchase_request.quantity
+        inventory_item.last_updated = datetime.utcnow()
+    else:
+        inventory_item = Inventory(
+            ingredient=purchase_request.ingredient,
+            quantity=purchase_request.quantity,
+            unit=purchase_request.unit or 'шт',
+            min_quantity=purchase_request.quantity * 0.2
+        )
+        db.session.add(inventory_item)
+
+    if purchase_request.requested_by:
+        notification = Notification(
+            user_id=purchase_request.requested_by,
+            title='Заявка одобрена',
+            message=f'Ваша заявка на {purchase_request.ingredient} одобрена. Продукты добавлены на склад.',
+            type='система'
+        )
+        db.session.add(notification)
+
+    db.session.commit()
+    flash('Заявка одобрена и инвентарь пополнен!', 'success')
+    return redirect(url_for('admin.manage_requests'))
+
+
+@bp.route('/reject_request/<int:request_id>')
+@login_required
+@role_required(['администратор'])
+def reject_request(request_id):
+    purchase_request = PurchaseRequest.query.get_or_404(request_id)
+
+    if purchase_request.status != 'на рассмотрении':
+        flash('Эта заявка уже обработана.', 'warning')
+        return redirect(url_for('admin.manage_requests'))
+
+    purchase_request.status = 'отклонена'
+    purchase_request.approved_by = current_user.id
+    purchase_request.approved_at = datetime.utcnow()
+
+    if purchase_request.requested_by:
+        notification = Notification(
+            user_id=purchase_request.requested_by,
+            title='Заявка отклонена',
+            message=f'Ваша заявка на {purchase_request.ingredient} отклонена.',
+            type='система'
+        )
+        db.session.add(notification)
+
+    db.session.commit()
+    flash('Заявка отклонена!', 'success')
+    return redirect(url_for('admin.manage_requests'))
+
+
+@bp.route('/manage_requests/batch', methods=['POST'])
+@login_required
+@role_required(['администратор'])
+def batch_requests():
+    action = request.form.get('action')
+    request_ids = [int(rid) for rid in request.form.getlist('request_ids') if rid.isdigit()]
+
+    if action not in ('approve', 'reject') or not request_ids:
+        flash('Выберите заявки и действие.', 'warning')
+        return redirect(url_for('admin.manage_requests'))
+
+    pending_requests = PurchaseRequest.query.filter(
+        PurchaseRequest.id.in_(request_ids),
+        PurchaseRequest.status == 'на рассмотрении'
+    ).all()
+
+    if not pending_requests:
+        flash('Выбранные заявки уже обработаны.', 'warning')
+        return redirect(url_for('admin.manage_requests'))
+
+    now = datetime.utcnow()
+    new_status = 'одобрена' if action == 'approve' else 'отклонена'
+
+    try:
+        if action == 'approve':
+            totals_by_id = {}
+            totals_by_name = {}
+            for req in pending_requests:
+                if req.ingredient_id:
+                    totals_by_id[req.ingredient_id] = totals_by_id.get(req.ingredient_id, 0) + req.quantity
+                else:
+                    key = req.ingredient
+                    if key not in totals_by_name:
+                        totals_by_name[key] = {'quantity': 0, 'unit': req.unit}
+                    totals_by_name[key]['quantity'] += req.quantity
+
+            existing_ids = set()
+            if totals_by_id:
+                existing_ids = {row.id for row in db.session.query(Inventory.id).filter(
+                    Inventory.id.in_(totals_by_id.keys())
+                )}
+
+            names_to_ids = {}
+            if totals_by_name:
+                for item_id, name in db.session.query(Inventory.id, Inventory.ingredient).filter(
+                        Inventory.ingredient.in_(totals_by_name.keys())):
+                    names_to_ids.setdefault(name, item_id)
+
+            increments = {}
+            for item_id, amount in totals_by_id.items():
+                if item_id in existing_ids:
+                    increments[item_id] = increments.get(item_id, 0) + amount
+            for name, total in totals_by_name.items():
+                if name in names_to_ids:
+                    item_id = names_to_ids[name]
+                    increments[item_id] = increments.get(item_id, 0) + total['quantity']
+
+            for item_id, amount in increments.items():
+                db.session.execute(
+                    update(Inventory)
+                    .where(Inventory.id == item_id)
+                    .values(quantity=Inventory.quantity + amount, last_updated=now)
+                )
+
+            new_items = {}
+            for req in pending_requests:
+                if req.ingredient_id and req.ingredient_id in existing_ids:
+                    continue
+                if not req.ingredient_id and req.ingredient in names_to_ids:
+                    continue
+                if req.ingredient not in new_items:
+                    new_items[req.ingredient] = {'quantity': 0, 'unit': req.unit or 'шт'}
+                new_items[req.ingredient]['quantity'] += req.quantity
+
+            if new_items:
+                db.session.execute(insert(Inventory), [
+                    {
+                        'ingredient': name,
+                        'quantity': item['quantity'],
+                        'unit': item['unit'],
+                        'min_quantity': item['quantity'] * 0.2,
+                        'last_updated': now
+                    }
+                    for name, item in new_items.items()
+                ])
+
+            touch(db.session, INGREDIENTS)
+
+        db.session.execute(
+            update(PurchaseRequest)
+            .where(
+                PurchaseRequest.id.in_([req.id for req in pending_requests]),
+                PurchaseRequest.status == 'на рассмотрении'
+            )
+            .values(status=new_status, approved_by=current_user.id, approved_at=now)
+        )
+
+        if action == 'approve':
+            title = 'Заявка одобрена'
+            message = 'Ваша заявка на {} одобрена. Продукты добавлены на склад.'
+        else:
+            title = 'Заявка отклонена'
+            message = 'Ваша заявка на {} отклонена.'
+
+        notifications_rows = [
+            {
+                'user_id': req.requested_by,
+                'title': title,
+                'message': message.format(req.ingredient),
+                'type': 'система',
+                'is_read': False,
+                'created_at': now
+            }
+            for req in pending_requests if req.requested_by
+        ]
+        if notifications_rows:
+            db.session.execute(insert(Notification), notifications_rows)
+            touch(db.session, *{user_scope(NOTIFICATIONS, row['user_id']) for row in notifications_rows})
+
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f'Batch purchase request decision failed: {e}')
+        flash('Ошибка при обработке заявок. Изменения отменены.', 'danger')
+        return redirect(url_for('admin.manage_requests'))
+
+    if action == 'approve':
+        flash(f'Одобрено заявок: {len(pending_requests)}. Инвентарь пополнен!', 'success')
+    else:
+        flash(f'Отклонено заявок: {len(pending_requests)}.', 'success')
+    return redirect(url_for('admin.manage_requests'))
@@ -0,0 +1,103 @@
+from flask import Blueprint, current_app, render_template, redirect, url_for, flash, request
+from flask_login import login_user, logout_user, login_required, current_user
+
+from models import db, User
+from identity import invalidate_identity
+from passwords import PasswordPoolBusy, needs_rehash
+from forms import LoginForm, RegistrationForm
+
+bp = Blueprint('auth', __name__)
+
+
+@bp.app_errorhandler(PasswordPoolBusy)
+def password_pool_busy(e):
+    current_app.logger.warning(f'Password verification pool is saturated on {request.endpoint}')
+    flash('Сервер сейчас обрабатывает много входов. Попробуйте еще раз через несколько секунд.', 'warning')
+    return redirect(request.url)
+
+
+@bp.route('/login', methods=['GET', 'POST'])
+def login():
+    if current_user.is_authenticated:
+        return redirect(url_for('main.dashboard'))
+
+    form = LoginForm()
+    if form.validate_on_submit():
+        user = User.query.filter_by(username=form.username.data).first()
+        if user and user.check_password(form.password.data):
+            if needs_rehash(user.password_hash):
+                user.set_password(form.password.data)
+                db.session.commit()
+                current_app.logger.info(f'Password hash of user {user.id} upgraded to {current_app.config["PASSWORD_HASH_METHOD"]}')
+            login_user(user, remember=form.remember.data)
+            flash(f'Добро пожаловать, {user.username}!', 'success')
+            return redirect(url_for('main.dashboard'))
+        else:
+            flash('Неверное имя пользователя или пароль.', 'danger')
+
+    return render_template('login.html', form=form)
+
+
+@bp.route('/register', methods=['GET', 'POST'])
+def register():
+    if current_user.is_authenticated:
+        return redirect(url_for('main.dashboard'))
+
+    form = RegistrationForm()
+    if form.validate_on_submit():
+        user = User(
+            username=form.username.data,
+            email=form.email.data,
+            grade=form.grade.data,
+            role='ученик'
+        )
+        user.set_password(form.password.data)
+
+        try:
+            db.session.add(user)
+            db.session.commit()
+            flash('Регистрация успешна! Теперь вы можете войти.', 'success')
+            return redirect(url_for('auth.login'))
+        except Exception as e:
+            db.session.rollback()
+            flash('Ошибка при регистрации. Пользователь с таким именем или email уже существует.', 'danger')
+
+    return render_template('register.html', form=form)
+
+
+@bp.route('/logout')
+@login_required
+def logout():
+    logout_user()
+    flash('Вы вышли из системы.', 'info')
+    return redirect(url_for('auth.login'))
+
+
+@bp.route('/change_password', methods=['GET', 'POST'])
+@login_required
+def change_password():
+    if request.method == 'POST':
+        current_password = request.form.get('current_password')
+        new_password = request.form.get('new_password')
+        confirm_password = request.form.get('confirm_password')
+
+        if not current_user.check_password(current_password):
+            flash('Неверный текущий пароль.', 'danger')
+            return redirect(url_for('auth.change_password'))
+
+        if new_password != confirm_password:
+            flash('Новые пароли не совпадают.', 'danger')
+            return redirect(url_for('auth.change_password'))
+
+        if len(new_password) < 6:
+            flash('Пароль должен содержать минимум 6 символов.', 'danger')
+            return redirect(url_for('auth.change_password'))
+
+        current_user.set_password(new_password)
+        db.session.commit()
+        invalidate_identity(current_user.id)
+
+        flash('Пароль успешно изменен!', 'success')
+        return redirect(url_for('main.dashboard'))
+
+    return render_template('change_password.html')
@@ -0,0 +1,466 @@
+from datetime import datetime, date, timedelta
+from flask import Blueprint, current_app, render_template, redirect, url_for, flash, request, session, jsonify
+from flask_login import login_required, current_user
+
+from models import db, Meal, Order, Allergy, Inventory, PurchaseRequest, Notification, PreparedMeal
+from database import lock_for_update
+from forms import PurchaseRequestForm, InventoryForm, PrepareMealForm
+from conditional import conditional
+from versions import INGREDIENTS
+from views import role_required
+
+bp = Blueprint('chef', __name__)
+
+
+@bp.route('/chef')
+@login_required
+@role_required(['повар'])
+def chef_dashboard():
+    today = date.today()
+
+    today_orders = Order.query.filter(Order.meal_date == today).all()
+
+    orders_with_allergies = []
+    for order in today_orders:
+        user_allergies = Allergy.query.filter(Allergy.user_id == order.user_id).all()
+        allergen_list = [allergy.allergen for allergy in user_allergies]
+
+        orders_with_allergies.append({
+            'order': order,
+            'user': order.user,
+            'allergens': ', '.join(allergen_list) if allergen_list else 'нет'
+        })
+
+    pending_orders = len([o for o in today_orders if o.status == 'pending'])
+    paid_orders = len([o for o in today_orders if o.status == 'paid'])
+    served_orders = len([o for o in today_orders if o.status == 'served'])
+
+    seven_days_ago = today - timedelta(days=7)
+
+    recent_orders = Order.query.filter(
+        Order.meal_date >= seven_days_ago,
+        Order.meal_date <= today,
+        Order.status == 'served'
+    ).all()
+
+    breakfast_count = len([o for o in recent_orders if o.meal_type == 'завтрак'])
+    lunch_count = len([o for o in recent_orders if o.meal_type == 'обед'])
+
+    from collections import Counter
+    meal_counter = Counter()
+    for order in recent_orders:
+        if order.meal:
+            meal_counter[order.meal.name] += 1
+
+    popular_meals = meal_counter.most_common(5)
+
+    all_meals = Meal.query.filter(Meal.is_available == True).all()
+    all_meals_info = []
+    available_meals = []
+    low_stock_meals = []
+    unavailable_meals = []
+
+    for meal in all_meals:
+        available_quantity = meal.get_available_quantity()
+        prepared_info = meal.get_prepared_meals_info()
+
+        meal_info = {
+            'meal': meal,
+            'available_quantity': available_quantity,
+            'prepared_info': prepared_info
+        }
+        all_meals_info.append(meal_info)
+
+        if available_quantity >= 1:
+            available_meals.append(meal)
+        if available_quantity == 0:
+            unavailable_meals.append(meal)
+        elif available_quantity <= 2:
+            low_stock_meals.append(meal)
+
+    return render_template('chef_dashboard.html',
+                           orders_with_allergies=orders_with_allergies,
+                           pending_orders=pending_orders,
+                           paid_orders=paid_orders,
+                           served_orders=served_orders,
+                           breakfast_count=breakfast_count,
+                           lunch_count=lunch_count,
+                           popular_meals=popular_meals,
+                           all_meals_info=all_meals_info,
+                           available_meals=available_meals,
+                           low_stock_meals=low_stock_meals,
+                           unavailable_meals=unavailable_meals,
+                           today=today)
+
+
+@bp.route('/prepare_meal', methods=['GET', 'POST'])
+@login_required
+@role_required(['повар'])
+def prepare_meal():
+    form = PrepareMealForm()
+
+    available_meals = Meal.query.filter(Meal.is_available == True).all()
+    inventory_items = Inventory.query.all()
+
+    if available_meals:
+        form.meal_id.choices = [(m.id, f"{m.name} ({m.price} руб.)") for m in available_meals]
+    else:
+        form.meal_id.choices = [(0, 'Нет доступных блюд')]
+
+    if form.validate_on_submit():
+        meal = Meal.query.get(form.meal_id.data)
+        portions = form.quantity.data
+
+        if not meal:
+            flash('Блюдо не найдено.', 'danger')
+            return redirect(url_for('chef.prepare_meal'))
+
+        if portions <= 0 or portions > 100:
+            flash('Некорректное количество порций.', 'danger')
+            return redirect(url_for('chef.prepare_meal'))
+
+        missing_ingredients = []
+        can_prepare = True
+
+        if not hasattr(meal, 'meal_ingredients') or not meal.meal_ingredients:
+            flash(f'Для блюда "{meal.name}" не указаны ингредиенты.', 'danger')
+            return redirect(url_for('chef.prepare_meal'))
+
+        for mi in meal.meal_ingredients:
+            if not hasattr(mi, 'ingredient'):
+                current_app.logger.warning(f'MealIngredient {mi.id} не имеет атрибута ingredient')
+                continue
+
+            required_amount = mi.quantity_required * portions
+            if mi.ingredient.quantity < required_amount:
+                can_prepare = False
+                missing_ingredients.append({
+                    'id': mi.ingredient.id,
+                    'name': mi.ingredient.ingredient,
+                    'required': required_amount,
+                    'available': mi.ingredient.quantity,
+                    'unit': mi.unit or mi.ingredient.unit
+                })
+
+        if not can_prepare:
+            session['missing_ingredients'] = missing_ingredients
+            session['meal_id'] = meal.id
+            session['portions'] = portions
+            session['meal_name'] = meal.name
+            flash(f'Недостаточно ингредиентов для приготовления {portions} порций {meal.name}.', 'danger')
+            return redirect(url_for('chef.purchase_request'))
+
+        ingredients_used = []
+        for mi in meal.meal_ingredients:
+            if hasattr(mi, 'ingredient'):
+                ingredient = lock_for_update(Inventory, mi.ingredient_id)
+                required_amount = mi.quantity_required * portions
+
+                if ingredient.quantity < required_amount:
+                    flash(f'Недостаточно {ingredient.ingredient} во время приготовления.', 'danger')
+                    return redirect(url_for('chef.prepare_meal'))
+
+                ingredients_used.append({
+                    'name': ingredient.ingredient,
+                    'used': required_amount,
+                    'unit': mi.unit or ingredient.unit,
+                    'remaining': ingredient.quantity - required_amount
+                })
+
+                ingredient.quantity -= required_amount
+                ingredient.last_updated = datetime.utcnow()
+
+        prepared_meal = PreparedMeal(
+            meal_id=meal.id,
+            quantity=portions,
+            prepared_by=current_user.id,
+            prepared_date=date.today(),
+            expiry_date=form.expiry_date.data,
+            notes=form.notes.data or f'Приготовлено {portions} порций'
+        )
+
+        db.session.add(prepared_meal)
+
+        notification = Notification(
+            user_id=current_user.id,
+            title='Блюдо приготовлено',
+            message=f'Приготовлено {portions} порций {meal.name}. Ингредиенты списаны со склада.',
+            type='система'
+        )
+        db.session.add(notification)
+
+        ingredients_details = []
+        for ing in ingredients_used:
+            ingredients_details.append(f"{ing['used']} {ing['unit']} {ing['name']}")
+
+        detailed_notification = Notification(
+            user_id=current_user.id,
+            title='Детали использования ингредиентов',
+            message=f'Для приготовления {portions} порций {meal.name} использовано: {", ".join(ingredients_details)}',
+            type='система'
+        )
+        db.session.add(detailed_notification)
+
+        db.session.commit()
+
+        low_stock_meals = []
+        for m in available_meals:
+            if m.get_available_quantity() <= 2 and m.get_available_quantity() > 0:
+                low_stock_meals.append(m)
+
+        if low_stock_meals:
+            low_stock_message = "Скоро закончатся порции: "
+            low_stock_message += ", ".join([f"{m.name} ({m.get_available_quantity()} пор.)" for m in low_stock_meals])
+
+            low_stock_notification = Notification(
+                user_id=current_user.id,
+                title='Низкий запас порций',
+                message=low_stock_message,
+                type='система'
+            )
+            db.session.add(low_stock_notification)
+            db.session.commit()
+
+        flash(f'Успешно приготовлено {portions} порций {meal.name}! Ингредиенты списаны со склада.', 'success')
+        return redirect(url_for('chef.chef_dashboard'))
+
+    return render_template('prepare_meal.html',
+                           form=form,
+                           available_meals=available_meals,
+                           inventory_items=inventory_items,
+                           date=date)
+
+
+@bp.route('/api/meal/<int:meal_id>/ingredients')
+@login_required
+@role_required(['повар'])
+@conditional(INGREDIENTS)
+def api_meal_ingredients(meal_id):
+    try:
+        meal = Meal.query.get_or_404(meal_id)
+        portions = int(request.args.get('portions', 1))
+
+        ingredients = []
+
+        if hasattr(meal, 'meal_ingredients'):
+            current_app.logger.info(f"Найдено {len(meal.meal_ingredients.all())} ингредиентов для блюда {meal.name}")
+
+            for mi in meal.meal_ingredients:
+                if hasattr(mi, 'ingredient'):
+                    ingredients.append({
+                        'id': mi.ingredient.id,
+                        'name': mi.ingredient.ingredient,
+                        'quantity_required': mi.quantity_required * portions,
+                        'unit': mi.unit or mi.ingredient.unit,
+                        'available': mi.ingredient.quantity,
+                        'min_quantity': mi.ingredient.min_quantity
+                    })
+                else:
+                    current_app.logger.warning(f"У связи MealIngredient {mi.id} нет атрибута ingredient")
+        else:
+            current_app.logger.warning(f"У блюда {meal.name} нет атрибута meal_ingredients")
+
+        return jsonify({
+            'meal_id': meal.id,
+            'meal_name': meal.name,
+            'portions': portions,
+            'ingredients': ingredients,
+            'can_prepare': meal.can_prepare(portions) if hasattr(meal, 'can_prepare') else False,
+            'ingredients_count': len(ingredients)
+        })
+
+    except Exception as e:
+        current_app.logger.error(f"Error in api_meal_ingredients: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/inventory', methods=['GET', 'POST'])
+@login_required
+@role_required(['повар', 'администратор'])
+def inventory():
+    form = InventoryForm()
+
+    if form.validate_on_submit():
+        item = Inventory.query.filter(Inventory.ingredient == form.ingredient.data).first()
+
+        if item:
+            item.quantity = form.quantity.data
+            item.min_quantity = form.min_quantity.data
+            item.last_updated = datetime.utcnow()
+        else:
+            item = Inventory(
+                ingredient=form.ingredient.data,
+                quantity=form.quantity.data,
+                unit=form.unit.data,
+                min_quantity=form.min_quantity.data
+            )
+            db.session.add(item)
+
+        db.session.commit()
+        flash('Инвентарь обновлен!', 'success')
+        return redirect(url_for('chef.inventory'))
+
+    inventory_items = Inventory.query.all()
+    return render_template('inventory.html', form=form, inventory=inventory_items)
+
+
+@bp.route('/purchase_request', methods=['GET', 'POST'])
+@login_required
+@role_required(['повар'])
+def purchase_request():
+    form = PurchaseRequestForm()
+
+    existing_ingredients = Inventory.query.order_by(Inventory.ingredient).all()
+
+    if existing_ingredients:
+        form.ingredient_id.choices = [(i.id, f"{i.ingredient} ({i.unit}) - доступно: {i.quantity}") for i in
+                                      existing_ingredients]
+    else:
+        form.ingredient_id.choices = [(0, 'Нет продуктов в базе')]
+
+    missing_ingredients = session.get('missing_ingredients', [])
+    meal_id = session.get('meal_id')
+    portions = session.get('portions', 1)
+
+    if missing_ingredients and meal_id:
+        meal = Meal.query.get(meal_id)
+    else:
+        meal = None
+
+    if form.validate_on_submit():
+        ingredient = Inventory.query.get(form.ingredient_id.data)
+
+        if not ingredient:
+            flash('Продукт не найден.', 'danger')
+            return redirect(url_for('chef.purchase_request'))
+
+        request_item = PurchaseRequest(
+            ingredient=ingredient.ingredient,
+            ingredient_id=ingredient.id,
+            quantity=form.quantity.data,
+            unit=ingredient.unit,
+            requested_by=current_user.id,
+            status='на рассмотрении',
+            notes=form.notes.data
+        )
+
+        if hasattr(PurchaseRequest, 'urgency'):
+            request_item.urgency = form.urgency.data
+
+        db.session.add(request_item)
+
+        if missing_ingredients:
+            session.pop('missing_ingredients', None)
+            session.pop('meal_id', None)
+            session.pop('portions', None)
+
+            admin_notification = Notification(
+                user_id=1,
+                title='Срочная заявка на закупку',
+                message=f'Повар {current_user.username} создал заявку на закупку ингредиентов для приготовления {portions} порций {meal.name if meal else "блюда"}.',
+                type='система'
+            )
+            db.session.add(admin_notification)
+
+        db.session.commit()
+
+        flash('Заявка на закупку создана!', 'success')
+        return redirect(url_for('chef.chef_dashboard'))
+
+    return render_template('purchase_request.html',
+                           form=form,
+                           meal=meal,
+                           portions=portions,
+                           missing_ingredients=missing_ingredients,
+                           existing_ingredients=existing_ingredients)
+
+
+@bp.route('/prepared_meals')
+@login_required
+@role_required(['повар', 'администратор'])
+def prepared_meals():
+    today = date.today()
+    prepared = PreparedMeal.query.filter(
+        PreparedMeal.expiry_date >= today
+    ).order_by(PreparedMeal.prepared_date.desc()).all()
+
+    meals_summary = {}
+    for pm in prepared:
+        meal_name = pm.meal.name if hasattr(pm, 'meal') else f'Блюдо #{pm.meal_id}'
+        if meal_name not in meals_summary:
+            meals_summary[meal_name] = 0
+        meals_summary[meal_name] += pm.quantity
+
+    return render_template('prepared_meals.html',
+                           prepared=prepared,
+                           meals_summary=meals_summary,
+                           today=today)
+
+
+@bp.route('/serve_order/<int:order_id>')
+@login_required
+@role_required(['повар'])
+def serve_order(order_id):
+    order = Order.query.get_or_404(order_id)
+
+    if order.status != 'paid':
+        flash('Этот заказ не оплачен.', 'warning')
+        return redirect(url_for('chef.chef_dashboard'))
+
+    if order.is_served:
+        flash('Этот заказ уже выдан.', 'warning')
+        return redirect(url_for('chef.chef_dashboard'))
+
+    order.is_served = True
+    order.served_at = datetime.utcnow()
+    order.served_by = current_user.id
+    order.status = 'served'
+
+    notification = Notification(
+        user_id=order.user_id,
+        title='Питание выдано',
+        message=f'Ваш {order.meal_type} ({order.meal.name}) был выдан',
+        type='система'
+    )
+    db.session.add(notification)
+
+    db.session.commit()
+    flash('Заказ отмечен как выданный.', 'success')
+    return redirect(url_for('chef.chef_dashboard'))
+
+
+@bp.route('/use_ingredient', methods=['POST'])
+@login_required
+@role_required(['повар', 'администратор'])
+def use_ingredient():
+    ingredient_id = request.form.get('ingredient_id')
+    amount = float(request.form.get('amount', 0))
+
+    if not ingredient_id or amount <= 0:
+        flash('Некорректные данные.', 'danger')
+        return redirect(url_for('chef.inventory'))
+
+    ingredient = Inventory.query.get_or_404(ingredient_id)
+    lock_for_update(Inventory, ingredient.id)
+
+    if ingredient.quantity < amount:
+        flash(
+            f'Недостаточно {ingredient.ingredient}. Доступно: {ingredient.quantity} {ingredient.unit}, требуется: {amount} {ingredient.unit}.',
+            'danger')
+        return redirect(url_for('chef.inventory'))
+
+    ingredient.quantity -= amount
+    ingredient.last_updated = datetime.utcnow()
+
+    notification = Notification(
+        user_id=current_user.id,
+        title='Использован ингредиент',
+        message=f'Использовано {amount} {ingredient.unit} {ingredient.ingredient}. Остаток: {ingredient.quantity} {ingredient.unit}.',
+        type='система'
+    )
+    db.session.add(notification)
+
+    db.session.commit()
+
+    flash(f'Использовано {amount} {ingredient.unit} {ingredient.ingredient}.', 'success')
+    return redirect(url_for('chef.inventory'))
@@ -0,0 +1,91 @@
+from flask import Blueprint, render_template, redirect, url_for, request, jsonify
+from flask_login import login_required, current_user
+from markupsafe import Markup
+
+from models import db, Meal, Notification
+from fragments import cached_fragment
+from conditional import conditional
+from versions import MENU, NOTIFICATIONS
+
+bp = Blueprint('main', __name__)
+
+
+@bp.route('/')
+def index():
+    if current_user.is_authenticated:
+        return redirect(url_for('main.dashboard'))
+    return redirect(url_for('main.home'))
+
+
+@bp.route('/home')
+def home():
+    return render_template('home.html')
+
+
+@bp.route('/dashboard')
+@login_required
+def dashboard():
+    if current_user.role == 'ученик':
+        return redirect(url_for('student.student_dashboard'))
+    elif current_user.role == 'повар':
+        return redirect(url_for('chef.chef_dashboard'))
+    elif current_user.role == 'администратор':
+        return redirect(url_for('admin.admin_dashboard'))
+    return redirect(url_for('auth.login'))
+
+
+@bp.route('/notifications')
+@login_required
+def notifications():
+    user_notifications = Notification.query.filter(
+        Notification.user_id == current_user.id
+    ).order_by(Notification.created_at.desc()).all()
+
+    for notification in user_notifications:
+        if not notification.is_read:
+            notification.is_read = True
+
+    db.session.commit()
+
+    return render_template('notifications.html', notifications=user_notifications)
+
+
+@bp.route('/api/notifications/unread')
+@login_required
+@conditional(NOTIFICATIONS, per_user=(NOTIFICATIONS,))
+def unread_notifications():
+    count = Notification.query.filter(
+        Notification.user_id == current_user.id,
+        Notification.is_read == False
+    ).count()
+    return jsonify({'count': count})
+
+
+@bp.route('/menu')
+@login_required
+@conditional(MENU)
+def menu():
+    meal_type = request.args.get('type', 'завтрак')
+    can_order = current_user.role == 'ученик'
+
+    def render_meals():
+        all_meals = Meal.query.filter(
+            Meal.meal_type == meal_type,
+            Meal.is_available == True
+        ).all()
+
+        available_meals = []
+        for meal in all_meals:
+            if meal.get_available_quantity() > 0:
+                available_meals.append(meal)
+
+        return Markup(render_template('fragments/menu.html',
+                                      meals=available_meals,
+                                      meal_type=meal_type,
+                                      total_meals=len(all_meals),
+                                      available_meals_count=len(available_meals),
+                                      can_order=can_order))
+
+    return render_template('menu.html',
+                           meal_type=meal_type,
+                           menu_section=cached_fragment('menu', meal_type, render_meals, variant=can_order))
@@ -0,0 +1,32 @@
+import hmac
+
+from flask import Blueprint, Response, abort, current_app, request
+from flask_login import current_user
+
+from metrics import aggregate, business_gauges, render, CONTENT_TYPE
+from routing import read_only
+
+bp = Blueprint('metrics', __name__)
+
+
+def authorized():
+    token = current_app.config['METRICS_TOKEN']
+    if token and hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return True
+    if current_user.is_authenticated and current_user.role == 'администратор':
+        return True
+    return not token and current_app.config['METRICS_PUBLIC']
+
+
+@bp.route('/metrics')
+@read_only
+def metrics():
+    if not current_app.config['METRICS_ENABLED']:
+        abort(404)
+
+    if not authorized():
+        abort(401)
+
+    samples = aggregate(current_app.config['METRICS_DIR'])
+    samples.update(business_gauges())
+    return Response(render(samples), content_type=CONTENT_TYPE)
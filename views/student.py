@@ -0,0 +1,690 @@
+from datetime import datetime, date, timedelta
+from flask import Blueprint, render_template, redirect, url_for, flash, request, get_template_attribute
+from flask_login import login_required, current_user
+from sqlalchemy import func, update
+
+from models import db, User, Meal, Order, Allergy, Feedback, Notification, PreparedMeal, Subscription
+from entitlements import get_active_subscription, get_active_subscriptions, get_used_today, can_use_subscription
+from database import lock_for_update
+from wallet import credit, debit, order_charged, settle_pending_orders, to_kopecks, to_rubles, InsufficientFunds, \
+    BalanceChanged, TOP_UP, ORDER, ORDER_PAYMENT, SUBSCRIPTION
+from forms import AllergyForm, OrderForm, FeedbackForm, SubscriptionForm
+from fragments import cached_fragment
+from views import role_required
+
+bp = Blueprint('student', __name__)
+
+
+@bp.route('/student')
+@login_required
+@role_required(['ученик'])
+def student_dashboard():
+    today = date.today()
+
+    orders = Order.query.filter(
+        Order.user_id == current_user.id,
+        Order.meal_date >= today
+    ).order_by(Order.meal_date.desc()).limit(5).all()
+
+    active_subscriptions = get_active_subscriptions(current_user.id)
+    active_subscription = active_subscriptions[0] if active_subscriptions else None
+
+    notifications_list = Notification.query.filter(
+        Notification.user_id == current_user.id,
+        Notification.is_read == False
+    ).order_by(Notification.created_at.desc()).limit(3).all()
+
+    total_spent = db.session.query(func.sum(Order.total_price)).filter(
+        Order.user_id == current_user.id,
+        Order.status == 'paid'
+    ).scalar() or 0.0
+
+    pending_count, pending_total = db.session.query(func.count(Order.id), func.sum(Order.total_price)).filter(
+        Order.user_id == current_user.id,
+        Order.status == 'pending'
+    ).one()
+
+    return render_template('student_dashboard.html',
+                           orders=orders,
+                           total_spent=total_spent,
+                           pending_count=pending_count,
+                           pending_total=pending_total or 0.0,
+                           notifications=notifications_list,
+                           active_subscription=active_subscription)
+
+
+@bp.route('/add_balance', methods=['GET', 'POST'])
+@login_required
+@role_required(['ученик'])
+def add_balance():
+    if request.method == 'POST':
+        try:
+            amount = float(request.form.get('amount', 0))
+
+            if amount <= 0:
+                flash('Сумма должна быть больше 0.', 'danger')
+                return redirect(url_for('student.add_balance'))
+
+            if amount > 10000:
+                flash('Сумма не может превышать 10 000 руб.', 'danger')
+                return redirect(url_for('student.add_balance'))
+
+            balance_after = credit(current_user.id, to_kopecks(amount), TOP_UP)
+
+            notification = Notification(
+                user_id=current_user.id,
+                title='Пополнение баланса',
+                message=f'Ваш баланс пополнен на {amount} руб. Текущий баланс: {to_rubles(balance_after)} руб.',
+                type='оплата'
+            )
+            db.session.add(notification)
+
+            db.session.commit()
+
+            flash(f'Баланс успешно пополнен на {amount} руб.!', 'success')
+            return redirect(url_for('student.student_dashboard'))
+
+        except ValueError:
+            flash('Некорректная сумма.', 'danger')
+            return redirect(url_for('student.add_balance'))
+
+    return render_template('add_balance.html')
+
+
+@bp.route('/allergies', methods=['GET', 'POST'])
+@login_required
+@role_required(['ученик'])
+def allergies():
+    form = AllergyForm()
+
+    if form.validate_on_submit():
+        allergy = Allergy(
+            user_id=current_user.id,
+            allergen=form.allergen.data,
+            severity=form.severity.data,
+            notes=form.notes.data
+        )
+        db.session.add(allergy)
+        db.session.commit()
+        flash('Аллергия добавлена!', 'success')
+        return redirect(url_for('student.allergies'))
+
+    user_allergies = Allergy.query.filter(Allergy.user_id == current_user.id).all()
+    return render_template('allergies.html', form=form, allergies=user_allergies)
+
+
+@bp.route('/feedback', methods=['GET', 'POST'])
+@login_required
+@role_required(['ученик'])
+def feedback():
+    form = FeedbackForm()
+
+    available_meals = Meal.query.filter(
+        Meal.is_available == True
+    ).order_by(Meal.name).all()
+
+    if available_meals:
+        form.meal_id.choices = [(m.id, f"{m.name} ({m.meal_type})") for m in available_meals]
+    else:
+        form.meal_id.choices = [(0, 'Нет доступных блюд')]
+
+    if form.validate_on_submit():
+        meal = Meal.query.get(form.meal_id.data)
+
+        if not meal:
+            flash('Блюдо не найдено.', 'danger')
+            return redirect(url_for('student.feedback'))
+
+        existing_feedback = Feedback.query.filter(
+            Feedback.user_id == current_user.id,
+            Feedback.meal_id == meal.id
+        ).first()
+
+        if existing_feedback:
+            existing_feedback.rating = form.rating.data
+            existing_feedback.comment = form.comment.data
+            flash('Отзыв обновлен!', 'success')
+        else:
+            new_feedback = Feedback(
+                user_id=current_user.id,
+                meal_id=meal.id,
+                rating=form.rating.data,
+                comment=form.comment.data
+            )
+            db.session.add(new_feedback)
+            flash('Спасибо за отзыв!', 'success')
+
+        db.session.commit()
+        return redirect(url_for('student.feedback'))
+
+    user_feedbacks = db.session.query(
+        Feedback,
+        Meal.name.label('meal_name'),
+        Meal.meal_type.label('meal_type'),
+        User.username.label('username')
+    ).join(
+        Meal, Feedback.meal_id == Meal.id
+    ).join(
+        User, Feedback.user_id == User.id
+    ).filter(
+        Feedback.user_id == current_user.id
+    ).order_by(
+        Feedback.created_at.desc()
+    ).all()
+
+    feedbacks = []
+    for fb, meal_name, meal_type, username in user_feedbacks:
+        feedbacks.append({
+            'id': fb.id,
+            'rating': fb.rating,
+            'comment': fb.comment,
+            'created_at': fb.created_at,
+            'meal_name': meal_name,
+            'meal_type': meal_type,
+            'username': username,
+            'is_own': fb.user_id == current_user.id
+        })
+
+    return render_template('feedback.html',
+                           form=form,
+                           feedbacks=feedbacks,
+                           available_meals=available_meals)
+
+
+@bp.route('/feedback/<int:feedback_id>/edit', methods=['GET', 'POST'])
+@login_required
+@role_required(['ученик'])
+def edit_feedback(feedback_id):
+    feedback = Feedback.query.get_or_404(feedback_id)
+
+    if feedback.user_id != current_user.id:
+        flash('Это не ваш отзыв.', 'danger')
+        return redirect(url_for('student.feedback'))
+
+    form = FeedbackForm(obj=feedback)
+
+    available_meals = Meal.query.filter(
+        Meal.is_available == True
+    ).order_by(Meal.name).all()
+
+    form.meal_id.choices = [(m.id, f"{m.name} ({m.meal_type})") for m in available_meals]
+
+    if form.rating.data is None:
+        form.rating.data = feedback.rating
+
+    if form.validate_on_submit():
+        feedback.meal_id = form.meal_id.data
+        feedback.rating = form.rating.data
+        feedback.comment = form.comment.data
+
+        db.session.commit()
+        flash('Отзыв обновлен!', 'success')
+        return redirect(url_for('student.feedback'))
+
+    return render_template('edit_feedback.html', form=form, feedback=feedback)
+
+
+@bp.route('/feedback/<int:feedback_id>/delete', methods=['POST'])
+@login_required
+@role_required(['ученик'])
+def delete_feedback(feedback_id):
+    feedback = Feedback.query.get_or_404(feedback_id)
+
+    if feedback.user_id != current_user.id:
+        flash('Это не ваш отзыв.', 'danger')
+        return redirect(url_for('student.feedback'))
+
+    db.session.delete(feedback)
+    db.session.commit()
+
+    flash('Отзыв удален!', 'success')
+    return redirect(url_for('student.feedback'))
+
+
+def available_meals_for(meal_type):
+    all_meals = Meal.query.filter(
+        Meal.meal_type == meal_type,
+        Meal.is_available == True
+    ).all()
+
+    available_meals = []
+    for meal in all_meals:
+        if meal.get_available_quantity() >= 1:
+            available_meals.append(meal)
+    return available_meals
+
+
+def render_order_section(meal_type):
+    available_meals = available_meals_for(meal_type)
+    drinks = Meal.query.filter(
+        Meal.meal_type == 'напиток',
+        Meal.is_available == True
+    ).all()
+
+    return {
+        'meal_options': get_template_attribute('fragments/order.html', 'meal_options')(available_meals),
+        'drink_options': get_template_attribute('fragments/order.html', 'drink_options')(drinks),
+        'available_meals_card': get_template_attribute('fragments/order.html', 'available_meals_card')(
+            meal_type, available_meals, drinks
+        ),
+    }
+
+
+@bp.route('/order', methods=['GET', 'POST'])
+@login_required
+@role_required(['ученик'])
+def order():
+    form = OrderForm()
+
+    meal_type = request.args.get('type', request.form.get('meal_type', 'завтрак'))
+    form.meal_type.data = meal_type
+
+    if request.method == 'POST':
+        available_meals = available_meals_for(meal_type)
+        if available_meals:
+            form.meal_id.choices = [(m.id, f"{m.name} ({m.price} руб.) - {m.get_available_quantity()} порций доступно")
+                                    for m in available_meals]
+        else:
+            form.meal_id.choices = [(0, 'Нет доступных блюд для этого типа питания')]
+
+    today = date.today()
+    active_subscription = get_active_subscription(current_user.id, meal_type)
+    today_orders_with_subscription = get_used_today(current_user.id, meal_type)
+    can_use_subscription_today = can_use_subscription(current_user.id, meal_type)
+
+    if form.validate_on_submit():
+        meal = Meal.query.get(form.meal_id.data)
+        drink_id = request.form.get('drink_id')
+
+        if not meal or meal.id == 0:
+            flash('Блюдо не найдено.', 'danger')
+            return redirect(url_for('student.order', type=meal_type))
+
+        available_quantity = meal.get_available_quantity()
+        if available_quantity < 1:
+            flash(f'Блюдо "{meal.name}" временно недоступно. Нет приготовленных порций.', 'danger')
+            return redirect(url_for('student.order', type=meal_type))
+
+        drink = None
+        if drink_id and drink_id != '':
+            drink = Meal.query.get(drink_id)
+            if not drink or not drink.is_available:
+                flash('Напиток не найден или недоступен.', 'danger')
+                return redirect(url_for('student.order', type=meal_type))
+
+        meal_price = meal.price
+        drink_price = drink.price if drink else 0
+        total_price = meal_price + drink_price
+
+        payment_method = form.payment_method.data
+
+        if payment_method == 'разовая' and current_user.balance < total_price:
+            flash(f'Недостаточно средств на балансе. Нужно: {total_price} руб., есть: {current_user.balance} руб.',
+                  'danger')
+            return redirect(url_for('student.add_balance'))
+
+        if payment_method == 'абонемент':
+            if not can_use_subscription_today:
+                flash('Нельзя использовать абонемент. Либо его нет, либо вы уже использовали его сегодня.', 'danger')
+                return redirect(url_for('student.order', type=meal_type))
+            total_price = 0
+
+        prepared_meal = None
+        prepared_options = []
+
+        for prepared in meal.prepared_instances:
+            if prepared.expiry_date and prepared.expiry_date >= today and prepared.quantity > 0:
+                days_until_expiry = (prepared.expiry_date - today).days
+                prepared_options.append({
+                    'prepared': prepared,
+                    'days_until_expiry': days_until_expiry,
+                    'expiry_date': prepared.expiry_date
+                })
+
+        if prepared_options:
+            prepared_options.sort(key=lambda x: x['days_until_expiry'])
+            prepared_meal = lock_for_update(PreparedMeal, prepared_options[0]['prepared'].id)
+
+        if not prepared_meal or prepared_meal.quantity < 1:
+            flash(f'Блюдо "{meal.name}" временно недоступно. Нет приготовленных порций.', 'danger')
+            return redirect(url_for('student.order', type=meal_type))
+
+        order_record = Order(
+            user_id=current_user.id,
+            meal_id=meal.id,
+            meal_date=form.meal_date.data,
+            meal_type=meal_type,
+            total_price=0 if payment_method == 'абонемент' else meal_price,
+            payment_method=payment_method,
+            status='paid',
+            payment_date=datetime.utcnow(),
+            notes=f'Приготовленная порция: #{prepared_meal.id} (срок годности: {prepared_meal.expiry_date.strftime("%d.%m.%Y")})'
+        )
+
+        db.session.add(order_record)
+        db.session.flush()
+
+        prepared_meal.quantity -= 1
+
+        if drink:
+            drink_order = Order(
+                user_id=current_user.id,
+                meal_id=drink.id,
+                meal_date=form.meal_date.data,
+                meal_type='напиток',
+                total_price=0 if payment_method == 'абонемент' else drink_price,
+                payment_method=payment_method,
+                status='paid',
+                payment_date=order_record.payment_date,
+                notes=f'Дополнение к заказу #{order_record.id} ({meal_type})'
+            )
+            db.session.add(drink_order)
+
+        if payment_method == 'абонемент' and active_subscription:
+            active_subscription.used_meals += 1
+
+            if active_subscription.used_meals >= active_subscription.meals_per_week:
+                active_subscription.is_active = False
+                flash('Вы использовали все приемы пищи по абонементу на этой неделе.', 'warning')
+
+        if payment_method == 'разовая':
+            try:
+                debit(current_user.id, to_kopecks(total_price), ORDER, reference=f'order:{order_record.id}')
+            except InsufficientFunds:
+                db.session.rollback()
+                flash(f'Недостаточно средств на балансе. Нужно: {total_price} руб.', 'danger')
+                return redirect(url_for('student.add_balance'))
+
+        meal_names = meal.name
+        if drink:
+            meal_names += f" + {drink.name}"
+
+        payment_text = 'бесплатно по абонементу' if payment_method == 'абонемент' else f'{total_price} руб.'
+        notification = Notification(
+            user_id=current_user.id,
+            title='Новый заказ',
+            message=f'Вы заказали {meal_names} на {form.meal_date.data.strftime("%d.%m.%Y")} ({payment_text})',
+            type='заказ'
+        )
+        db.session.add(notification)
+
+        chef_notification = Notification(
+            user_id=1,
+            title='Новый заказ',
+            message=f'Ученик {current_user.username} заказал {meal.name} на {form.meal_date.data.strftime("%d.%m.%Y")}',
+            type='система'
+        )
+        db.session.add(chef_notification)
+
+        if prepared_meal.quantity == 1:
+            low_stock_notification = Notification(
+                user_id=1,
+                title='Низкий запас порций',
+                message=f'Осталась 1 порция {meal.name} (приготовление #{prepared_meal.id})',
+                type='система'
+            )
+            db.session.add(low_stock_notification)
+
+        db.session.commit()
+
+        if payment_method == 'абонемент':
+            flash('Заказ успешно создан! Бесплатно по абонементу (блюдо и напиток включены).', 'success')
+        else:
+            flash(f'Заказ успешно создан! Сумма: {total_price} руб.', 'success')
+
+        return redirect(url_for('student.student_dashboard'))
+
+    form.meal_date.data = date.today()
+
+    payment_methods = [('разовая', 'Разовая оплата')]
+    if can_use_subscription_today:
+        payment_methods.append(('абонемент', 'Абонемент (блюдо + напиток бесплатно)'))
+
+    return render_template('order.html',
+                           form=form,
+                           date=date,
+                           meal_type=meal_type,
+                           active_subscription=active_subscription,
+                           can_use_subscription_today=can_use_subscription_today,
+                           today_orders_with_subscription=today_orders_with_subscription,
+                           order_section=cached_fragment('order', meal_type, lambda: render_order_section(meal_type)),
+                           payment_methods=payment_methods,
+                           today=date.today())
+
+
+@bp.route('/allergy/<int:allergy_id>/edit', methods=['GET', 'POST'])
+@login_required
+@role_required(['ученик'])
+def edit_allergy(allergy_id):
+    allergy = Allergy.query.get_or_404(allergy_id)
+
+    if allergy.user_id != current_user.id:
+        flash('Это не ваша аллергия.', 'danger')
+        return redirect(url_for('student.allergies'))
+
+    form = AllergyForm(obj=allergy)
+
+    if form.validate_on_submit():
+        allergy.allergen = form.allergen.data
+        allergy.severity = form.severity.data
+        allergy.notes = form.notes.data
+
+        db.session.commit()
+        flash('Аллергия обновлена!', 'success')
+        return redirect(url_for('student.allergies'))
+
+    return render_template('edit_allergy.html', form=form, allergy=allergy)
+
+
+@bp.route('/allergy/<int:allergy_id>/delete')
+@login_required
+@role_required(['ученик'])
+def delete_allergy(allergy_id):
+    allergy = Allergy.query.get_or_404(allergy_id)
+
+    if allergy.user_id != current_user.id:
+        flash('Это не ваша аллергия.', 'danger')
+        return redirect(url_for('student.allergies'))
+
+    db.session.delete(allergy)
+    db.session.commit()
+
+    flash('Аллергия удалена!', 'success')
+    return redirect(url_for('student.allergies'))
+
+
+@bp.route('/receive_order/<int:order_id>')
+@login_required
+@role_required(['ученик'])
+def receive_order(order_id):
+    order = Order.query.get_or_404(order_id)
+
+    if order.user_id != current_user.id:
+        flash('Это не ваш заказ.', 'danger')
+        return redirect(url_for('student.student_dashboard'))
+
+    if order.status != 'paid':
+        flash('Этот заказ еще не оплачен.', 'warning')
+        return redirect(url_for('student.student_dashboard'))
+
+    if order.is_served:
+        flash('Этот заказ уже получен.', 'warning')
+        return redirect(url_for('student.student_dashboard'))
+
+    order.is_served = True
+    order.served_at = datetime.utcnow()
+    order.status = 'served'
+
+    notification = Notification(
+        user_id=current_user.id,
+        title='Питание получено',
+        message=f'Вы получили ваш {order.meal_type} ({order.meal.name})',
+        type='система'
+    )
+    db.session.add(notification)
+
+    db.session.commit()
+
+    flash('Заказ отмечен как полученный!', 'success')
+    return redirect(url_for('student.student_dashboard'))
+
+
+@bp.route('/pay_order/<int:order_id>')
+@login_required
+@role_required(['ученик'])
+def pay_order(order_id):
+    order = Order.query.get_or_404(order_id)
+
+    if order.user_id != current_user.id:
+        flash('Это не ваш заказ.', 'danger')
+        return redirect(url_for('student.student_dashboard'))
+
+    if order.status != 'pending':
+        flash('Этот заказ уже оплачен или отменен.', 'warning')
+        return redirect(url_for('student.student_dashboard'))
+
+    claimed = db.session.execute(
+        update(Order)
+        .where(Order.id == order.id, Order.status == 'pending', ~order_charged(Order.id, Order.user_id))
+        .values(status='paid', payment_date=datetime.utcnow())
+    ).rowcount
+    if not claimed:
+        db.session.rollback()
+        flash('Этот заказ уже оплачен или отменен.', 'warning')
+        return redirect(url_for('student.student_dashboard'))
+
+    try:
+        debit(current_user.id, to_kopecks(order.total_price), ORDER_PAYMENT, reference=f'order:{order.id}')
+    except InsufficientFunds:
+        db.session.rollback()
+        flash('Недостаточно средств на балансе.', 'danger')
+        return redirect(url_for('student.add_balance'))
+
+    notification = Notification(
+        user_id=current_user.id,
+        title='Заказ оплачен',
+        message=f'Заказ #{order.id} ({order.meal.name}) оплачен на сумму {order.total_price} руб.',
+        type='оплата'
+    )
+    db.session.add(notification)
+
+    db.session.commit()
+
+    flash(f'Заказ успешно оплачен! Списано {order.total_price} руб.', 'success')
+    return redirect(url_for('student.student_dashboard'))
+
+
+@bp.route('/pay_orders', methods=['POST'])
+@login_required
+@role_required(['ученик'])
+def pay_all_orders():
+    try:
+        result = settle_pending_orders(current_user.id)
+    except InsufficientFunds:
+        flash('Недостаточно средств на балансе, чтобы оплатить все заказы.', 'danger')
+        return redirect(url_for('student.add_balance'))
+    except BalanceChanged:
+        flash('Список неоплаченных заказов изменился. Попробуйте еще раз.', 'warning')
+        return redirect(url_for('student.student_dashboard'))
+
+    if not result['orders']:
+        flash('Нет заказов, ожидающих оплаты.', 'info')
+    else:
+        flash(f'Оплачено заказов: {result["orders"]}. Списано {to_rubles(result["kopecks"]):.2f} руб.', 'success')
+    return redirect(url_for('student.student_dashboard'))
+
+
+@bp.route('/buy_subscription', methods=['GET', 'POST'])
+@login_required
+@role_required(['ученик'])
+def buy_subscription():
+    form = SubscriptionForm()
+
+    if form.validate_on_submit():
+        meal_type = form.meal_type.data
+        weeks = form.weeks.data
+
+        today = date.today()
+        active_subscription_same_type = get_active_subscription(current_user.id, meal_type)
+
+        if active_subscription_same_type:
+            days_left = (active_subscription_same_type.end_date - today).days
+
+            flash(
+                f'У вас уже есть активный абонемент на {meal_type}, который действует до '
+                f'{active_subscription_same_type.end_date.strftime("%d.%m.%Y")} '
+                f'(осталось {days_left} дней). '
+                f'Пожалуйста, дождитесь окончания текущего абонемента перед покупкой нового.',
+                'danger'
+            )
+            return redirect(url_for('student.buy_subscription'))
+
+        base_prices = {
+            'завтрак': 200,
+            'обед': 350
+        }
+
+        total_price = base_prices.get(meal_type, 200) * weeks
+
+        if current_user.balance < total_price:
+            flash(f'Недостаточно средств. Нужно: {total_price} руб., на балансе: {current_user.balance} руб.', 'danger')
+            return redirect(url_for('student.add_balance'))
+
+        subscription = Subscription(
+            user_id=current_user.id,
+            meal_type=meal_type,
+            start_date=date.today(),
+            end_date=date.today() + timedelta(days=7 * weeks),
+            meals_per_week=5,
+            used_meals=0,
+            is_active=True
+        )
+
+        db.session.add(subscription)
+        db.session.flush()
+
+        try:
+            debit(current_user.id, to_kopecks(total_price), SUBSCRIPTION, reference=f'subscription:{subscription.id}')
+        except InsufficientFunds:
+            db.session.rollback()
+            flash(f'Недостаточно средств. Нужно: {total_price} руб.', 'danger')
+            return redirect(url_for('student.add_balance'))
+
+        notification = Notification(
+            user_id=current_user.id,
+            title='Абонемент куплен',
+            message=f'Вы купили абонемент на {meal_type} на {weeks} недель за {total_price} руб.',
+            type='оплата'
+        )
+        db.session.add(notification)
+
+        db.session.commit()
+
+        flash(f'Абонемент успешно куплен за {total_price} руб.!', 'success')
+        return redirect(url_for('student.student_dashboard'))
+
+    subscriptions = Subscription.query.filter(Subscription.user_id == current_user.id).all()
+
+    active_subscriptions_info = {}
+    today = date.today()
+
+    for meal_type in ['завтрак', 'обед']:
+        active_sub = get_active_subscription(current_user.id, meal_type)
+
+        if active_sub:
+            days_left = (active_sub.end_date - today).days
+            active_subscriptions_info[meal_type] = {
+                'exists': True,
+                'end_date': active_sub.end_date.strftime("%d.%m.%Y"),
+                'days_left': days_left,
+                'used_meals': active_sub.used_meals,
+                'meals_per_week': active_sub.meals_per_week
+            }
+        else:
+            active_subscriptions_info[meal_type] = {'exists': False}
+
+    return render_template('buy_subscription.html',
+                           form=form,
+                           subscriptions=subscriptions,
+                           date=date,
+                           active_subscriptions_info=active_subscriptions_info)
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+import sys
+from datetime import datetime
+from decimal import Decimal, ROUND_HALF_UP
+from pathlib import Path
+
+from sqlalchemy import BigInteger, Integer, String, cast, event, func, insert, literal, null, update, select
+
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir))
+
+from models import db, User, Order, Notification, LedgerEntry
+
+TOP_UP = 'пополнение'
+ORDER = 'заказ'
+ORDER_PAYMENT = 'оплата заказа'
+ORDER_SETTLEMENT = 'оплата всех заказов'
+SUBSCRIPTION = 'абонемент'
+ADJUSTMENT = 'корректировка'
+BANK_TOP_UP = 'банковский перевод'
+OPENING = 'начальный баланс'
+CLOSING = 'закрытие счёта'
+
+
+class InsufficientFunds(Exception):
+    pass
+
+
+class BalanceChanged(Exception):
+    pass
+
+
+def to_kopecks(amount):
+    return int((Decimal(str(amount)) * 100).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+
+def to_rubles(kopecks):
+    return kopecks / 100
+
+
+def _record(user_id, amount, balance_after, kind, reference, created_by):
+    db.session.execute(insert(LedgerEntry).values(
+        user_id=user_id,
+        amount=amount,
+        balance_after=balance_after,
+        kind=kind,
+        reference=reference,
+        created_by=created_by,
+        created_at=datetime.utcnow()
+    ))
+
+
+def _apply(user_id, amount, kind, reference=None, created_by=None, expected=None):
+    statement = update(User).where(User.id == user_id)
+    if expected is not None:
+        statement = statement.where(User.balance_kopecks == expected)
+    elif amount < 0:
+        statement = statement.where(User.balance_kopecks >= -amount)
+
+    balance_after = db.session.execute(
+        statement.values(balance_kopecks=User.balance_kopecks + amount).returning(User.balance_kopecks),
+        execution_options={'synchronize_session': 'fetch'}
+    ).scalar()
+
+    if balance_after is None:
+        if expected is not None:
+            raise BalanceChanged()
+        raise InsufficientFunds()
+
+    _record(user_id, amount, balance_after, kind, reference, created_by)
+    return balance_after
+
+
+def credit(user_id, kopecks, kind=TOP_UP, reference=None, created_by=None):
+    if kopecks <= 0:
+        raise ValueError('Сумма пополнения должна быть положительной')
+    return _apply(user_id, kopecks, kind, reference, created_by)
+
+
+def debit(user_id, kopecks, kind, reference=None, created_by=None):
+    if kopecks < 0:
+        raise ValueError('Сумма списания не может быть отрицательной')
+    if kopecks == 0:
+        return db.session.query(User.balance_kopecks).filter(User.id == user_id).scalar()
+    return _apply(user_id, -kopecks, kind, reference, created_by)
+
+
+def credit_many(credits, kind=TOP_UP, created_by=None):
+    entries = []
+    for user_id in sorted(credits):
+        items = credits[user_id]
+        total = sum(kopecks for kopecks, _ in items)
+        balance_after = db.session.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(balance_kopecks=User.balance_kopecks + total)
+            .returning(User.balance_kopecks),
+            execution_options={'synchronize_session': False}
+        ).scalar()
+        if balance_after is None:
+            raise LookupError(f'Пользователь #{user_id} не найден')
+
+        running = balance_after - total
+        for kopecks, reference in items:
+            running += kopecks
+            entries.append({
+                'user_id': user_id,
+                'amount': kopecks,
+                'balance_after': running,
+                'kind': kind,
+                'reference': reference,
+                'created_by': created_by,
+                'created_at': datetime.utcnow()
+            })
+
+    if entries:
+        db.session.execute(insert(LedgerEntry), entries)
+    return len(entries)
+
+
+def debit_many(user_id, charges, kind, created_by=None):
+    total = sum(kopecks for kopecks, _ in charges)
+    balance_after = db.session.execute(
+        update(User)
+        .where(User.id == user_id, User.balance_kopecks >= total)
+        .values(balance_kopecks=User.balance_kopecks - total)
+        .returning(User.balance_kopecks),
+        execution_options={'synchronize_session': 'fetch'}
+    ).scalar()
+    if balance_after is None:
+        raise InsufficientFunds()
+
+    running = balance_after + total
+    entries = []
+    for kopecks, reference in charges:
+        running -= kopecks
+        entries.append({
+            'user_id': user_id,
+            'amount': -kopecks,
+            'balance_after': running,
+            'kind': kind,
+            'reference': reference,
+            'created_by': created_by,
+            'created_at': datetime.utcnow()
+        })
+    db.session.execute(insert(LedgerEntry), entries)
+    return balance_after
+
+
+def set_balance(user_id, kopecks, expected, created_by=None):
+    if kopecks < 0:
+        raise ValueError('Баланс не может быть отрицательным')
+    if kopecks == expected:
+        return expected
+    return _apply(user_id, kopecks - expected, ADJUSTMENT, created_by=created_by, expected=expected)
+
+
+def close_accounts(user_ids, created_by=None):
+    now = datetime.utcnow()
+    total = db.session.query(func.coalesce(func.sum(User.balance_kopecks), 0)).filter(User.id.in_(user_ids)).scalar()
+    if not total:
+        return 0
+
+    db.session.execute(
+        insert(LedgerEntry).from_select(
+            ['user_id', 'amount', 'balance_after', 'kind', 'reference', 'created_by', 'created_at'],
+            select(User.id, -User.balance_kopecks, literal(0, BigInteger), literal(CLOSING, String), null(),
+                   literal(created_by, Integer), literal(now))
+            .where(User.id.in_(user_ids), User.balance_kopecks != 0)
+        )
+    )
+    db.session.execute(
+        update(User).where(User.id.in_(user_ids), User.balance_kopecks != 0).values(balance_kopecks=0),
+        execution_options={'synchronize_session': False}
+    )
+    return total
+
+
+def order_charged(order_id, user_id):
+    return select(LedgerEntry.id).where(
+        LedgerEntry.user_id == user_id,
+        LedgerEntry.reference == literal('order:', String) + cast(order_id, String)
+    ).exists()
+
+
+def settle_pending_orders(user_id):
+    pending = db.session.query(Order.id, Order.total_price).filter(
+        Order.user_id == user_id,
+        Order.status == 'pending',
+        ~order_charged(Order.id, Order.user_id)
+    ).order_by(Order.id).all()
+    if not pending:
+        return {'orders': 0, 'kopecks': 0, 'balance': None}
+
+    order_ids = [row.id for row in pending]
+    charges = [(to_kopecks(row.total_price), f'order:{row.id}') for row in pending]
+    total = sum(kopecks for kopecks, _ in charges)
+
+    claimed = db.session.execute(
+        update(Order)
+        .where(Order.id.in_(order_ids), Order.status == 'pending')
+        .values(status='paid', payment_date=datetime.utcnow())
+    ).rowcount
+    if claimed != len(order_ids):
+        db.session.rollback()
+        raise BalanceChanged()
+
+    try:
+        balance_after = debit_many(user_id, charges, ORDER_SETTLEMENT)
+    except InsufficientFunds:
+        db.session.rollback()
+        raise
+
+    db.session.add(Notification(
+        user_id=user_id,
+        title='Заказы оплачены',
+        message=f'Оплачено заказов: {len(order_ids)} (#{", #".join(map(str, order_ids))}) '
+                f'на сумму {to_rubles(total):.2f} руб. Остаток: {to_rubles(balance_after):.2f} руб.',
+        type='оплата'
+    ))
+    db.session.commit()
+
+    return {'orders': len(order_ids), 'kopecks': total, 'balance': balance_after}
+
+
+def reconcile(user_ids=None):
+    ledger = select(
+        LedgerEntry.user_id,
+        func.coalesce(func.sum(LedgerEntry.amount), 0).label('total')
+    ).group_by(LedgerEntry.user_id).subquery()
+
+    query = db.session.query(
+        User.id, User.username, User.balance_kopecks, func.coalesce(ledger.c.total, 0)
+    ).outerjoin(ledger, ledger.c.user_id == User.id)
+    if user_ids is not None:
+        query = query.filter(User.id.in_(user_ids))
+
+    return [
+        {'user_id': user_id, 'username': username, 'balance': balance, 'ledger': total}
+        for user_id, username, balance, total in query
+        if balance != total or balance < 0
+    ]
+
+
+@event.listens_for(LedgerEntry, 'before_update')
+@event.listens_for(LedgerEntry, 'before_delete')
+def _ledger_is_append_only(mapper, connection, target):
+    raise RuntimeError('Журнал операций кошелька нельзя изменять')
+
+
+def main():
+    from application import create_app
+
+    app = create_app(register_views=False)
+
+    with app.app_context():
+        mismatches = reconcile()
+
+    if not mismatches:
+        print("✅ Балансы всех пользователей сходятся с журналом операций")
+        return
+
+    print(f"❌ Расхождений: {len(mismatches)}")
+    for row in mismatches:
+        print(f"  • {row['username']} (#{row['user_id']}): баланс {to_rubles(row['balance']):.2f} ₽, "
+              f"по журналу {to_rubles(row['ledger']):.2f} ₽")
+    sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()